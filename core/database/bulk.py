@@ -0,0 +1,235 @@
+# core/database/bulk.py
+"""
+Bulk writes of many rows, e.g. the output of a previous workflow action.
+
+Rows are written in batches, each in its own transaction, so a failed batch
+does not undo the ones written before it and is reported with the rows it
+held. Tables are loaded through the fastest path of the connector: COPY FROM
+STDIN on PostgreSQL, executemany elsewhere, which MySQL sends as multi-row
+INSERTs and Oracle runs with batch errors, reporting rejected rows one by one.
+"""
+
+import logging
+import re
+import time
+from typing import Dict, Any, Optional, Tuple, Union, Sequence
+
+from django.conf import settings
+
+from .connectors import DatabaseConnector
+from .pool import pooled_connector
+from .results import ResultSet
+
+logger = logging.getLogger(__name__)
+
+# Default rows per batch, overridable through DATABASE_BULK_BATCH_SIZE
+DEFAULT_BATCH_SIZE = 1000
+
+# Failed batches and rejected rows listed in the summary; all are counted
+MAX_REPORTED_ERRORS = 100
+
+BULK_METHODS = ('auto', 'copy', 'batch')
+
+# Table and column names are put in the SQL text, so only plain identifiers are allowed
+_TABLE_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_$]*(\.[A-Za-z_][A-Za-z0-9_$]*)?$')
+_COLUMN_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_$]*$')
+
+
+def is_valid_table_name(name: str) -> bool:
+    """
+    Whether a name can be used as the table of a bulk write, optionally with its schema.
+    """
+    return bool(name) and _TABLE_NAME.match(name) is not None
+
+
+def is_valid_column_name(name: str) -> bool:
+    """
+    Whether a name can be used as a column of a bulk write.
+    """
+    return bool(name) and _COLUMN_NAME.match(name) is not None
+
+
+def get_batch_size(batch_size: Optional[int] = None) -> int:
+    """
+    Get the rows per batch, defaulting to DATABASE_BULK_BATCH_SIZE.
+    """
+    return max(int(batch_size or getattr(settings, 'DATABASE_BULK_BATCH_SIZE', DEFAULT_BATCH_SIZE)), 1)
+
+
+def to_result_set(data: Any, columns: Optional[Sequence[str]] = None) -> ResultSet:
+    """
+    Get rows to write as a ResultSet.
+    
+    Args:
+        data: A ResultSet, its to_data() form, a list of dictionaries, or a
+            list of value lists when columns are given
+        columns: Columns to write, in order; defaults to all columns of the data
+    
+    Returns:
+        ResultSet with the given columns
+    
+    Raises:
+        ValueError: If the data is not rows, or lacks one of the columns
+    """
+    if isinstance(data, dict) and not ResultSet.is_table_data(data):
+        data = [data]
+    
+    if isinstance(data, ResultSet):
+        rows = data
+    elif ResultSet.is_table_data(data):
+        rows = ResultSet.from_data(data)
+    elif isinstance(data, (list, tuple)):
+        if not data:
+            return ResultSet(columns or ())
+        if isinstance(data[0], dict):
+            if columns:
+                # Rows may not all have the same keys, so read each column by name
+                return ResultSet(columns, [tuple(record.get(column) for column in columns) for record in data])
+            rows = ResultSet.from_dicts(data)
+        elif columns:
+            return ResultSet(columns, [tuple(row) for row in data])
+        else:
+            raise ValueError("Rows without column names need a list of columns")
+    else:
+        raise ValueError(f"Cannot write {type(data).__name__} data as rows")
+    
+    if not columns or tuple(columns) == rows.columns:
+        return rows
+    missing = [column for column in columns if column not in rows.columns]
+    if missing:
+        raise ValueError(f"Columns not found in the data: {', '.join(missing)}")
+    indexes = [rows.columns.index(column) for column in columns]
+    return ResultSet(columns, [tuple(row[i] for i in indexes) for row in rows.rows])
+
+
+def insert_query(table: str, columns: Sequence[str]) -> str:
+    """
+    Build an INSERT statement for a table, with a :name placeholder per column.
+    """
+    return (
+        f"INSERT INTO {table} ({', '.join(columns)}) "
+        f"VALUES ({', '.join(f':{column}' for column in columns)})"
+    )
+
+
+def bulk_write(
+    connector: Union[DatabaseConnector, Dict[str, Any]],
+    data: Any,
+    table: Optional[str] = None,
+    query: Optional[str] = None,
+    columns: Optional[Sequence[str]] = None,
+    method: str = 'auto',
+    batch_size: Optional[int] = None,
+    timeout: Optional[int] = None,
+    stop_on_error: bool = False
+) -> Tuple[bool, Dict[str, Any], str]:
+    """
+    Write rows to a database in batches.
+    
+    Args:
+        connector: Either a DatabaseConnector instance or connection info dict,
+            in which case a pooled connection is used
+        data: Rows to write, see to_result_set
+        table: Table to insert the rows into
+        query: Write statement run for every row instead, with a :name
+            placeholder per column, e.g. an UPDATE or an upsert
+        columns: Columns to write, defaults to all columns of the data
+        method: 'copy' to load the table with the database's bulk load protocol,
+            'batch' for executemany, or 'auto' for copy where the database supports it
+        batch_size: Rows per batch and transaction, defaults to DATABASE_BULK_BATCH_SIZE
+        timeout: Optional timeout in seconds, for each batch
+        stop_on_error: Stop at the first failed batch instead of writing the others
+    
+    Returns:
+        Tuple of (success, summary, error_message); success is False if any
+        row failed, and the summary lists the failed batches and rows
+    """
+    # Borrow a pooled connection if connection_info was provided
+    if isinstance(connector, dict):
+        try:
+            with pooled_connector(connector) as connector_instance:
+                return bulk_write(
+                    connector_instance, data, table, query, columns, method, batch_size, timeout, stop_on_error
+                )
+        except Exception as e:
+            logger.error(f"Unable to get a database connection: {str(e)}")
+            return False, {}, f"Unable to get a database connection: {str(e)}"
+    
+    if method not in BULK_METHODS:
+        return False, {}, f"Unknown bulk write method: {method}"
+    if not table and not query:
+        return False, {}, "A table or a write statement is required"
+    if table and not is_valid_table_name(table):
+        return False, {}, f"Invalid table name: {table}"
+    
+    try:
+        rows = to_result_set(data, columns)
+    except ValueError as e:
+        return False, {}, str(e)
+    
+    invalid = [column for column in rows.columns if not is_valid_column_name(str(column))]
+    if invalid:
+        return False, {}, f"Invalid column names: {', '.join(map(str, invalid))}"
+    
+    if method == 'auto':
+        method = 'copy' if table and not query and connector.supports_copy else 'batch'
+    elif method == 'copy' and (query or not connector.supports_copy):
+        return False, {}, "Bulk load is only available for PostgreSQL tables, without a write statement"
+    if method == 'batch' and not query:
+        query = insert_query(table, rows.columns)
+    
+    batch_size = get_batch_size(batch_size)
+    summary = {
+        "method": method,
+        "batch_size": batch_size,
+        "rows": len(rows),
+        "rows_written": 0,
+        "rows_failed": 0,
+        "batches": 0,
+        "failed_batches": [],
+        "row_errors": [],
+    }
+    start_time = time.time()
+    
+    for start in range(0, len(rows), batch_size):
+        batch = rows.rows[start:start + batch_size]
+        summary["batches"] += 1
+        try:
+            if method == 'copy':
+                written, row_errors = connector.copy_rows(table, rows.columns, batch, timeout), []
+            else:
+                written, row_errors = connector.write_batch(query, rows.columns, batch, timeout)
+        except Exception as e:
+            logger.error(f"Bulk write batch {summary['batches']} (rows {start}-{start + len(batch) - 1}) failed: {str(e)}")
+            summary["rows_failed"] += len(batch)
+            if len(summary["failed_batches"]) < MAX_REPORTED_ERRORS:
+                summary["failed_batches"].append({
+                    "batch": summary["batches"],
+                    "first_row": start,
+                    "rows": len(batch),
+                    "error": str(e),
+                })
+            if stop_on_error:
+                break
+            continue
+        
+        summary["rows_written"] += written
+        summary["rows_failed"] += len(row_errors)
+        for offset, message in row_errors[:MAX_REPORTED_ERRORS - len(summary["row_errors"])]:
+            summary["row_errors"].append({"batch": summary["batches"], "row": start + offset, "error": message})
+    
+    execution_time = time.time() - start_time
+    summary["execution_time"] = f"{execution_time:.2f}s"
+    logger.info(
+        f"Bulk write of {summary['rows']} rows in {summary['batches']} batches by {method}: "
+        f"{summary['rows_written']} written, {summary['rows_failed']} failed in {execution_time:.2f}s"
+    )
+    
+    if summary["rows_failed"]:
+        error = f"{summary['rows_failed']} of {summary['rows']} rows failed"
+        if summary["failed_batches"]:
+            error += f", first error: {summary['failed_batches'][0]['error']}"
+        elif summary["row_errors"]:
+            error += f", first error: {summary['row_errors'][0]['error']}"
+        return False, summary, error
+    return True, summary, ""
@@ -5,17 +5,80 @@ This module provides connector classes for different database types and
 factory functions to create appropriate connectors based on connection info.
 """
 
+import io
+import json
 import logging
 import importlib
+import uuid
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, Tuple, List
+from typing import Dict, Any, Optional, Tuple, List, Iterator, Sequence
 from urllib.parse import urlparse
 
+from .params import convert_named_params, convert_named_params_many
+from .results import ResultSet
+from .statement_cache import StatementCache, StatementCacheStats, get_cache_size, is_preparable
+
 logger = logging.getLogger(__name__)
 
+# Rows fetched per round-trip when streaming, unless the connection sets fetch_size
+DEFAULT_FETCH_SIZE = 1000
+
+
+# Database type -> connector class, filled by register_connector
+CONNECTOR_REGISTRY: Dict[str, type] = {}
+
+
+def register_connector(*db_types: str):
+    """
+    Class decorator registering a connector class for one or more database types,
+    so get_connector can create it, e.g.
+        @register_connector('sqlite', 'sqlite3')
+        class SQLiteConnector(DatabaseConnector): ...
+    """
+    def decorator(connector_class):
+        for db_type in db_types:
+            CONNECTOR_REGISTRY[db_type.lower()] = connector_class
+        return connector_class
+    return decorator
+
+
+def _pyformat_query(query: str, params: Optional[Dict[str, Any]]) -> str:
+    """
+    Convert :name placeholders to the %(name)s format of psycopg2 and MySQL.
+    """
+    for key in params or {}:
+        query = query.replace(f":{key}", f"%({key})s")
+    return query
+
+
+def _copy_csv_field(value: Any) -> str:
+    """
+    Format a value as a field of COPY's CSV format. Every value is quoted
+    but NULL, which COPY reads from an unquoted empty field.
+    """
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, default=str)
+    text = str(value)
+    return '"' + text.replace('"', '""') + '"'
+
+
 class DatabaseConnector(ABC):
     """Abstract base class for database connectors."""
     
+    # Cheapest query to check a connection is alive, e.g. before reusing a pooled one
+    validation_query = "SELECT 1"
+    
+    # Wraps a SELECT {query} to return at most {limit} rows, see utils.limit_query
+    limit_query_template = "SELECT * FROM ({query}) limited_rows LIMIT {limit}"
+    
+    # DB-API paramstyle of the driver, for statements bound by write_batch
+    paramstyle = 'named'
+    
+    # Whether copy_rows can load a table faster than batched INSERTs, see bulk.bulk_write
+    supports_copy = False
+    
     def __init__(self, connection_info: Dict[str, Any]):
         """
         Initialize the database connector.
@@ -25,7 +88,32 @@ class DatabaseConnector(ABC):
         """
         self.connection_info = connection_info
         self.connection = None
+        # StatementCache of the connection, set on pooled connections
+        self.statement_cache = None
+        # Driver error of the last failed connect(), see connection_failed_message
+        self.connect_error = None
+    
+    def connection_failed_message(self) -> str:
+        """
+        Get the error message of a failed connect(), including the driver's
+        error so retries can tell e.g. rejected credentials from a lost server.
+        """
+        if self.connect_error:
+            return f"Failed to establish connection: {self.connect_error}"
+        return "Failed to establish connection"
+    
+    def new_statement_cache(self, stats: Optional[StatementCacheStats] = None) -> Optional[StatementCache]:
+        """
+        Create the statement cache for this connector's connection.
         
+        Args:
+            stats: Counters the cache reports to
+            
+        Returns:
+            StatementCache, or None if the connector does not cache statements
+        """
+        return None
+    
     @abstractmethod
     def connect(self) -> bool:
         """
@@ -62,7 +150,8 @@ class DatabaseConnector(ABC):
         self, 
         query: str, 
         params: Optional[Dict[str, Any]] = None,
-        timeout: Optional[int] = None
+        timeout: Optional[int] = None,
+        as_result_set: bool = False
     ) -> Tuple[bool, Any, str]:
         """
         Execute a SQL query and return the results.
@@ -71,12 +160,120 @@ class DatabaseConnector(ABC):
             query: SQL query string
             params: Optional parameters for query
             timeout: Optional query timeout in seconds
+            as_result_set: Return rows as a ResultSet of tuples instead of
+                a list of dictionaries, which takes far less memory
             
         Returns:
             Tuple of (success, results, error_message)
         """
         pass
     
+    def stream_query(
+        self, 
+        query: str, 
+        params: Optional[Dict[str, Any]] = None,
+        fetch_size: Optional[int] = None,
+        timeout: Optional[int] = None,
+        as_result_set: bool = False
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Execute a SELECT query and yield its rows in batches, without holding
+        the whole result in memory.
+        
+        This default implementation runs execute_query and splits its result;
+        connectors with server-side cursors override it to fetch batch by batch.
+        
+        Args:
+            query: SQL query string
+            params: Optional parameters for query
+            fetch_size: Rows per batch, defaults to the connection's fetch_size
+            timeout: Optional query timeout in seconds
+            as_result_set: Yield ResultSets of tuples instead of lists of dictionaries
+            
+        Yields:
+            Batches of up to fetch_size rows
+            
+        Raises:
+            RuntimeError: If the query fails
+        """
+        fetch_size = self._fetch_size(fetch_size)
+        success, results, error = self.execute_query(query, params, timeout, as_result_set=as_result_set)
+        if not success:
+            raise RuntimeError(error)
+        if isinstance(results, (list, ResultSet)):
+            for start in range(0, len(results), fetch_size):
+                yield results[start:start + fetch_size]
+    
+    def _fetch_size(self, fetch_size: Optional[int] = None) -> int:
+        """
+        Get the rows to fetch per round-trip when streaming.
+        """
+        return max(fetch_size or self.connection_info.get('fetch_size') or DEFAULT_FETCH_SIZE, 1)
+    
+    def write_batch(
+        self,
+        query: str,
+        columns: Sequence[str],
+        rows: List[tuple],
+        timeout: Optional[int] = None
+    ) -> Tuple[int, List[Tuple[int, str]]]:
+        """
+        Run a write statement once per row with executemany, in one transaction.
+        
+        Args:
+            query: INSERT, UPDATE or DELETE statement with :name placeholders
+            columns: Column names of the row values
+            rows: Row value tuples, in column order
+            timeout: Optional timeout in seconds
+            
+        Returns:
+            Tuple of (rows written, errors of single rows as (row offset, message)),
+            for drivers that skip failed rows instead of failing the batch
+            
+        Raises:
+            Exception: If the batch failed, after rolling it back
+        """
+        if self.connection is None and not self.connect():
+            raise ConnectionError(self.connection_failed_message())
+        
+        cursor = self.connection.cursor()
+        try:
+            cursor.executemany(*convert_named_params_many(query, columns, rows, self.paramstyle))
+            rowcount = cursor.rowcount
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+        finally:
+            cursor.close()
+        # Some drivers do not count the rows of executemany
+        return (rowcount if rowcount is not None and rowcount >= 0 else len(rows)), []
+    
+    def copy_rows(
+        self,
+        table: str,
+        columns: Sequence[str],
+        rows: List[tuple],
+        timeout: Optional[int] = None
+    ) -> int:
+        """
+        Load rows into a table with the database's bulk load protocol, in one
+        transaction. Only available if supports_copy is set.
+        
+        Args:
+            table: Table name
+            columns: Columns of the table to load, in row order
+            rows: Row value tuples
+            timeout: Optional timeout in seconds
+            
+        Returns:
+            Number of rows loaded
+            
+        Raises:
+            Exception: If the load failed, after rolling it back
+        """
+        raise NotImplementedError(f"{self.__class__.__name__} does not support bulk loads")
+    
     @abstractmethod
     def execute_script(
         self, 
@@ -121,9 +318,13 @@ class DatabaseConnector(ABC):
         pass
 
 
+@register_connector('postgresql', 'postgres')
 class PostgreSQLConnector(DatabaseConnector):
     """PostgreSQL database connector."""
     
+    paramstyle = 'pyformat'
+    supports_copy = True
+    
     def __init__(self, connection_info: Dict[str, Any]):
         """Initialize PostgreSQL connector."""
         super().__init__(connection_info)
@@ -154,12 +355,50 @@ class PostgreSQLConnector(DatabaseConnector):
                 user=user,
                 password=password
             )
+            self.connect_error = None
             return True
         except Exception as e:
             logger.error(f"Error connecting to PostgreSQL: {str(e)}")
             self.connection = None
+            self.connect_error = str(e)
             return False
     
+    def new_statement_cache(self, stats: Optional[StatementCacheStats] = None) -> Optional[StatementCache]:
+        """Create a cache of server-side prepared statements, deallocated on eviction."""
+        if get_cache_size() <= 0:
+            return None
+        connection = self.connection
+        
+        def deallocate(handle):
+            name, _ = handle
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(f"DEALLOCATE {name}")
+            except Exception as e:
+                logger.debug(f"Error deallocating prepared statement {name}: {str(e)}")
+        
+        return StatementCache(self.db_type, close_statement=deallocate, stats=stats)
+    
+    def _prepare(self, cursor, entry, query: str, params: Optional[Dict[str, Any]]):
+        """
+        PREPARE a statement on the server, with its :name placeholders numbered $1, $2...
+        """
+        name = f"hermes_{uuid.uuid4().hex[:16]}"
+        # Number the placeholders by name, giving the parameter order of EXECUTE
+        prepared_query, names = convert_named_params(query, {key: key for key in params or {}}, 'dollar')
+        # A failed PREPARE aborts the transaction; the savepoint keeps e.g. its statement_timeout
+        cursor.execute("SAVEPOINT hermes_prepare")
+        try:
+            cursor.execute(f"PREPARE {name} AS {prepared_query}")
+        except Exception as e:
+            # E.g. a parameter whose type cannot be inferred; run the query unprepared
+            cursor.execute("ROLLBACK TO SAVEPOINT hermes_prepare")
+            entry.unpreparable = True
+            logger.debug(f"Could not prepare statement, running it unprepared: {str(e)}")
+            return
+        cursor.execute("RELEASE SAVEPOINT hermes_prepare")
+        self.statement_cache.prepared(entry, (name, tuple(names)))
+    
     def disconnect(self) -> bool:
         """Close the PostgreSQL connection."""
         if self.connection:
@@ -177,7 +416,7 @@ class PostgreSQLConnector(DatabaseConnector):
         if self.connection is None:
             success = self.connect()
             if not success:
-                return False, "Failed to establish connection"
+                return False, self.connection_failed_message()
         
         try:
             # Try a simple query to test the connection
@@ -195,24 +434,41 @@ class PostgreSQLConnector(DatabaseConnector):
         self, 
         query: str, 
         params: Optional[Dict[str, Any]] = None,
-        timeout: Optional[int] = None
+        timeout: Optional[int] = None,
+        as_result_set: bool = False
     ) -> Tuple[bool, Any, str]:
         """Execute a SQL query in PostgreSQL."""
         # Ensure connection is established
         if self.connection is None:
             success = self.connect()
             if not success:
-                return False, None, "Failed to establish connection"
+                return False, None, self.connection_failed_message()
         
         try:
-            # Set statement_timeout if provided
+            # Set statement_timeout if provided, for this transaction only so it
+            # does not carry over to later queries on a pooled connection
             if timeout is not None:
                 with self.connection.cursor() as cursor:
-                    cursor.execute(f"SET statement_timeout TO {timeout * 1000}")  # Convert to milliseconds
+                    cursor.execute(f"SET LOCAL statement_timeout TO {timeout * 1000}")  # Convert to milliseconds
             
             with self.connection.cursor() as cursor:
+                # Statements run repeatedly on this connection are prepared server-side once
+                entry = None
+                if self.statement_cache is not None and is_preparable(query):
+                    entry = self.statement_cache.lookup(query)
+                    if self.statement_cache.should_prepare(entry):
+                        self._prepare(cursor, entry, query, params)
+                
+                # Parameters bound at PREPARE time must all be given
+                if entry is not None and entry.handle is not None and set(entry.handle[1]) <= set(params or {}):
+                    name, names = entry.handle
+                    values = [params[key] for key in names]
+                    if values:
+                        cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(values))})", values)
+                    else:
+                        cursor.execute(f"EXECUTE {name}")
                 # Execute query with parameters if provided
-                if params:
+                elif params:
                     # Convert dict params to psycopg2 named parameters
                     # (psycopg2 uses %(name)s format)
                     modified_query = query
@@ -226,6 +482,8 @@ class PostgreSQLConnector(DatabaseConnector):
                 
                 # Fetch results if the query returns data
                 if cursor.description is not None:
+                    if as_result_set:
+                        return True, ResultSet.from_cursor(cursor), ""
                     columns = [desc[0] for desc in cursor.description]
                     results = cursor.fetchall()
                     # Convert to list of dictionaries
@@ -243,6 +501,50 @@ class PostgreSQLConnector(DatabaseConnector):
             logger.error(error_message)
             return False, None, error_message
     
+    def stream_query(
+        self, 
+        query: str, 
+        params: Optional[Dict[str, Any]] = None,
+        fetch_size: Optional[int] = None,
+        timeout: Optional[int] = None,
+        as_result_set: bool = False
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Stream a SELECT query in PostgreSQL through a named, server-side cursor."""
+        fetch_size = self._fetch_size(fetch_size)
+        if self.connection is None and not self.connect():
+            raise RuntimeError(self.connection_failed_message())
+        
+        try:
+            # Ends with the transaction of the named cursor
+            if timeout is not None:
+                with self.connection.cursor() as cursor:
+                    cursor.execute(f"SET LOCAL statement_timeout TO {timeout * 1000}")  # Convert to milliseconds
+            
+            # A named cursor keeps the result on the server and transfers
+            # fetch_size rows per round-trip
+            with self.connection.cursor(name=f"hermes_stream_{uuid.uuid4().hex}") as cursor:
+                cursor.itersize = fetch_size
+                cursor.execute(_pyformat_query(query, params), params or None)
+                
+                columns = None
+                while True:
+                    rows = cursor.fetchmany(fetch_size)
+                    if not rows:
+                        break
+                    # Named cursors only describe the result once rows were fetched
+                    if columns is None:
+                        columns = [desc[0] for desc in cursor.description]
+                    if as_result_set:
+                        yield ResultSet(columns, rows)
+                    else:
+                        yield [dict(zip(columns, row)) for row in rows]
+        finally:
+            # End the transaction the named cursor lived in
+            try:
+                self.connection.rollback()
+            except Exception as e:
+                logger.error(f"Error ending PostgreSQL stream transaction: {str(e)}")
+    
     def execute_script(
         self, 
         script: str, 
@@ -254,13 +556,14 @@ class PostgreSQLConnector(DatabaseConnector):
         if self.connection is None:
             success = self.connect()
             if not success:
-                return False, None, "Failed to establish connection"
+                return False, None, self.connection_failed_message()
         
         try:
-            # Set statement_timeout if provided
+            # Set statement_timeout if provided, for this transaction only so it
+            # does not carry over to later queries on a pooled connection
             if timeout is not None:
                 with self.connection.cursor() as cursor:
-                    cursor.execute(f"SET statement_timeout TO {timeout * 1000}")  # Convert to milliseconds
+                    cursor.execute(f"SET LOCAL statement_timeout TO {timeout * 1000}")  # Convert to milliseconds
             
             with self.connection.cursor() as cursor:
                 # Parameter substitution for scripts is more complex
@@ -295,6 +598,66 @@ class PostgreSQLConnector(DatabaseConnector):
             logger.error(error_message)
             return False, None, error_message
     
+    def write_batch(
+        self,
+        query: str,
+        columns: Sequence[str],
+        rows: List[tuple],
+        timeout: Optional[int] = None
+    ) -> Tuple[int, List[Tuple[int, str]]]:
+        """Run a write statement for a batch of rows with execute_batch, which sends them in few round-trips."""
+        from psycopg2.extras import execute_batch
+        
+        if self.connection is None and not self.connect():
+            raise ConnectionError(self.connection_failed_message())
+        
+        try:
+            with self.connection.cursor() as cursor:
+                # Only for the batch's transaction, not later queries on a pooled connection
+                if timeout is not None:
+                    cursor.execute(f"SET LOCAL statement_timeout TO {timeout * 1000}")  # Convert to milliseconds
+                batch_query, values = convert_named_params_many(query, columns, rows, self.paramstyle)
+                execute_batch(cursor, batch_query, values, page_size=len(values) or 1)
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+        # The cursor only counts the rows of the last statement execute_batch sent
+        return len(rows), []
+    
+    def copy_rows(
+        self,
+        table: str,
+        columns: Sequence[str],
+        rows: List[tuple],
+        timeout: Optional[int] = None
+    ) -> int:
+        """Load rows into a table with COPY FROM STDIN, streaming them as CSV."""
+        if self.connection is None and not self.connect():
+            raise ConnectionError(self.connection_failed_message())
+        
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write(','.join(_copy_csv_field(value) for value in row))
+            buffer.write('\n')
+        buffer.seek(0)
+        
+        try:
+            with self.connection.cursor() as cursor:
+                # Only for the batch's transaction, not later queries on a pooled connection
+                if timeout is not None:
+                    cursor.execute(f"SET LOCAL statement_timeout TO {timeout * 1000}")  # Convert to milliseconds
+                cursor.copy_expert(
+                    f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                    buffer
+                )
+                rowcount = cursor.rowcount
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+        return rowcount if rowcount is not None and rowcount >= 0 else len(rows)
+    
     def get_table_names(self) -> List[str]:
         """Get a list of table names from PostgreSQL."""
         if self.connection is None:
@@ -353,9 +716,13 @@ class PostgreSQLConnector(DatabaseConnector):
             return []
 
 
+@register_connector('mysql')
 class MySQLConnector(DatabaseConnector):
     """MySQL database connector."""
     
+    # write_batch uses executemany, which the driver sends as one multi-row INSERT for INSERT ... VALUES
+    paramstyle = 'format'
+    
     def __init__(self, connection_info: Dict[str, Any]):
         """Initialize MySQL connector."""
         super().__init__(connection_info)
@@ -386,12 +753,60 @@ class MySQLConnector(DatabaseConnector):
                 user=user,
                 password=password
             )
+            self.connect_error = None
             return True
         except Exception as e:
             logger.error(f"Error connecting to MySQL: {str(e)}")
             self.connection = None
+            self.connect_error = str(e)
             return False
     
+    def new_statement_cache(self, stats: Optional[StatementCacheStats] = None) -> Optional[StatementCache]:
+        """Create a cache of prepared cursors, closed on eviction."""
+        if get_cache_size() <= 0:
+            return None
+        
+        def close_cursor(cursor):
+            try:
+                cursor.close()
+            except Exception as e:
+                logger.debug(f"Error closing prepared cursor: {str(e)}")
+        
+        return StatementCache(self.db_type, close_statement=close_cursor, stats=stats)
+    
+    def _execute_prepared(self, cursor, query: str, params: Optional[Dict[str, Any]], as_result_set: bool):
+        """
+        Run a query on a prepared cursor, which prepares it on first use and
+        only sends the parameters on later runs of the same query.
+        """
+        prepared_query, values = convert_named_params(query, params, 'format')
+        cursor.execute(prepared_query, values)
+        
+        if cursor.description is not None:
+            rows = cursor.fetchall()
+            if as_result_set:
+                return True, ResultSet.from_cursor(cursor, rows), ""
+            columns = [desc[0] for desc in cursor.description]
+            return True, [dict(zip(columns, row)) for row in rows], ""
+        
+        self.connection.commit()
+        return True, {"rowcount": cursor.rowcount}, ""
+    
+    def _reset_timeout(self):
+        """
+        Restore the server's MAX_EXECUTION_TIME after a query with a timeout.
+        It is session state that a rollback does not undo, so it would otherwise
+        apply to every later query on a pooled connection.
+        """
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("SET SESSION MAX_EXECUTION_TIME = DEFAULT")
+            cursor.close()
+        except Exception as e:
+            # Drop the connection rather than let it be reused with the timeout still set
+            logger.error(f"Error resetting MySQL query timeout: {str(e)}")
+            self.disconnect()
+    
     def disconnect(self) -> bool:
         """Close the MySQL connection."""
         if self.connection:
@@ -409,7 +824,7 @@ class MySQLConnector(DatabaseConnector):
         if self.connection is None:
             success = self.connect()
             if not success:
-                return False, "Failed to establish connection"
+                return False, self.connection_failed_message()
         
         try:
             # Try a simple query to test the connection
@@ -428,14 +843,15 @@ class MySQLConnector(DatabaseConnector):
         self, 
         query: str, 
         params: Optional[Dict[str, Any]] = None,
-        timeout: Optional[int] = None
+        timeout: Optional[int] = None,
+        as_result_set: bool = False
     ) -> Tuple[bool, Any, str]:
         """Execute a SQL query in MySQL."""
         # Ensure connection is established
         if self.connection is None:
             success = self.connect()
             if not success:
-                return False, None, "Failed to establish connection"
+                return False, None, self.connection_failed_message()
         
         try:
             # MySQL doesn't directly support named parameters in the same way
@@ -450,18 +866,31 @@ class MySQLConnector(DatabaseConnector):
                     modified_query = modified_query.replace(placeholder, f"%({key})s")
                 param_dict = params
             
-            cursor = self.connection.cursor(dictionary=True)
+            # Tuple rows unless dictionaries were asked for
+            cursor = self.connection.cursor(dictionary=not as_result_set)
             
             # Set timeout if specified (MySQL uses a different approach)
             if timeout is not None:
                 cursor.execute(f"SET SESSION MAX_EXECUTION_TIME = {timeout * 1000}")  # milliseconds
             
+            # Statements run repeatedly on this connection get a prepared cursor, kept open
+            if self.statement_cache is not None and is_preparable(query):
+                entry = self.statement_cache.lookup(query)
+                if self.statement_cache.should_prepare(entry):
+                    self.statement_cache.prepared(entry, self.connection.cursor(prepared=True))
+                if entry.handle is not None:
+                    cursor.close()
+                    return self._execute_prepared(entry.handle, query, params, as_result_set)
+            
             # Execute the query
             cursor.execute(modified_query, param_dict)
             
             # Check if the query returns results
             if cursor.description is not None:
-                results = cursor.fetchall()
+                if as_result_set:
+                    results = ResultSet.from_cursor(cursor)
+                else:
+                    results = cursor.fetchall()
                 cursor.close()
                 return True, results, ""
             else:
@@ -476,6 +905,47 @@ class MySQLConnector(DatabaseConnector):
             error_message = f"Query execution failed: {str(e)}"
             logger.error(error_message)
             return False, None, error_message
+        finally:
+            if timeout is not None:
+                self._reset_timeout()
+    
+    def stream_query(
+        self, 
+        query: str, 
+        params: Optional[Dict[str, Any]] = None,
+        fetch_size: Optional[int] = None,
+        timeout: Optional[int] = None,
+        as_result_set: bool = False
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Stream a SELECT query in MySQL through an unbuffered cursor."""
+        fetch_size = self._fetch_size(fetch_size)
+        if self.connection is None and not self.connect():
+            raise RuntimeError(self.connection_failed_message())
+        
+        # Unbuffered cursors read rows from the server as they are fetched,
+        # like MySQLdb's SSCursor, instead of loading the whole result
+        cursor = self.connection.cursor(dictionary=not as_result_set, buffered=False)
+        try:
+            if timeout is not None:
+                cursor.execute(f"SET SESSION MAX_EXECUTION_TIME = {timeout * 1000}")  # milliseconds
+            
+            cursor.execute(_pyformat_query(query, params), params or {})
+            columns = [desc[0] for desc in cursor.description]
+            while True:
+                rows = cursor.fetchmany(fetch_size)
+                if not rows:
+                    break
+                yield ResultSet(columns, rows) if as_result_set else rows
+        finally:
+            try:
+                # Rows left unread by an abandoned stream block the connection
+                if self.connection.unread_result:
+                    self.connection.consume_results()
+                cursor.close()
+            except Exception as e:
+                logger.error(f"Error closing MySQL stream cursor: {str(e)}")
+            if timeout is not None:
+                self._reset_timeout()
     
     def execute_script(
         self, 
@@ -491,7 +961,7 @@ class MySQLConnector(DatabaseConnector):
         if self.connection is None:
             success = self.connect()
             if not success:
-                return False, None, "Failed to establish connection"
+                return False, None, self.connection_failed_message()
         
         try:
             cursor = self.connection.cursor()
@@ -535,6 +1005,9 @@ class MySQLConnector(DatabaseConnector):
             error_message = f"Script execution failed: {str(e)}"
             logger.error(error_message)
             return False, None, error_message
+        finally:
+            if timeout is not None:
+                self._reset_timeout()
     
     def get_table_names(self) -> List[str]:
         """Get a list of table names from MySQL."""
@@ -603,7 +1076,8 @@ class MySQLConnector(DatabaseConnector):
             return []
 
 
-# Add more database connectors here as needed (Oracle, SQL Server, SQLite, etc.)
+# More connectors register themselves in their own modules
+# (Oracle, SQLite and generic DB-API), imported by core.database
 
 
 def get_connector(connection_info: Dict[str, Any]) -> Optional[DatabaseConnector]:
@@ -616,16 +1090,13 @@ def get_connector(connection_info: Dict[str, Any]) -> Optional[DatabaseConnector
     Returns:
         Database connector instance or None if type is unsupported
     """
-    db_type = connection_info.get('type', '').lower()
-    
-    if db_type == 'postgresql':
-        return PostgreSQLConnector(connection_info)
-    elif db_type == 'mysql':
-        return MySQLConnector(connection_info)
-    # Add more database types here
+    db_type = (connection_info.get('type') or '').lower()
     
-    logger.error(f"Unsupported database type: {db_type}")
-    return None
+    connector_class = CONNECTOR_REGISTRY.get(db_type)
+    if connector_class is None:
+        logger.error(f"Unsupported database type: {db_type}")
+        return None
+    return connector_class(connection_info)
 
 
 def parse_connection_string(connection_string: str) -> Dict[str, Any]:
@@ -655,7 +1126,10 @@ def parse_connection_string(connection_string: str) -> Dict[str, Any]:
         }
         
         # Add database name (path without leading slash)
-        if parsed.path:
+        if parsed.path and db_type.startswith('sqlite'):
+            # sqlite:////abs/path.db names an absolute file path
+            connection_info['database'] = parsed.path[1:]
+        elif parsed.path:
             connection_info['database'] = parsed.path.lstrip('/')
         
         # Parse query parameters
@@ -0,0 +1,328 @@
+# core/database/dbapi_connector.py
+"""
+Generic DB-API 2.0 connector, and the SQLite connector built on it.
+
+The generic connector drives any PEP 249 module named by the 'driver'
+connection parameter. SQLite needs no server, so database data sources and
+workflow queries can be tested and benchmarked on a single machine.
+"""
+
+import importlib
+import logging
+import time
+from typing import Dict, Any, Optional, Tuple, List, Iterator, Sequence
+
+from .connectors import DatabaseConnector, register_connector
+from .params import convert_named_params
+from .results import ResultSet
+from .statement_cache import StatementCache, get_cache_size, is_preparable
+
+logger = logging.getLogger(__name__)
+
+
+@register_connector('dbapi', 'other')
+class DBAPIConnector(DatabaseConnector):
+    """
+    Connector for any DB-API 2.0 driver module, e.g. pymssql or pg8000.
+    
+    The module is named by the 'driver' connection parameter. Its connect()
+    gets host, port, database, user and password, or 'connect_args' if the
+    driver expects other arguments.
+    """
+    
+    # Driver module of connectors for one database, instead of the 'driver' parameter
+    driver_name = None
+    
+    def __init__(self, connection_info: Dict[str, Any]):
+        """Initialize the connector and import its driver module."""
+        super().__init__(connection_info)
+        self.db_type = connection_info.get('type') or 'dbapi'
+        
+        driver_name = self.driver_name or connection_info.get('driver')
+        if not driver_name:
+            raise ValueError("No DB-API driver module specified for this connection")
+        try:
+            self.driver = importlib.import_module(driver_name)
+        except ImportError:
+            logger.error(f"{driver_name} module not found. Please install it to use this connection.")
+            raise
+        self.paramstyle = getattr(self.driver, 'paramstyle', 'qmark')
+    
+    def _connect_args(self) -> Dict[str, Any]:
+        """
+        Get the keyword arguments for the driver's connect().
+        """
+        if self.connection_info.get('connect_args'):
+            return dict(self.connection_info['connect_args'])
+        args = {key: self.connection_info.get(key) for key in ('host', 'port', 'database', 'user', 'password')}
+        return {key: value for key, value in args.items() if value not in (None, '')}
+    
+    def _start_timeout(self, timeout: Optional[int]):
+        """
+        Limit the next round-trip to timeout seconds. DB-API has no portable
+        statement timeout, so drivers that support one override this.
+        """
+    
+    def _clear_timeout(self):
+        """
+        Remove the limit set by _start_timeout.
+        """
+    
+    def _rollback(self):
+        try:
+            self.connection.rollback()
+        except Exception as e:
+            logger.error(f"Error rolling back: {str(e)}")
+    
+    def connect(self) -> bool:
+        """Establish a connection through the driver."""
+        try:
+            self.connection = self.driver.connect(**self._connect_args())
+            self.connect_error = None
+            return True
+        except Exception as e:
+            logger.error(f"Error connecting with {self.driver.__name__}: {str(e)}")
+            self.connection = None
+            self.connect_error = str(e)
+            return False
+    
+    def disconnect(self) -> bool:
+        """Close the connection."""
+        if self.connection:
+            try:
+                self.connection.close()
+                self.connection = None
+                return True
+            except Exception as e:
+                logger.error(f"Error disconnecting from {self.driver.__name__}: {str(e)}")
+                return False
+        return True  # Already disconnected
+    
+    def test_connection(self) -> Tuple[bool, str]:
+        """Test the connection with the validation query."""
+        if self.connection is None and not self.connect():
+            return False, self.connection_failed_message()
+        
+        try:
+            cursor = self.connection.cursor()
+            try:
+                cursor.execute(self.validation_query)
+                result = cursor.fetchone()
+            finally:
+                cursor.close()
+            return True, f"Connection successful: {result[0]}"
+        except Exception as e:
+            return False, f"Connection test failed: {str(e)}"
+    
+    def execute_query(
+        self,
+        query: str,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: Optional[int] = None,
+        as_result_set: bool = False
+    ) -> Tuple[bool, Any, str]:
+        """Execute a SQL query with bound parameters."""
+        if self.connection is None and not self.connect():
+            return False, None, self.connection_failed_message()
+        
+        cursor = None
+        try:
+            self._start_timeout(timeout)
+            if self.statement_cache is not None and is_preparable(query):
+                self.statement_cache.lookup(query)
+            cursor = self.connection.cursor()
+            cursor.execute(*convert_named_params(query, params, self.paramstyle))
+            
+            if cursor.description is not None:
+                if as_result_set:
+                    return True, ResultSet.from_cursor(cursor), ""
+                columns = [desc[0] for desc in cursor.description]
+                return True, [dict(zip(columns, row)) for row in cursor.fetchall()], ""
+            
+            # For non-SELECT queries
+            self.connection.commit()
+            return True, {"rowcount": cursor.rowcount}, ""
+        
+        except Exception as e:
+            self._rollback()
+            error_message = f"Query execution failed: {str(e)}"
+            logger.error(error_message)
+            return False, None, error_message
+        finally:
+            if cursor is not None:
+                cursor.close()
+            self._clear_timeout()
+    
+    def stream_query(
+        self,
+        query: str,
+        params: Optional[Dict[str, Any]] = None,
+        fetch_size: Optional[int] = None,
+        timeout: Optional[int] = None,
+        as_result_set: bool = False
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Stream a SELECT query with fetchmany. The timeout applies to each fetch."""
+        fetch_size = self._fetch_size(fetch_size)
+        if self.connection is None and not self.connect():
+            raise RuntimeError(self.connection_failed_message())
+        
+        cursor = self.connection.cursor()
+        try:
+            cursor.arraysize = fetch_size
+            self._start_timeout(timeout)
+            cursor.execute(*convert_named_params(query, params, self.paramstyle))
+            columns = [desc[0] for desc in cursor.description]
+            
+            while True:
+                self._start_timeout(timeout)
+                rows = cursor.fetchmany(fetch_size)
+                self._clear_timeout()
+                if not rows:
+                    break
+                yield ResultSet(columns, rows) if as_result_set else [dict(zip(columns, row)) for row in rows]
+        finally:
+            cursor.close()
+            self._clear_timeout()
+    
+    def execute_script(
+        self,
+        script: str,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: Optional[int] = None
+    ) -> Tuple[bool, Any, str]:
+        """Execute a SQL script statement by statement, binding parameters in each."""
+        if self.connection is None and not self.connect():
+            return False, None, self.connection_failed_message()
+        
+        # Split script into statements (simple approach)
+        # Note: This doesn't handle all edge cases, like semicolons in string literals
+        statements = [statement.strip() for statement in script.split(';') if statement.strip()]
+        
+        cursor = None
+        try:
+            self._start_timeout(timeout)
+            cursor = self.connection.cursor()
+            for statement in statements:
+                cursor.execute(*convert_named_params(statement, params, self.paramstyle))
+            self.connection.commit()
+            return True, {"executed": True}, ""
+        
+        except Exception as e:
+            self._rollback()
+            error_message = f"Script execution failed: {str(e)}"
+            logger.error(error_message)
+            return False, None, error_message
+        finally:
+            if cursor is not None:
+                cursor.close()
+            self._clear_timeout()
+    
+    def write_batch(
+        self,
+        query: str,
+        columns: Sequence[str],
+        rows: List[tuple],
+        timeout: Optional[int] = None
+    ) -> Tuple[int, List[Tuple[int, str]]]:
+        """Run a write statement for a batch of rows with executemany, within the timeout."""
+        if self.connection is None and not self.connect():
+            raise ConnectionError(self.connection_failed_message())
+        try:
+            self._start_timeout(timeout)
+            return super().write_batch(query, columns, rows, timeout)
+        finally:
+            self._clear_timeout()
+    
+    def get_table_names(self) -> List[str]:
+        """Get a list of table names from information_schema."""
+        schema = self.connection_info.get('schema')
+        query = "SELECT table_name FROM information_schema.tables"
+        if schema:
+            query += " WHERE table_schema = :schema"
+        success, results, error = self.execute_query(f"{query} ORDER BY table_name", {'schema': schema} if schema else None)
+        if not success:
+            logger.error(f"Error getting table names: {error}")
+            return []
+        return [list(row.values())[0] for row in results]
+    
+    def get_table_schema(self, table_name: str) -> List[Dict[str, Any]]:
+        """Get schema information for a table from information_schema."""
+        success, results, error = self.execute_query("""
+            SELECT column_name, data_type, is_nullable, column_default
+            FROM information_schema.columns
+            WHERE table_name = :table_name
+            ORDER BY ordinal_position
+        """, {'table_name': table_name}, as_result_set=True)
+        if not success:
+            logger.error(f"Error getting table schema: {error}")
+            return []
+        return [
+            {"name": row[0], "data_type": row[1], "is_nullable": row[2] == "YES", "default": row[3]}
+            for row in results
+        ]
+
+
+@register_connector('sqlite', 'sqlite3')
+class SQLiteConnector(DBAPIConnector):
+    """
+    SQLite connector for a local database file, named by the 'database' parameter.
+    """
+    
+    driver_name = 'sqlite3'
+    
+    # Virtual machine instructions between two checks of the query deadline
+    _TIMEOUT_CHECK_INTERVAL = 10000
+    
+    def _connect_args(self) -> Dict[str, Any]:
+        database = self.connection_info.get('database') or ':memory:'
+        return {
+            'database': database,
+            'uri': database.startswith('file:'),
+            # Pooled connections may be borrowed by another thread than the one that opened them
+            'check_same_thread': False,
+            # sqlite3 keeps this many compiled statements per connection, see new_statement_cache
+            'cached_statements': max(get_cache_size(), 0),
+        }
+    
+    def new_statement_cache(self, stats=None) -> Optional[StatementCache]:
+        """
+        Track statement reuse on this connection. sqlite3 caches the compiled
+        statements itself, in an LRU of cached_statements statements.
+        """
+        if get_cache_size() <= 0:
+            return None
+        return StatementCache(self.db_type, native=True, stats=stats)
+    
+    def _start_timeout(self, timeout: Optional[int]):
+        if timeout:
+            deadline = time.monotonic() + timeout
+            # A true return value from the progress handler interrupts the running statement
+            self.connection.set_progress_handler(lambda: time.monotonic() > deadline, self._TIMEOUT_CHECK_INTERVAL)
+    
+    def _clear_timeout(self):
+        if self.connection is not None:
+            self.connection.set_progress_handler(None, 0)
+    
+    def get_table_names(self) -> List[str]:
+        """Get a list of table and view names from SQLite."""
+        success, results, error = self.execute_query(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'view') "
+            "AND name NOT LIKE 'sqlite_%' ORDER BY name",
+            as_result_set=True
+        )
+        if not success:
+            logger.error(f"Error getting table names: {error}")
+            return []
+        return [row[0] for row in results]
+    
+    def get_table_schema(self, table_name: str) -> List[Dict[str, Any]]:
+        """Get schema information for a SQLite table."""
+        quoted_name = table_name.replace('"', '""')
+        success, results, error = self.execute_query(f'PRAGMA table_info("{quoted_name}")', as_result_set=True)
+        if not success:
+            logger.error(f"Error getting table schema: {error}")
+            return []
+        return [
+            {"name": row['name'], "data_type": row['type'], "is_nullable": not row['notnull'], "default": row['dflt_value']}
+            for row in results
+        ]
@@ -7,87 +7,173 @@ proper error handling, logging, and result processing.
 
 import logging
 import time
-from typing import Dict, Any, Optional, Tuple, Union, List
+from typing import Dict, Any, Optional, Tuple, Union, List, Iterator, Callable
 
-from .connectors import DatabaseConnector, get_connector
+from .connectors import DatabaseConnector
+from .pool import pooled_connector, get_pool
+from .retry import RetryPolicy, CONNECTION
 
 logger = logging.getLogger(__name__)
 
+def _run_attempt(
+    connector: Union[DatabaseConnector, Dict[str, Any]],
+    operation: Callable[[DatabaseConnector], Tuple[bool, Any, str]],
+    policy: RetryPolicy
+) -> Tuple[bool, Any, str]:
+    """
+    Run an operation once. A connection that was lost is dropped, so the next
+    attempt reconnects, through the pool if connection info was provided.
+    """
+    if isinstance(connector, dict):
+        try:
+            with pooled_connector(connector) as connector_instance:
+                success, results, error = operation(connector_instance)
+                if not success and policy.classify(error) == CONNECTION:
+                    # Closing it makes the pool discard the connection instead of reusing it
+                    connector_instance.disconnect()
+                    get_pool(connector).expire_health_checks()
+                return success, results, error
+        except Exception as e:
+            logger.error(f"Unable to get a database connection: {str(e)}")
+            return False, None, f"Unable to get a database connection: {str(e)}"
+    
+    try:
+        # Ensure connection is established
+        if not connector.connection:
+            connector.connect()
+        success, results, error = operation(connector)
+    except Exception as e:
+        success, results, error = False, None, str(e)
+    if not success and policy.classify(error) == CONNECTION:
+        connector.disconnect()
+    return success, results, error
+
+
+def _run_with_retry(
+    connector: Union[DatabaseConnector, Dict[str, Any]],
+    operation: Callable[[DatabaseConnector], Tuple[bool, Any, str]],
+    policy: RetryPolicy,
+    description: str
+) -> Tuple[bool, Any, str]:
+    """
+    Run an operation, retrying transient errors as the policy allows.
+    
+    Args:
+        connector: Either a DatabaseConnector instance or connection info dict
+        operation: Called with a connector, returning (success, results, error_message)
+        policy: RetryPolicy deciding which errors are retried, and when
+        description: What the operation runs, for log and error messages, e.g. 'Query'
+    
+    Returns:
+        Tuple of (success, results, error_message)
+    """
+    start_time = time.monotonic()
+    retries = 0
+    
+    while True:
+        attempt_start = time.monotonic()
+        success, results, error = _run_attempt(connector, operation, policy)
+        
+        if success:
+            logger.info(f"{description} executed successfully in {time.monotonic() - attempt_start:.2f}s")
+            return success, results, error
+        
+        logger.warning(f"{description} execution failed: {error}")
+        delay = policy.next_delay(error, retries + 1, time.monotonic() - start_time)
+        if delay is None:
+            if retries:
+                return False, None, f"{description} failed after {retries} retries: {error}"
+            return False, None, error
+        
+        retries += 1
+        logger.info(
+            f"Retrying {description.lower()} in {delay:.2f}s (attempt {retries}/{policy.max_retries}) "
+            f"after a {policy.classify(error)} error"
+        )
+        time.sleep(delay)
+
+
 def execute_query(
     connector: Union[DatabaseConnector, Dict[str, Any]], 
     query: str,
     params: Optional[Dict[str, Any]] = None,
     timeout: Optional[int] = None,
     max_retries: int = 0,
-    retry_delay: int = 1
+    retry_delay: int = 1,
+    as_result_set: bool = False,
+    retry_policy: Optional[RetryPolicy] = None
 ) -> Tuple[bool, Any, str]:
     """
     Execute a SQL query with the provided connector and parameters.
     
+    Connection errors, deadlocks and serialization failures are retried with
+    exponential backoff; other errors, like a syntax error, fail at once.
+    
     Args:
-        connector: Either a DatabaseConnector instance or connection info dict
+        connector: Either a DatabaseConnector instance or connection info dict,
+            in which case a pooled connection is used
         query: SQL query to execute
         params: Optional parameters for the query
         timeout: Optional timeout in seconds
-        max_retries: Maximum number of retries on failure
-        retry_delay: Delay between retries in seconds
-        
+        max_retries: Maximum number of retries on transient errors
+        retry_delay: Upper bound of the first delay between retries in seconds
+        as_result_set: Return rows as a ResultSet of tuples instead of dictionaries
+        retry_policy: RetryPolicy to use instead of max_retries and retry_delay
+    
     Returns:
         Tuple of (success, results, error_message)
     """
-    # Get a connector instance if connection_info was provided
-    if isinstance(connector, dict):
-        connector_instance = get_connector(connector)
-        if connector_instance is None:
-            return False, None, "Unable to create database connector"
-    else:
-        connector_instance = connector
+    policy = retry_policy or RetryPolicy(max_retries=max_retries, base_delay=retry_delay)
+    return _run_with_retry(
+        connector,
+        lambda connector_instance: connector_instance.execute_query(
+            query, params, timeout, as_result_set=as_result_set
+        ),
+        policy,
+        "Query"
+    )
+
+
+def stream_query(
+    connector: Union[DatabaseConnector, Dict[str, Any]], 
+    query: str,
+    params: Optional[Dict[str, Any]] = None,
+    fetch_size: Optional[int] = None,
+    timeout: Optional[int] = None,
+    as_result_set: bool = False
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Execute a SELECT query and yield its rows in batches of fetch_size,
+    using a server-side cursor where the database supports one.
     
-    # Execute the query with retry logic
-    retries = 0
-    last_error = ""
+    The connection stays borrowed until the stream is exhausted or closed.
     
-    while retries <= max_retries:
-        try:
-            # Ensure connection is established
-            if not connector_instance.connection:
-                connector_instance.connect()
-            
-            # Execute the query
-            start_time = time.time()
-            success, results, error = connector_instance.execute_query(query, params, timeout)
-            execution_time = time.time() - start_time
-            
-            # Log query execution
-            if success:
-                logger.info(f"Query executed successfully in {execution_time:.2f}s")
-                return success, results, error
-            else:
-                last_error = error
-                logger.warning(f"Query execution failed: {error}")
-                
-                # Retry if we haven't exceeded max_retries
-                if retries < max_retries:
-                    retries += 1
-                    logger.info(f"Retrying query (attempt {retries}/{max_retries})...")
-                    time.sleep(retry_delay)
-                else:
-                    return False, None, f"Query failed after {retries} retries: {last_error}"
-        
-        except Exception as e:
-            last_error = str(e)
-            logger.error(f"Error executing query: {last_error}")
-            
-            # Retry if we haven't exceeded max_retries
-            if retries < max_retries:
-                retries += 1
-                logger.info(f"Retrying query (attempt {retries}/{max_retries})...")
-                time.sleep(retry_delay)
-            else:
-                return False, None, f"Query failed after {retries} retries: {last_error}"
+    Args:
+        connector: Either a DatabaseConnector instance or connection info dict,
+            in which case a pooled connection is used
+        query: SQL query to execute
+        params: Optional parameters for the query
+        fetch_size: Rows per batch, defaults to the connection's fetch_size
+        timeout: Optional timeout in seconds
+        as_result_set: Yield ResultSets of tuples instead of lists of dictionaries
+    
+    Yields:
+        Batches of rows
     
-    # Should not reach here, but just in case
-    return False, None, f"Query execution failed: {last_error}"
+    Raises:
+        RuntimeError: If the query fails
+    """
+    if isinstance(connector, dict):
+        with pooled_connector(connector) as connector_instance:
+            yield from stream_query(connector_instance, query, params, fetch_size, timeout, as_result_set)
+        return
+    
+    start_time = time.time()
+    row_count = 0
+    for rows in connector.stream_query(query, params, fetch_size, timeout, as_result_set=as_result_set):
+        row_count += len(rows)
+        yield rows
+    logger.info(f"Query streamed {row_count} rows in {time.time() - start_time:.2f}s")
 
 
 def execute_script(
@@ -96,72 +182,31 @@ def execute_script(
     params: Optional[Dict[str, Any]] = None,
     timeout: Optional[int] = None,
     max_retries: int = 0,
-    retry_delay: int = 1
+    retry_delay: int = 1,
+    retry_policy: Optional[RetryPolicy] = None
 ) -> Tuple[bool, Any, str]:
     """
     Execute a SQL script with the provided connector and parameters.
     
+    Transient errors are retried like in execute_query.
+    
     Args:
-        connector: Either a DatabaseConnector instance or connection info dict
+        connector: Either a DatabaseConnector instance or connection info dict,
+            in which case a pooled connection is used
         script: SQL script to execute (may contain multiple statements)
         params: Optional parameters for the script
         timeout: Optional timeout in seconds
-        max_retries: Maximum number of retries on failure
-        retry_delay: Delay between retries in seconds
-        
+        max_retries: Maximum number of retries on transient errors
+        retry_delay: Upper bound of the first delay between retries in seconds
+        retry_policy: RetryPolicy to use instead of max_retries and retry_delay
+    
     Returns:
         Tuple of (success, results, error_message)
     """
-    # Get a connector instance if connection_info was provided
-    if isinstance(connector, dict):
-        connector_instance = get_connector(connector)
-        if connector_instance is None:
-            return False, None, "Unable to create database connector"
-    else:
-        connector_instance = connector
-    
-    # Execute the script with retry logic
-    retries = 0
-    last_error = ""
-    
-    while retries <= max_retries:
-        try:
-            # Ensure connection is established
-            if not connector_instance.connection:
-                connector_instance.connect()
-            
-            # Execute the script
-            start_time = time.time()
-            success, results, error = connector_instance.execute_script(script, params, timeout)
-            execution_time = time.time() - start_time
-            
-            # Log script execution
-            if success:
-                logger.info(f"Script executed successfully in {execution_time:.2f}s")
-                return success, results, error
-            else:
-                last_error = error
-                logger.warning(f"Script execution failed: {error}")
-                
-                # Retry if we haven't exceeded max_retries
-                if retries < max_retries:
-                    retries += 1
-                    logger.info(f"Retrying script (attempt {retries}/{max_retries})...")
-                    time.sleep(retry_delay)
-                else:
-                    return False, None, f"Script failed after {retries} retries: {last_error}"
-        
-        except Exception as e:
-            last_error = str(e)
-            logger.error(f"Error executing script: {last_error}")
-            
-            # Retry if we haven't exceeded max_retries
-            if retries < max_retries:
-                retries += 1
-                logger.info(f"Retrying script (attempt {retries}/{max_retries})...")
-                time.sleep(retry_delay)
-            else:
-                return False, None, f"Script failed after {retries} retries: {last_error}"
-    
-    # Should not reach here, but just in case
-    return False, None, f"Script execution failed: {last_error}"
\ No newline at end of file
+    policy = retry_policy or RetryPolicy(max_retries=max_retries, base_delay=retry_delay)
+    return _run_with_retry(
+        connector,
+        lambda connector_instance: connector_instance.execute_script(script, params, timeout),
+        policy,
+        "Script"
+    )
@@ -12,10 +12,12 @@ import io
 import xml.etree.ElementTree as ET
 from typing import Dict, Any, List, Optional, Union, TextIO
 
+from .results import ResultSet
+
 logger = logging.getLogger(__name__)
 
 def format_results(
-    results: List[Dict[str, Any]], 
+    results: Union[List[Dict[str, Any]], ResultSet], 
     format_type: str = 'json',
     options: Optional[Dict[str, Any]] = None
 ) -> Union[str, bytes, Dict[str, Any]]:
@@ -23,15 +25,16 @@ def format_results(
     Format query results into the specified format.
     
     Args:
-        results: Query results as a list of dictionaries
-        format_type: Output format ('json', 'csv', 'xml', 'dict', etc.)
+        results: Query results as a list of dictionaries or a ResultSet
+        format_type: Output format ('json', 'csv', 'xml', 'dict', 'table', etc.)
         options: Format-specific options
         
     Returns:
-        Formatted results in the requested format
+        Formatted results in the requested format. 'table' gives the compact
+        {'columns': [...], 'rows': [[...], ...]} form of ResultSet.to_data()
     """
     if not results:
-        return "" if format_type != 'dict' else {}
+        return "" if format_type not in ('dict', 'table') else {}
     
     options = options or {}
     
@@ -41,22 +44,33 @@ def format_results(
         return to_csv(results, options)
     elif format_type == 'xml':
         return to_xml(results, options)
+    elif format_type == 'table':
+        if not isinstance(results, ResultSet):
+            results = ResultSet.from_dicts(results)
+        return results.to_data()
     elif format_type == 'dict':
-        return results  # Already in dictionary format
+        return _as_dicts(results)
     else:
         logger.warning(f"Unsupported format type: {format_type}, returning as dict")
-        return results
+        return _as_dicts(results)
+
+
+def _as_dicts(results: Union[List[Dict[str, Any]], ResultSet]) -> List[Dict[str, Any]]:
+    """
+    Get results as a list of dictionaries.
+    """
+    return results.dicts() if isinstance(results, ResultSet) else results
 
 
 def to_json(
-    results: List[Dict[str, Any]], 
+    results: Union[List[Dict[str, Any]], ResultSet], 
     options: Dict[str, Any]
 ) -> str:
     """
     Convert results to JSON format.
     
     Args:
-        results: Query results as list of dictionaries
+        results: Query results as list of dictionaries or a ResultSet
         options: JSON formatting options
             - pretty: Whether to pretty-print the JSON (default: False)
             - ensure_ascii: Whether to escape non-ASCII characters (default: True)
@@ -70,6 +84,7 @@ def to_json(
     root_name = options.get('root_name')
     
     indent = 4 if pretty else None
+    results = _as_dicts(results)
     
     if root_name:
         data = {root_name: results}
@@ -84,14 +99,14 @@ def to_json(
 
 
 def to_csv(
-    results: List[Dict[str, Any]], 
+    results: Union[List[Dict[str, Any]], ResultSet], 
     options: Dict[str, Any]
 ) -> str:
     """
     Convert results to CSV format.
     
     Args:
-        results: Query results as list of dictionaries
+        results: Query results as list of dictionaries or a ResultSet
         options: CSV formatting options
             - delimiter: CSV delimiter (default: ',')
             - quotechar: CSV quote character (default: '"')
@@ -109,13 +124,20 @@ def to_csv(
     include_header = options.get('include_header', True)
     columns = options.get('columns')
     
+    output = io.StringIO()
+    writer = csv.writer(output, delimiter=delimiter, quotechar=quotechar, quoting=csv.QUOTE_MINIMAL)
+    
+    # Tuple rows in column order are written as they are
+    if isinstance(results, ResultSet) and (not columns or list(columns) == list(results.columns)):
+        if include_header:
+            writer.writerow(results.columns)
+        writer.writerows(results.rows)
+        return output.getvalue()
+    
     # If columns not specified, use keys from first result
     if not columns:
         columns = list(results[0].keys())
     
-    output = io.StringIO()
-    writer = csv.writer(output, delimiter=delimiter, quotechar=quotechar, quoting=csv.QUOTE_MINIMAL)
-    
     # Write header
     if include_header:
         writer.writerow(columns)
@@ -128,14 +150,14 @@ def to_csv(
 
 
 def to_xml(
-    results: List[Dict[str, Any]], 
+    results: Union[List[Dict[str, Any]], ResultSet], 
     options: Dict[str, Any]
 ) -> str:
     """
     Convert results to XML format.
     
     Args:
-        results: Query results as list of dictionaries
+        results: Query results as list of dictionaries or a ResultSet
         options: XML formatting options
             - root_name: Name of the root element (default: 'results')
             - row_name: Name of each row element (default: 'row')
@@ -187,14 +209,14 @@ def to_xml(
 
 
 def to_excel(
-    results: List[Dict[str, Any]], 
+    results: Union[List[Dict[str, Any]], ResultSet], 
     options: Dict[str, Any]
 ) -> bytes:
     """
     Convert results to Excel format (XLSX).
     
     Args:
-        results: Query results as list of dictionaries
+        results: Query results as list of dictionaries or a ResultSet
         options: Excel formatting options
             - sheet_name: Name of the worksheet (default: 'Data')
             - columns: List of columns to include (default: all)
@@ -259,7 +281,7 @@ def to_excel(
 
 
 def write_to_file(
-    results: List[Dict[str, Any]], 
+    results: Union[List[Dict[str, Any]], ResultSet], 
     file_path: str,
     format_type: str = 'csv',
     options: Optional[Dict[str, Any]] = None
@@ -268,7 +290,7 @@ def write_to_file(
     Write query results to a file in the specified format.
     
     Args:
-        results: Query results as list of dictionaries
+        results: Query results as list of dictionaries or a ResultSet
         file_path: Path to output file
         format_type: Output format ('json', 'csv', 'xml', 'xlsx', etc.)
         options: Format-specific options
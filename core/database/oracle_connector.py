@@ -1,13 +1,55 @@
 # core/database/oracle_connector.py
+import importlib
 import logging
+import threading
 import traceback
-from .connectors import DatabaseConnector
+
+from django.conf import settings
+
+from .connectors import DatabaseConnector, register_connector
+from .results import ResultSet
+from .statement_cache import StatementCache, get_cache_size, is_preparable
 
 logger = logging.getLogger(__name__)
 
+# Oracle driver modules, in order of preference after the configured one
+ORACLE_DRIVERS = ('cx_Oracle', 'oracledb')
+
+
+def get_oracle_driver():
+    """
+    Import the Oracle driver module set by the ORACLE_DRIVER setting.
+    
+    'oracledb' connects in thin mode, in pure Python, so Oracle Instant Client
+    does not have to be installed or loaded. 'cx_Oracle', the default, needs
+    Instant Client. If the configured driver is not installed, the other one
+    is used.
+    
+    Returns:
+        The driver module
+    """
+    preferred = getattr(settings, 'ORACLE_DRIVER', 'cx_Oracle')
+    candidates = [preferred] + [name for name in ORACLE_DRIVERS if name != preferred]
+    for name in candidates:
+        try:
+            driver = importlib.import_module(name)
+        except ImportError:
+            continue
+        if name != preferred:
+            logger.warning(f"{preferred} module not found, using {name} for Oracle connections")
+        return driver
+    
+    logger.error("No Oracle driver found. Please install oracledb or cx_Oracle to use Oracle.")
+    raise ImportError("No Oracle driver found. Please install oracledb or cx_Oracle to use Oracle.")
+
+
+@register_connector('oracle')
 class OracleConnector(DatabaseConnector):
     """Oracle database connector implementation."""
     
+    validation_query = "SELECT 1 FROM DUAL"
+    limit_query_template = "SELECT * FROM ({query}) WHERE ROWNUM <= {limit}"
+    
     def __init__(self, connection_info):
         super().__init__(connection_info)
         self.db_type = "oracle"
@@ -17,24 +59,13 @@ class OracleConnector(DatabaseConnector):
         if 'password' in safe_info:
             safe_info['password'] = '******'
         logger.debug(f"Initializing Oracle connector with: {safe_info}")
-        
-        # More detailed debugging
-        print("Oracle connection info keys:", self.connection_info.keys())
-        print("Connection contains password:", 'password' in self.connection_info)
-        print("Connection contains username:", 'user' in self.connection_info)
-        print("Service name provided:", self.connection_info.get('service_name') is not None)
-        print("SID provided:", self.connection_info.get('sid') is not None)
     
     def connect(self):
         """
         Establish a connection to the Oracle database.
         """
         logger.debug("Connecting to Oracle database...")
-        try:
-            import cx_Oracle
-        except ImportError:
-            logger.error("cx_Oracle module not found. Please install it to use Oracle.")
-            raise ImportError("cx_Oracle module not found. Please install it to use Oracle.")
+        driver = get_oracle_driver()
             
         # Get connection parameters
         host = self.connection_info.get('host')
@@ -44,14 +75,10 @@ class OracleConnector(DatabaseConnector):
         username = self.connection_info.get('user')
         password = self.connection_info.get('password')
         
-        # More detailed debugging
-        print("Oracle connection details:")
-        print(f"Host: {host}")
-        print(f"Port: {port}")
-        print(f"Service Name: {service_name}")
-        print(f"SID: {sid}")
-        print(f"Username: {username}")
-        print(f"Password exists: {'Yes' if password else 'No'}")
+        logger.debug(
+            f"Oracle connection details: host={host}, port={port}, service_name={service_name}, "
+            f"sid={sid}, user={username}, password {'set' if password else 'missing'}"
+        )
         
         # Check for credentials in other formats
         if not password and 'credentials' in self.connection_info:
@@ -59,17 +86,16 @@ class OracleConnector(DatabaseConnector):
             if isinstance(creds, dict):
                 if 'password' in creds:
                     password = creds['password']
-                    print("Found password in credentials dictionary")
+                    logger.debug("Found password in credentials dictionary")
                 if 'encrypted_credentials' in creds:
                     try:
                         from core.utils.encryption import decrypt_credentials
                         decrypted = decrypt_credentials(creds['encrypted_credentials'])
                         if decrypted and 'password' in decrypted:
                             password = decrypted['password']
-                            print("Found password in encrypted credentials")
+                            logger.debug("Found password in encrypted credentials")
                     except Exception as e:
-                        print(f"Error decrypting credentials: {str(e)}")
-        
+                        logger.error(f"Error decrypting credentials: {str(e)}")
         # Password check with detailed error
         if not password:
             error_msg = (
@@ -91,10 +117,10 @@ class OracleConnector(DatabaseConnector):
         try:
             if service_name:
                 logger.debug(f"Using service_name: {service_name}")
-                dsn = cx_Oracle.makedsn(host, port, service_name=service_name)
+                dsn = driver.makedsn(host, port, service_name=service_name)
             elif sid:
                 logger.debug(f"Using SID: {sid}")
-                dsn = cx_Oracle.makedsn(host, port, sid=sid)
+                dsn = driver.makedsn(host, port, sid=sid)
             else:
                 # Try with just host/port if no service_name or SID provided
                 logger.warning("No service_name or sid provided. Attempting connection with just host/port.")
@@ -112,26 +138,36 @@ class OracleConnector(DatabaseConnector):
         
         # Connect to the database with detailed error handling
         try:
-            self.connection = cx_Oracle.connect(username, password, dsn)
-            logger.info("Oracle connection established successfully")
-            print("Oracle connection established successfully")
+            self.connection = driver.connect(user=username, password=password, dsn=dsn)
+            # The driver keeps this many statements parsed per connection, see new_statement_cache
+            self.connection.stmtcachesize = get_cache_size()
+            logger.info(f"Oracle connection established successfully with {driver.__name__}")
+            self.connect_error = None
             return True
-        except cx_Oracle.DatabaseError as e:
+        except driver.DatabaseError as e:
             error_obj, = e.args
             error_msg = f"Oracle connection failed: {error_obj.message}"
             logger.error(error_msg)
-            print(error_msg)
             self.connection = None
+            self.connect_error = error_obj.message
             return False
         except Exception as e:
             error_msg = f"Oracle connection failed with an unexpected error: {str(e)}"
             logger.error(error_msg)
             logger.error(traceback.format_exc())
-            print(error_msg)
-            print(traceback.format_exc())
             self.connection = None
+            self.connect_error = str(e)
             return False
     
+    def new_statement_cache(self, stats=None):
+        """
+        Track statement reuse on this connection. The driver caches the
+        statements itself, in an LRU of stmtcachesize statements.
+        """
+        if get_cache_size() <= 0:
+            return None
+        return StatementCache(self.db_type, native=True, stats=stats)
+    
     def disconnect(self):
         """Close the database connection."""
         try:
@@ -173,7 +209,7 @@ class OracleConnector(DatabaseConnector):
             if self.is_connection_closed():
                 success = self.connect()
                 if not success:
-                    return False, "Failed to establish connection"
+                    return False, self.connection_failed_message()
             
             # Execute a simple query
             success, results, error = self.execute_query("SELECT 1 FROM DUAL")
@@ -187,7 +223,75 @@ class OracleConnector(DatabaseConnector):
             logger.error(f"Error testing connection: {str(e)}")
             return False, str(e)
     
-    def execute_query(self, query, params=None, timeout=None):
+    def _configure_cursor(self, cursor, fetch_size=None):
+        """
+        Set the rows fetched per round-trip on a cursor.
+        
+        arraysize is the batch size of fetch calls, and prefetchrows the rows
+        returned with the execute round-trip itself, so that small results
+        need no fetch round-trip at all.
+        """
+        fetch_size = self._fetch_size(fetch_size)
+        cursor.arraysize = fetch_size
+        # prefetchrows needs cx_Oracle 8 or oracledb
+        if hasattr(cursor, 'prefetchrows'):
+            cursor.prefetchrows = fetch_size + 1
+    
+    def _start_timeout(self, timeout):
+        """
+        Limit each round-trip to the database to timeout seconds.
+        
+        Uses the connection's call timeout, which needs Oracle Client 18 or
+        thin mode. Otherwise a watchdog thread cancels the running call once
+        the timeout has passed.
+        
+        Returns:
+            The watchdog timer, if one was started; pass it to _clear_timeout
+        """
+        if not timeout:
+            return None
+        
+        try:
+            if hasattr(self.connection, 'call_timeout'):
+                self.connection.call_timeout = int(timeout * 1000)
+            else:
+                self.connection.callTimeout = int(timeout * 1000)
+            return None
+        except Exception as e:
+            logger.debug(f"Call timeout not supported, using a watchdog instead: {str(e)}")
+        
+        connection = self.connection
+        
+        def cancel():
+            logger.warning(f"Oracle query exceeded its {timeout}s timeout, cancelling it")
+            try:
+                connection.cancel()
+            except Exception as e:
+                logger.error(f"Error cancelling Oracle query: {str(e)}")
+        
+        watchdog = threading.Timer(timeout, cancel)
+        watchdog.daemon = True
+        watchdog.start()
+        return watchdog
+    
+    def _clear_timeout(self, watchdog=None):
+        """
+        Remove the limit set by _start_timeout, so it does not carry over to
+        the next user of a pooled connection.
+        """
+        if watchdog is not None:
+            watchdog.cancel()
+        if self.connection is None:
+            return
+        try:
+            if hasattr(self.connection, 'call_timeout'):
+                self.connection.call_timeout = 0
+            elif hasattr(self.connection, 'callTimeout'):
+                self.connection.callTimeout = 0
+        except Exception:
+            pass
+    
+    def execute_query(self, query, params=None, timeout=None, as_result_set=False):
         """
         Execute a SQL query against the Oracle database.
         
@@ -195,50 +299,44 @@ class OracleConnector(DatabaseConnector):
             query: SQL query to execute
             params: Optional parameters for the query
             timeout: Optional timeout in seconds
+            as_result_set: Return rows as a ResultSet of tuples instead of dictionaries
             
         Returns:
             Tuple of (success, results, error_message)
         """
+        watchdog = None
         try:
             logger.debug(f"Executing Oracle query: {query}")
             
-            # Make sure we have a connection
-            if self.is_connection_closed():
+            # Make sure we have a connection. Pooled connections are health-checked
+            # when borrowed, so there is no test round-trip before every query.
+            if self.connection is None:
                 logger.debug("No active connection, creating new connection")
                 success = self.connect()
                 if not success:
-                    return False, None, "Failed to establish connection"
+                    return False, None, self.connection_failed_message()
             
             cursor = self.connection.cursor()
+            self._configure_cursor(cursor)
+            watchdog = self._start_timeout(timeout)
             
-            # Note: Setting timeout on cursor is skipped since callTimeout is not available
-            # Log a warning instead
-            if timeout:
-                logger.warning(f"Timeout specified ({timeout}s) but timeout setting not supported in this version of cx_Oracle")
-                print(f"Timeout specified ({timeout}s) but not supported in this version of cx_Oracle")
+            if self.statement_cache is not None and is_preparable(query):
+                self.statement_cache.lookup(query)
             
-            # Execute the query
+            # Execute the query, with :name bind variables
             if params:
                 logger.debug(f"With parameters: {params}")
-                # Convert dict params to bind variables
-                bind_params = {}
-                
-                # Oracle uses :param instead of %(param)s
-                for key, value in params.items():
-                    bind_params[key] = value
-                print(query)
-                cursor.execute(query, bind_params)
+                cursor.execute(query, dict(params))
             else:
-                print(query)
                 cursor.execute(query)
             
-            # For SELECT queries, fetch results
-            if query.strip().upper().startswith('SELECT'):
-                columns = [col[0] for col in cursor.description]
-                results = []
-                
-                for row in cursor:
-                    results.append(dict(zip(columns, row)))
+            # For SELECT queries, fetch results arraysize rows per round-trip
+            if cursor.description is not None:
+                if as_result_set:
+                    results = ResultSet.from_cursor(cursor)
+                else:
+                    columns = [col[0] for col in cursor.description]
+                    results = [dict(zip(columns, row)) for row in cursor.fetchall()]
                 
                 logger.debug(f"Query returned {len(results)} rows")
                 cursor.close()
@@ -254,13 +352,53 @@ class OracleConnector(DatabaseConnector):
         except Exception as e:
             error_message = f"Error executing Oracle query: {str(e)}\n{traceback.format_exc()}"
             logger.error(error_message)
-            print(error_message)
             if self.connection:
                 try:
                     self.connection.rollback()
                 except:
                     pass
             return False, None, error_message
+        finally:
+            self._clear_timeout(watchdog)
+    
+    def stream_query(self, query, params=None, fetch_size=None, timeout=None, as_result_set=False):
+        """
+        Stream a SELECT query, fetching arraysize rows per round-trip.
+        
+        Args:
+            query: SQL query to execute
+            params: Optional parameters for the query
+            fetch_size: Rows per batch, defaults to the connection's fetch_size
+            timeout: Optional timeout in seconds, for each round-trip
+            as_result_set: Yield ResultSets of tuples instead of lists of dictionaries
+            
+        Yields:
+            Batches of up to fetch_size rows
+        """
+        fetch_size = self._fetch_size(fetch_size)
+        if self.connection is None and not self.connect():
+            raise RuntimeError(self.connection_failed_message())
+        
+        cursor = self.connection.cursor()
+        watchdog = None
+        try:
+            self._configure_cursor(cursor, fetch_size)
+            watchdog = self._start_timeout(timeout)
+            cursor.execute(query.strip().rstrip(';'), params or {})
+            
+            columns = [col[0] for col in cursor.description]
+            while True:
+                rows = cursor.fetchmany(fetch_size)
+                # The timeout covers database calls, not the consumer's work on a batch
+                self._clear_timeout(watchdog)
+                watchdog = None
+                if not rows:
+                    break
+                yield ResultSet(columns, rows) if as_result_set else [dict(zip(columns, row)) for row in rows]
+                watchdog = self._start_timeout(timeout)
+        finally:
+            cursor.close()
+            self._clear_timeout(watchdog)
     
     def execute_script(self, script, params=None, timeout=None):
         """
@@ -280,19 +418,17 @@ class OracleConnector(DatabaseConnector):
         statements = [stmt.strip() for stmt in script.split(';') if stmt.strip()]
         if not statements:
             return True, {"executed": True}, ""
-            
+        
+        watchdog = None
         try:
             # Make sure we have a connection
-            if self.is_connection_closed():
+            if self.connection is None:
                 success = self.connect()
                 if not success:
-                    return False, None, "Failed to establish connection"
+                    return False, None, self.connection_failed_message()
             
             cursor = self.connection.cursor()
-            
-            # Set timeout if specified
-            if timeout:
-                cursor.callTimeout = timeout * 1000  # Convert to milliseconds
+            watchdog = self._start_timeout(timeout)
             
             # Execute each statement
             for statement in statements:
@@ -325,6 +461,50 @@ class OracleConnector(DatabaseConnector):
                 except:
                     pass
             return False, None, error_message
+        finally:
+            self._clear_timeout(watchdog)
+    
+    def write_batch(self, query, columns, rows, timeout=None):
+        """
+        Run a write statement for a batch of rows with executemany and batch errors.
+        
+        Rows the database rejects, e.g. for a constraint violation, are skipped
+        and reported instead of failing the batch; the other rows are committed.
+        
+        Args:
+            query: INSERT, UPDATE or DELETE statement with :name bind variables
+            columns: Column names of the row values
+            rows: Row value tuples, in column order
+            timeout: Optional timeout in seconds
+            
+        Returns:
+            Tuple of (rows written, errors of single rows as (row offset, message))
+        """
+        if self.connection is None and not self.connect():
+            raise ConnectionError(self.connection_failed_message())
+        
+        cursor = self.connection.cursor()
+        watchdog = None
+        try:
+            watchdog = self._start_timeout(timeout)
+            cursor.executemany(
+                query.strip().rstrip(';'),
+                [dict(zip(columns, row)) for row in rows],
+                batcherrors=True
+            )
+            row_errors = [(error.offset, error.message) for error in cursor.getbatcherrors()]
+            rowcount = cursor.rowcount
+            self.connection.commit()
+            return rowcount, row_errors
+        except Exception:
+            try:
+                self.connection.rollback()
+            except Exception:
+                pass
+            raise
+        finally:
+            cursor.close()
+            self._clear_timeout(watchdog)
     
     def get_table_names(self):
         """
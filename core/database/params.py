@@ -0,0 +1,84 @@
+# core/database/params.py
+"""
+Query parameter conversion.
+
+Hermes queries use :name placeholders. Drivers and server-side prepared
+statements expect their own placeholder styles, so queries are rewritten
+just before they are executed.
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# :name placeholders; a preceding colon means a PostgreSQL ::cast, not a parameter
+_NAMED_PARAM = re.compile(r'(?<!:):([A-Za-z_]\w*)')
+
+
+def convert_named_params(query: str, params: Optional[Dict[str, Any]], paramstyle: str) -> Tuple[str, Any]:
+    """
+    Rewrite the :name placeholders used throughout Hermes into a driver's paramstyle.
+    
+    Args:
+        query: SQL with :name placeholders
+        params: Parameter values by name
+        paramstyle: The driver's DB-API paramstyle, or 'dollar' for the $1
+            placeholders of PostgreSQL prepared statements
+    
+    Returns:
+        Tuple of (query, parameters) ready for cursor.execute: a dictionary
+        for the named styles, a list in placeholder order for the positional ones
+    """
+    if not params:
+        return query, ()
+    if paramstyle == 'named':
+        return query, params
+    if paramstyle == 'pyformat':
+        return _NAMED_PARAM.sub(
+            lambda m: f"%({m.group(1)})s" if m.group(1) in params else m.group(0), query
+        ), params
+    
+    ordered = []
+    
+    def positional(match):
+        name = match.group(1)
+        if name not in params:
+            return match.group(0)
+        ordered.append(params[name])
+        if paramstyle == 'qmark':
+            return '?'
+        if paramstyle == 'numeric':
+            return f':{len(ordered)}'
+        if paramstyle == 'dollar':
+            return f'${len(ordered)}'
+        return '%s'
+    
+    return _NAMED_PARAM.sub(positional, query), ordered
+
+
+def convert_named_params_many(
+    query: str,
+    columns: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    paramstyle: str
+) -> Tuple[str, List[Any]]:
+    """
+    Rewrite a statement with :name placeholders for executemany over tuple rows.
+    
+    The query is converted once; every row is then bound in the order its
+    placeholders appear, or by name for the named styles.
+    
+    Args:
+        query: SQL with a :name placeholder per column used
+        columns: Column names of the row values
+        rows: Row value tuples, in column order
+        paramstyle: The driver's DB-API paramstyle
+    
+    Returns:
+        Tuple of (query, parameter list) ready for cursor.executemany
+    """
+    query, names = convert_named_params(query, {column: column for column in columns}, paramstyle)
+    if paramstyle in ('named', 'pyformat'):
+        return query, [dict(zip(columns, row)) for row in rows]
+    index = {column: i for i, column in enumerate(columns)}
+    positions = [index[name] for name in names]
+    return query, [[row[i] for i in positions] for row in rows]
@@ -0,0 +1,397 @@
+"""
+Process-wide connection pooling for database connectors.
+
+Pools are keyed by DatabaseConnection ID and a hash of the connection info,
+so connectors for the same connection share warm connections while a changed
+host or password gets a fresh pool. Connections are health-checked when
+borrowed if they have not been used for a while, and evicted when idle.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Any
+
+from django.conf import settings
+
+from .statement_cache import StatementCacheStats
+
+logger = logging.getLogger(__name__)
+
+# Defaults, overridable through DATABASE_POOL_* settings
+DEFAULT_MIN_SIZE = 0
+DEFAULT_MAX_SIZE = 10
+DEFAULT_IDLE_TIMEOUT = 300
+DEFAULT_HEALTH_CHECK_TTL = 30
+DEFAULT_BORROW_TIMEOUT = 30
+
+
+class PoolTimeoutError(TimeoutError):
+    """
+    Raised when no pooled connection becomes available in time.
+    """
+
+
+class _PooledConnection:
+    """
+    A raw DB-API connection with the timestamps the pool needs.
+    """
+    __slots__ = ('connection', 'statements', 'created_at', 'last_used', 'last_checked')
+    
+    def __init__(self, connection, statements=None):
+        now = time.monotonic()
+        self.connection = connection
+        # StatementCache of the statements prepared on this connection
+        self.statements = statements
+        self.created_at = now
+        self.last_used = now
+        self.last_checked = now
+    
+    def close(self):
+        try:
+            self.connection.close()
+        except Exception as e:
+            logger.debug(f"Error closing pooled connection: {str(e)}")
+
+
+class ConnectionPool:
+    """
+    Pool of connections for one set of connection info.
+    
+    Connections are created with the connector for the connection type, so
+    the pool works with any connector whose connect() sets its connection.
+    """
+    
+    def __init__(
+        self,
+        connection_info: Dict[str, Any],
+        min_size: int = DEFAULT_MIN_SIZE,
+        max_size: int = DEFAULT_MAX_SIZE,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+        health_check_ttl: float = DEFAULT_HEALTH_CHECK_TTL,
+        borrow_timeout: float = DEFAULT_BORROW_TIMEOUT
+    ):
+        """
+        Initialize the pool. Connections are opened lazily, on first borrow.
+        
+        Args:
+            connection_info: Dictionary with connection parameters, including 'type'
+            min_size: Idle connections kept open regardless of idle_timeout
+            max_size: Maximum number of open connections
+            idle_timeout: Seconds after which an idle connection is closed
+            health_check_ttl: Seconds a connection is trusted without a health check
+            borrow_timeout: Seconds to wait for a connection when all are in use
+        """
+        self.connection_info = connection_info
+        self.min_size = min_size
+        self.max_size = max(max_size, 1)
+        self.idle_timeout = idle_timeout
+        self.health_check_ttl = health_check_ttl
+        self.borrow_timeout = borrow_timeout
+        
+        self._validation_query = None
+        self._idle = deque()
+        self._size = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        
+        # Counters exposed through stats()
+        self._created = 0
+        self._reused = 0
+        self._discarded = 0
+        self._statement_stats = StatementCacheStats()
+    
+    def _new_connector(self):
+        # Imported here, as the connector factory lives in the package that imports this module
+        from core.database import get_connector
+        connector = get_connector(self.connection_info)
+        if connector is None:
+            raise ValueError(f"Unsupported database type: {self.connection_info.get('type')}")
+        return connector
+    
+    def _open(self):
+        """
+        Open a new raw connection.
+        """
+        connector = self._new_connector()
+        if not connector.connect() or connector.connection is None:
+            raise ConnectionError(connector.connection_failed_message())
+        self._validation_query = connector.validation_query
+        self._created += 1
+        return _PooledConnection(connector.connection, connector.new_statement_cache(self._statement_stats))
+    
+    def _is_healthy(self, entry):
+        """
+        Run the connector's validation query on a connection.
+        """
+        try:
+            cursor = entry.connection.cursor()
+            try:
+                cursor.execute(self._validation_query)
+                cursor.fetchall()
+            finally:
+                cursor.close()
+            return True
+        except Exception as e:
+            logger.info(f"Discarding unhealthy pooled connection: {str(e)}")
+            return False
+    
+    def _evict_idle(self, now):
+        """
+        Close connections idle for longer than idle_timeout, keeping min_size open.
+        Must be called holding the lock.
+        """
+        while self._idle and self._size > self.min_size and now - self._idle[0].last_used > self.idle_timeout:
+            entry = self._idle.popleft()
+            self._size -= 1
+            entry.close()
+    
+    def borrow(self):
+        """
+        Borrow a connection, reusing an idle one if possible.
+        
+        Returns:
+            _PooledConnection; give it back with release()
+        
+        Raises:
+            PoolTimeoutError: If max_size connections stay in use for borrow_timeout seconds
+        """
+        deadline = time.monotonic() + self.borrow_timeout
+        
+        while True:
+            entry = None
+            with self._condition:
+                if self._closed:
+                    raise ConnectionError("Connection pool is closed")
+                
+                while True:
+                    now = time.monotonic()
+                    self._evict_idle(now)
+                    if self._idle:
+                        # Most recently used first, so surplus connections go idle and get evicted
+                        entry = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        raise PoolTimeoutError(
+                            f"No database connection available after {self.borrow_timeout}s "
+                            f"({self.max_size} in use)"
+                        )
+                    self._condition.wait(remaining)
+            
+            if entry is None:
+                try:
+                    return self._open()
+                except Exception:
+                    with self._condition:
+                        self._size -= 1
+                        self._condition.notify()
+                    raise
+            
+            # Connections used within the TTL are trusted, saving a round-trip per borrow
+            now = time.monotonic()
+            if now - entry.last_checked > self.health_check_ttl:
+                healthy = self._is_healthy(entry)
+                entry.last_checked = now
+            else:
+                healthy = True
+            if healthy:
+                self._reused += 1
+                return entry
+            
+            # Dead connection, close it and try the next one
+            entry.close()
+            with self._condition:
+                self._size -= 1
+                self._discarded += 1
+                self._condition.notify()
+    
+    def release(self, entry, discard=False):
+        """
+        Give a borrowed connection back to the pool.
+        
+        Args:
+            entry: Connection returned by borrow()
+            discard: Close the connection instead, e.g. after an error left it unusable
+        """
+        if not discard:
+            try:
+                # End any open transaction so the next borrower starts clean
+                entry.connection.rollback()
+            except Exception:
+                discard = True
+        
+        with self._condition:
+            if discard or self._closed:
+                self._size -= 1
+                self._discarded += 1
+                entry.close()
+            else:
+                entry.last_used = entry.last_checked = time.monotonic()
+                self._idle.append(entry)
+            self._condition.notify()
+    
+    def expire_health_checks(self):
+        """
+        Health-check every idle connection when next borrowed, e.g. after one
+        of them lost its server, as a failover drops all of them.
+        """
+        with self._condition:
+            for entry in self._idle:
+                entry.last_checked = float('-inf')
+    
+    def close(self):
+        """
+        Close idle connections. Borrowed ones are closed when released.
+        """
+        with self._condition:
+            self._closed = True
+            while self._idle:
+                self._idle.popleft().close()
+                self._size -= 1
+            self._condition.notify_all()
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get pool usage counters, and the hit rate of the statement caches of its connections.
+        """
+        with self._condition:
+            stats = {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'created': self._created,
+                'reused': self._reused,
+                'discarded': self._discarded,
+            }
+        stats.update(self._statement_stats.as_dict())
+        return stats
+
+
+# (connection ID, connection info hash) -> ConnectionPool
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _connection_info_hash(connection_info: Dict[str, Any]) -> str:
+    """
+    Hash the connection info, credentials included, so changed settings get a new pool.
+    """
+    serialized = json.dumps(connection_info, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+
+def get_pool(connection_info: Dict[str, Any]) -> ConnectionPool:
+    """
+    Get the pool for a connection, creating it on first use.
+    
+    Pools of the same connection with outdated connection info are closed,
+    so workers that did not see a change to the connection still drop it.
+    
+    Args:
+        connection_info: Dictionary with connection parameters; 'connection_id'
+            identifies the DatabaseConnection it came from
+    
+    Returns:
+        ConnectionPool instance
+    """
+    connection_id = connection_info.get('connection_id')
+    key = (connection_id, _connection_info_hash(connection_info))
+    
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            if connection_id is not None:
+                for stale_key in [k for k in _pools if k[0] == connection_id]:
+                    logger.info(f"Connection {connection_id} changed, closing its previous pool")
+                    _pools.pop(stale_key).close()
+            
+            pool = ConnectionPool(
+                connection_info,
+                min_size=getattr(settings, 'DATABASE_POOL_MIN_SIZE', DEFAULT_MIN_SIZE),
+                max_size=getattr(settings, 'DATABASE_POOL_MAX_SIZE', DEFAULT_MAX_SIZE),
+                idle_timeout=getattr(settings, 'DATABASE_POOL_IDLE_TIMEOUT', DEFAULT_IDLE_TIMEOUT),
+                health_check_ttl=getattr(settings, 'DATABASE_POOL_HEALTH_CHECK_TTL', DEFAULT_HEALTH_CHECK_TTL),
+                borrow_timeout=getattr(settings, 'DATABASE_POOL_BORROW_TIMEOUT', DEFAULT_BORROW_TIMEOUT)
+            )
+            _pools[key] = pool
+        return pool
+
+
+def invalidate_pool(connection_id) -> int:
+    """
+    Close the pools of a connection, e.g. after it was edited or deleted.
+    
+    Args:
+        connection_id: DatabaseConnection ID
+    
+    Returns:
+        Number of pools closed
+    """
+    with _pools_lock:
+        stale = [_pools.pop(k) for k in list(_pools) if k[0] == connection_id]
+    for pool in stale:
+        pool.close()
+    if stale:
+        logger.info(f"Closed {len(stale)} connection pools for connection {connection_id}")
+    return len(stale)
+
+
+def pool_stats() -> Dict[Any, Dict[str, Any]]:
+    """
+    Get the stats of every pool in this process, by connection ID.
+    """
+    with _pools_lock:
+        pools = list(_pools.items())
+    return {key[0]: pool.stats() for key, pool in pools}
+
+
+def close_all_pools():
+    """
+    Close every pool in this process.
+    """
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+@contextmanager
+def pooled_connector(connection_info: Dict[str, Any]):
+    """
+    Get a connector for the connection info, backed by a pooled connection.
+    
+    The connection goes back to the pool when the block exits, or is closed
+    if the block raised, as it may be left in an unknown state.
+    
+    Usage:
+        with pooled_connector(connection.get_connection_info()) as connector:
+            success, results, error = connector.execute_query(query)
+    """
+    pool = get_pool(connection_info)
+    entry = pool.borrow()
+    connector = pool._new_connector()
+    connector.connection = entry.connection
+    connector.statement_cache = entry.statements
+    discard = False
+    try:
+        yield connector
+    except BaseException:
+        discard = True
+        raise
+    finally:
+        # A connector that dropped or replaced its connection must not leave it in the pool
+        if connector.connection is not entry.connection:
+            discard = True
+            connector.disconnect()
+        connector.connection = None
+        connector.statement_cache = None
+        pool.release(entry, discard=discard)
@@ -0,0 +1,148 @@
+"""
+Compact query result type.
+
+A ResultSet keeps the column names once and the rows as the tuples the
+database driver returned, instead of one dictionary per row. Rows are
+read through Row, a tuple that also reads values by column name, so code
+written for dictionary rows keeps working.
+"""
+
+import functools
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+
+class Row(tuple):
+    """
+    A result row: a tuple that also reads values by column name.
+    
+    row['email'], row.get('email'), row.keys(), row.items() and 'email' in row
+    behave like they do on a dictionary, while row[0] and iterating the row
+    give its values by position, like a tuple.
+    """
+    __slots__ = ()
+    
+    # Set on the row class of every column list by row_class()
+    _columns = ()
+    _index = {}
+    
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return tuple.__getitem__(self, self._index[key])
+        return tuple.__getitem__(self, key)
+    
+    def __contains__(self, key):
+        return key in self._index
+    
+    def get(self, key, default=None):
+        index = self._index.get(key)
+        return default if index is None else tuple.__getitem__(self, index)
+    
+    def keys(self):
+        return self._columns
+    
+    def values(self):
+        return tuple(self)
+    
+    def items(self):
+        return zip(self._columns, self)
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(zip(self._columns, self))
+    
+    def __repr__(self):
+        return f"Row({self.as_dict()!r})"
+
+
+@functools.lru_cache(maxsize=256)
+def row_class(columns: tuple) -> type:
+    """
+    Get the Row subclass for a column list, shared by every result with the same columns.
+    """
+    return type('Row', (Row,), {
+        '__slots__': (),
+        '_columns': columns,
+        '_index': {name: i for i, name in enumerate(columns)},
+    })
+
+
+class ResultSet:
+    """
+    Rows of a query result, stored as tuples under one column header.
+    
+    Iterating or indexing a ResultSet gives Row objects, created on the fly,
+    so only the driver's tuples are held in memory.
+    """
+    __slots__ = ('columns', 'rows', '_row_class')
+    
+    def __init__(self, columns: Sequence[str], rows: Optional[List[tuple]] = None):
+        """
+        Args:
+            columns: Column names, in row order
+            rows: Row value tuples, kept as is
+        """
+        self.columns = tuple(columns)
+        self.rows = rows if rows is not None else []
+        self._row_class = row_class(self.columns)
+    
+    @classmethod
+    def from_cursor(cls, cursor, rows: Optional[List[tuple]] = None) -> 'ResultSet':
+        """
+        Build a result from a DB-API cursor, fetching all its rows unless given.
+        """
+        columns = [desc[0] for desc in cursor.description]
+        return cls(columns, cursor.fetchall() if rows is None else rows)
+    
+    @classmethod
+    def from_dicts(cls, records: Iterable[Dict[str, Any]]) -> 'ResultSet':
+        """
+        Build a result from dictionary rows, with the columns of the first row.
+        """
+        records = iter(records)
+        first = next(records, None)
+        if first is None:
+            return cls(())
+        columns = tuple(first.keys())
+        rows = [tuple(first.get(c) for c in columns)]
+        rows.extend(tuple(record.get(c) for c in columns) for record in records)
+        return cls(columns, rows)
+    
+    @staticmethod
+    def is_table_data(data: Any) -> bool:
+        """
+        Whether data is the serialized form written by to_data().
+        """
+        return isinstance(data, dict) and set(data) == {'columns', 'rows'} and isinstance(data['rows'], list)
+    
+    @classmethod
+    def from_data(cls, data: Dict[str, Any]) -> 'ResultSet':
+        """
+        Rebuild a result from to_data(), e.g. the output of a previous workflow action.
+        """
+        return cls(data['columns'], [tuple(row) for row in data['rows']])
+    
+    def to_data(self) -> Dict[str, Any]:
+        """
+        Serialize to a JSON-compatible {'columns': [...], 'rows': [[...], ...]} dictionary.
+        """
+        return {'columns': list(self.columns), 'rows': [list(row) for row in self.rows]}
+    
+    def dicts(self) -> List[Dict[str, Any]]:
+        """
+        Get the rows as dictionaries, for code that needs real dictionaries.
+        """
+        columns = self.columns
+        return [dict(zip(columns, row)) for row in self.rows]
+    
+    def __len__(self):
+        return len(self.rows)
+    
+    def __iter__(self) -> Iterator[Row]:
+        return map(self._row_class, self.rows)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ResultSet(self.columns, self.rows[index])
+        return self._row_class(self.rows[index])
+    
+    def __repr__(self):
+        return f"<ResultSet {len(self.rows)} rows x {len(self.columns)} columns>"
@@ -0,0 +1,212 @@
+# core/database/retry.py
+"""
+Retry policy for database operations.
+
+Errors are classified as connection errors, such as a reset connection or a
+server failing over, other transient errors, such as deadlocks and
+serialization failures, or permanent errors, such as syntax errors, a
+missing table or rejected credentials. Only transient errors are retried,
+with exponential backoff and jitter, within a total time budget, so a worker
+does not spend minutes repeating a query that can never succeed.
+"""
+
+import random
+import re
+from typing import Any, Optional, Union
+
+from django.conf import settings
+
+# Error classes
+CONNECTION = 'connection'
+TRANSIENT = 'transient'
+PERMANENT = 'permanent'
+
+# Defaults, overridable through DATABASE_RETRY_* settings
+DEFAULT_MAX_DELAY = 30
+DEFAULT_BUDGET = 120
+
+# Connectors report most errors as messages, so these are matched in the
+# lower-cased message, as well as the driver codes below
+_CONNECTION_MESSAGES = (
+    # PostgreSQL
+    'server closed the connection unexpectedly',
+    'could not connect to server',
+    'connection already closed',
+    'connection refused',
+    'connection reset',
+    'connection timed out',
+    'terminating connection',
+    'the database system is starting up',
+    'the database system is shutting down',
+    'the database system is in recovery mode',
+    'ssl connection has been closed unexpectedly',
+    'ssl syscall error',
+    # MySQL
+    'lost connection to mysql server',
+    'mysql server has gone away',
+    "can't connect to mysql server",
+    # Any connector
+    'failed to establish connection',
+    'not connected',
+    'broken pipe',
+)
+_TRANSIENT_MESSAGES = (
+    'deadlock',
+    'could not serialize access',
+    'lock wait timeout exceeded',
+    'database is locked',
+    'database table is locked',
+    'too many connections',
+    'no database connection available',
+)
+
+# Rejected credentials fail the same way on every attempt, also when a connector
+# reports them as a failed connection
+_AUTHENTICATION_MESSAGES = (
+    # PostgreSQL
+    'password authentication failed',
+    'no password supplied',
+    # MySQL
+    'access denied for user',
+    # SQL Server
+    'login failed for user',
+)
+_AUTHENTICATION_SQLSTATES = ('28',)
+_AUTHENTICATION_ERRNOS = {1044, 1045, 1698}
+_AUTHENTICATION_ORACLE_CODES = {('ORA', 1005), ('ORA', 1017), ('ORA', 28000)}
+
+# SQLSTATE codes and classes: connection exceptions, serialization failures,
+# deadlocks, server shutdowns and too many connections
+_CONNECTION_SQLSTATES = ('08', '57P01', '57P02', '57P03')
+_TRANSIENT_SQLSTATES = ('40001', '40P01', '53300', '55P03')
+
+# MySQL error numbers
+_CONNECTION_ERRNOS = {2002, 2003, 2006, 2013, 2055}
+_TRANSIENT_ERRNOS = {1040, 1205, 1213}
+
+# Oracle errors: lost or refused connections, and the ones of listeners failing over
+_ORACLE_ERROR = re.compile(r'\b(ORA|DPI)-0*(\d+)')
+_CONNECTION_ORACLE_CODES = {
+    ('ORA', 3113), ('ORA', 3114), ('ORA', 3135), ('ORA', 12170), ('ORA', 12514),
+    ('ORA', 12528), ('ORA', 12537), ('ORA', 12541), ('ORA', 12547), ('ORA', 25408),
+    ('DPI', 1010), ('DPI', 1080), ('DPI', 4011),
+}
+_TRANSIENT_ORACLE_CODES = {('ORA', 60), ('ORA', 8177), ('ORA', 54), ('ORA', 18)}
+
+
+def classify_error(error: Union[BaseException, str, None]) -> str:
+    """
+    Classify a database error.
+    
+    Args:
+        error: Exception raised by a driver, or the error message of a connector
+    
+    Returns:
+        CONNECTION if the connection is lost and has to be replaced, TRANSIENT
+        if the operation may succeed when retried, PERMANENT otherwise
+    """
+    if error is None:
+        return PERMANENT
+    
+    message = str(error)
+    codes = {(prefix, int(number)) for prefix, number in _ORACLE_ERROR.findall(message)}
+    if codes & _AUTHENTICATION_ORACLE_CODES:
+        return PERMANENT
+    if any(pattern in message.lower() for pattern in _AUTHENTICATION_MESSAGES):
+        return PERMANENT
+    
+    if isinstance(error, BaseException):
+        sqlstate = getattr(error, 'pgcode', None) or getattr(error, 'sqlstate', None)
+        if sqlstate:
+            if sqlstate.startswith(_AUTHENTICATION_SQLSTATES):
+                return PERMANENT
+            if sqlstate.startswith(_CONNECTION_SQLSTATES):
+                return CONNECTION
+            if sqlstate in _TRANSIENT_SQLSTATES:
+                return TRANSIENT
+        errno = getattr(error, 'errno', None)
+        if errno in _AUTHENTICATION_ERRNOS:
+            return PERMANENT
+        if errno in _CONNECTION_ERRNOS:
+            return CONNECTION
+        if errno in _TRANSIENT_ERRNOS:
+            return TRANSIENT
+        if isinstance(error, (ConnectionError, TimeoutError)):
+            # Includes PoolTimeoutError, when every pooled connection is in use
+            return TRANSIENT if 'no database connection available' in str(error).lower() else CONNECTION
+    
+    if codes & _CONNECTION_ORACLE_CODES:
+        return CONNECTION
+    if codes & _TRANSIENT_ORACLE_CODES:
+        return TRANSIENT
+    
+    message = message.lower()
+    if any(pattern in message for pattern in _CONNECTION_MESSAGES):
+        return CONNECTION
+    if any(pattern in message for pattern in _TRANSIENT_MESSAGES):
+        return TRANSIENT
+    return PERMANENT
+
+
+class RetryPolicy:
+    """
+    When and how long to wait before retrying a failed database operation.
+    
+    The delay before retry n is drawn uniformly between 0 and
+    base_delay * multiplier ** (n - 1), capped at max_delay ("full jitter"),
+    so workers that failed together do not retry together.
+    """
+    
+    def __init__(
+        self,
+        max_retries: int = 0,
+        base_delay: float = 1,
+        max_delay: Optional[float] = None,
+        multiplier: float = 2,
+        budget: Optional[float] = None
+    ):
+        """
+        Args:
+            max_retries: Maximum number of retries after the first attempt
+            base_delay: Upper bound of the first delay, in seconds
+            max_delay: Upper bound of any delay, defaults to DATABASE_RETRY_MAX_DELAY
+            multiplier: Growth of the delay bound per retry
+            budget: Seconds after the first attempt started past which nothing is
+                retried, defaults to DATABASE_RETRY_BUDGET
+        """
+        self.max_retries = max(max_retries, 0)
+        self.base_delay = max(base_delay, 0)
+        self.max_delay = getattr(settings, 'DATABASE_RETRY_MAX_DELAY', DEFAULT_MAX_DELAY) if max_delay is None else max_delay
+        self.multiplier = multiplier
+        self.budget = getattr(settings, 'DATABASE_RETRY_BUDGET', DEFAULT_BUDGET) if budget is None else budget
+    
+    def classify(self, error: Any) -> str:
+        """
+        Classify an error, see classify_error.
+        """
+        return classify_error(error)
+    
+    def delay(self, retry: int) -> float:
+        """
+        Get the seconds to wait before a retry, counting retries from 1.
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * self.multiplier ** (retry - 1)))
+    
+    def next_delay(self, error: Any, retry: int, elapsed: float) -> Optional[float]:
+        """
+        Decide whether to retry after an error.
+        
+        Args:
+            error: The error of the failed attempt
+            retry: Number of the retry that would be made, from 1
+            elapsed: Seconds since the first attempt started
+        
+        Returns:
+            Seconds to wait before retrying, or None to give up
+        """
+        if retry > self.max_retries or self.classify(error) == PERMANENT:
+            return None
+        delay = self.delay(retry)
+        if elapsed + delay > self.budget:
+            return None
+        return delay
@@ -0,0 +1,165 @@
+# core/database/statement_cache.py
+"""
+Per-connection cache of prepared statements.
+
+Prepared statements belong to one database session, so every pooled
+connection has its own StatementCache, an LRU keyed by dialect and
+normalized SQL. Connectors prepare a statement once it has run
+prepare_threshold times, so one-off queries do not pay for a prepare
+round-trip, and close it when it is evicted. Drivers that cache statements
+themselves, like Oracle's stmtcachesize, only have their use tracked.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from django.conf import settings
+
+# Defaults, overridable through DATABASE_STATEMENT_CACHE_SIZE and DATABASE_PREPARE_THRESHOLD
+DEFAULT_CACHE_SIZE = 100
+DEFAULT_PREPARE_THRESHOLD = 2
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_sql(query: str) -> str:
+    """
+    Normalize SQL text for use as a cache key, ignoring whitespace and a trailing semicolon.
+    """
+    return _WHITESPACE.sub(' ', query).strip().rstrip(';').rstrip()
+
+
+def get_cache_size() -> int:
+    return getattr(settings, 'DATABASE_STATEMENT_CACHE_SIZE', DEFAULT_CACHE_SIZE)
+
+
+def is_preparable(query: str) -> bool:
+    """
+    Whether a statement is worth caching: queries and DML, not DDL or session commands.
+    """
+    return normalize_sql(query).split(' ', 1)[0].upper() in ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE')
+
+
+class StatementCacheStats:
+    """
+    Hit and miss counters, shared by the statement caches of a connection pool.
+    """
+    __slots__ = ('hits', 'misses', 'prepared', 'evicted', '_lock')
+    
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.prepared = 0
+        self.evicted = 0
+        self._lock = threading.Lock()
+    
+    def add(self, **counts):
+        with self._lock:
+            for name, count in counts.items():
+                setattr(self, name, getattr(self, name) + count)
+    
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'statement_hits': self.hits,
+                'statement_misses': self.misses,
+                'statement_hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'statements_prepared': self.prepared,
+                'statements_evicted': self.evicted,
+            }
+
+
+class CachedStatement:
+    """
+    A statement seen on a connection, and its prepared handle once it has one.
+    """
+    __slots__ = ('sql', 'handle', 'uses', 'unpreparable')
+    
+    def __init__(self, sql):
+        self.sql = sql
+        self.handle = None
+        self.uses = 0
+        # Set when the database refused to prepare the statement, so it is not tried again
+        self.unpreparable = False
+
+
+class StatementCache:
+    """
+    LRU of the statements run on one connection.
+    
+    A connection is used by one thread at a time, so the cache needs no lock.
+    """
+    
+    def __init__(
+        self,
+        dialect: str,
+        max_size: Optional[int] = None,
+        close_statement: Optional[Callable[[Any], None]] = None,
+        native: bool = False,
+        stats: Optional[StatementCacheStats] = None
+    ):
+        """
+        Args:
+            dialect: Database type the statements are written for
+            max_size: Maximum number of statements kept, defaults to DATABASE_STATEMENT_CACHE_SIZE
+            close_statement: Called with the handle of an evicted prepared statement
+            native: The driver caches statements itself; statements count as
+                prepared from their first use, and are only tracked here
+            stats: Counters to report to, e.g. the ones of the connection pool
+        """
+        self.dialect = dialect
+        self.max_size = get_cache_size() if max_size is None else max_size
+        self.close_statement = close_statement
+        self.native = native
+        self.prepare_threshold = getattr(settings, 'DATABASE_PREPARE_THRESHOLD', DEFAULT_PREPARE_THRESHOLD)
+        self.stats = stats if stats is not None else StatementCacheStats()
+        self._entries = OrderedDict()
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def lookup(self, query: str) -> CachedStatement:
+        """
+        Get the entry of a statement about to run, adding it if it is new.
+        A lookup is a hit if the statement is already prepared.
+        """
+        key = (self.dialect, normalize_sql(query))
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = CachedStatement(query)
+            self._entries[key] = entry
+            self._evict()
+        else:
+            self._entries.move_to_end(key)
+        entry.uses += 1
+        
+        if entry.handle is not None:
+            self.stats.add(hits=1)
+        else:
+            self.stats.add(misses=1)
+            if self.native:
+                entry.handle = True
+        return entry
+    
+    def should_prepare(self, entry: CachedStatement) -> bool:
+        """
+        Whether an unprepared statement has run often enough to be prepared.
+        """
+        return entry.handle is None and not entry.unpreparable and entry.uses >= self.prepare_threshold
+    
+    def prepared(self, entry: CachedStatement, handle: Any):
+        """
+        Record the handle of a statement the connector just prepared.
+        """
+        entry.handle = handle
+        self.stats.add(prepared=1)
+    
+    def _evict(self):
+        while len(self._entries) > self.max_size:
+            _, entry = self._entries.popitem(last=False)
+            if entry.handle is not None and self.close_statement is not None:
+                self.close_statement(entry.handle)
+            self.stats.add(evicted=1)
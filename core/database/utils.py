@@ -10,8 +10,13 @@ import re
 import logging
 from typing import Dict, Any, List, Optional, Set, Tuple
 
+from .connectors import CONNECTOR_REGISTRY, DatabaseConnector
+
 logger = logging.getLogger(__name__)
 
+# Bound parameter holding the row limit of queries wrapped by limit_query
+ROW_LIMIT_PARAM = 'hermes_row_limit'
+
 
 def extract_query_tables(query: str) -> List[str]:
     """
@@ -190,37 +195,43 @@ def extract_query_params(query: str) -> Set[str]:
     return params
 
 
-def limit_results(query: str, max_rows: int) -> str:
+def limit_query(
+    query: str,
+    max_rows: int,
+    db_type: Optional[str] = None,
+    params: Optional[Dict[str, Any]] = None
+) -> Tuple[str, Dict[str, Any]]:
     """
-    Add a LIMIT or similar clause to a SQL query to restrict number of rows returned.
+    Restrict the number of rows a SELECT query returns.
+    
+    The query is wrapped in the row limit syntax of its database, e.g.
+    SELECT * FROM (...) WHERE ROWNUM <= :n for Oracle, rather than having a
+    clause spliced into its text, so GROUP BY, ORDER BY and subqueries keep
+    their meaning. The limit is a bound parameter, so the statement text is
+    the same for any limit and the database can reuse its cached plan.
     
     Args:
-        query: SQL query to modify
-        max_rows: Maximum number of rows to return
+        query: SQL query to limit
+        max_rows: Maximum number of rows to return; 0 or less for no limit
+        db_type: Database type of the connection the query runs on
+        params: Parameters of the query
         
     Returns:
-        Modified query with appropriate row limit
+        Tuple of (query, params), with the row limit added to params
     """
-    # Only add limit to SELECT queries
-    query_type = extract_query_type(query)
-    if query_type != 'SELECT':
-        return query
+    params = dict(params or {})
+    if not max_rows or max_rows <= 0 or extract_query_type(query) not in ('SELECT', 'WITH'):
+        return query, params
     
     # Normalize query - remove trailing semicolons and whitespace
-    query = query.strip()
-    if query.endswith(';'):
-        query = query[:-1].strip()
-    
-    # Check if query already has a LIMIT clause
-    if re.search(r'\bLIMIT\s+\d+', query, re.IGNORECASE):
-        return query + ';'
-    
-    # Check if query has an ORDER BY clause (add LIMIT after that)
-    if re.search(r'\bORDER\s+BY\b', query, re.IGNORECASE):
-        return f"{query} LIMIT {max_rows};"
-    
-    # Add LIMIT clause 
-    return f"{query} LIMIT {max_rows};"
+    query = query.strip().rstrip(';').strip()
+    # A line comment at the end would swallow the rest of the wrapping query
+    if '--' in query.rsplit('\n', 1)[-1]:
+        query += '\n'
+    
+    connector_class = CONNECTOR_REGISTRY.get((db_type or '').lower(), DatabaseConnector)
+    params[ROW_LIMIT_PARAM] = int(max_rows)
+    return connector_class.limit_query_template.format(query=query, limit=f":{ROW_LIMIT_PARAM}"), params
 
 
 def format_query_for_display(query: str, max_length: int = 100) -> str:
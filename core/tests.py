@@ -1,3 +1,93 @@
-from django.test import TestCase
+import sqlite3
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from core.database.utils import ROW_LIMIT_PARAM, limit_query
+
+
+class LimitQueryTests(SimpleTestCase):
+    """
+    Tests for limit_query.
+    """
+    def test_limit_template(self):
+        for db_type in ('postgresql', 'postgres', 'mysql', 'sqlite', 'sqlite3', 'dbapi', 'other', None, 'unknown'):
+            with self.subTest(db_type=db_type):
+                query, params = limit_query('SELECT * FROM people', 10, db_type)
+                self.assertEqual(query, f"SELECT * FROM (SELECT * FROM people) limited_rows LIMIT :{ROW_LIMIT_PARAM}")
+                self.assertEqual(params, {ROW_LIMIT_PARAM: 10})
+
+    def test_oracle_template(self):
+        for db_type in ('oracle', 'ORACLE'):
+            with self.subTest(db_type=db_type):
+                query, params = limit_query('SELECT * FROM people', 10, db_type)
+                self.assertEqual(query, f"SELECT * FROM (SELECT * FROM people) WHERE ROWNUM <= :{ROW_LIMIT_PARAM}")
+                self.assertEqual(params, {ROW_LIMIT_PARAM: 10})
+
+    def test_with_query(self):
+        cte = "WITH recent AS (SELECT * FROM people WHERE modified_at > :since) SELECT * FROM recent ORDER BY id"
+        query, params = limit_query(cte + ';\n', 5, 'postgresql', {'since': '2024-01-01'})
+        self.assertEqual(query, f"SELECT * FROM ({cte}) limited_rows LIMIT :{ROW_LIMIT_PARAM}")
+        self.assertEqual(params, {'since': '2024-01-01', ROW_LIMIT_PARAM: 5})
+
+        query, _ = limit_query(cte, 5, 'oracle')
+        self.assertEqual(query, f"SELECT * FROM ({cte}) WHERE ROWNUM <= :{ROW_LIMIT_PARAM}")
+
+    def test_limited_queries_run(self):
+        connection = sqlite3.connect(':memory:')
+        self.addCleanup(connection.close)
+        connection.execute('CREATE TABLE people (id INTEGER, dept TEXT)')
+        connection.executemany('INSERT INTO people VALUES (?, ?)', [(i, 'IT' if i % 2 else 'HR') for i in range(20)])
+
+        for source in (
+            "SELECT * FROM people WHERE dept = :dept ORDER BY id DESC",
+            "WITH it AS (SELECT * FROM people WHERE dept = :dept) SELECT * FROM it ORDER BY id DESC;",
+            "SELECT dept, COUNT(*) AS n FROM people WHERE dept = :dept GROUP BY dept",
+            "SELECT * FROM people WHERE dept = :dept -- only IT",
+        ):
+            with self.subTest(query=source):
+                expected = connection.execute(source.rstrip(';'), {'dept': 'IT'}).fetchall()[:3]
+                query, params = limit_query(source, 3, 'sqlite', {'dept': 'IT'})
+                self.assertEqual(connection.execute(query, params).fetchall(), expected)
+
+    def test_trailing_line_comment(self):
+        query, _ = limit_query('SELECT * FROM people -- active only', 10, 'mysql')
+        self.assertEqual(query, f"SELECT * FROM (SELECT * FROM people -- active only\n) limited_rows LIMIT :{ROW_LIMIT_PARAM}")
+
+    def test_statement_text_independent_of_limit(self):
+        first, first_params = limit_query('SELECT * FROM people', 10, 'postgresql')
+        second, second_params = limit_query('SELECT * FROM people', 500, 'postgresql')
+        self.assertEqual(first, second)
+        self.assertEqual((first_params[ROW_LIMIT_PARAM], second_params[ROW_LIMIT_PARAM]), (10, 500))
+
+    def test_params_are_copied(self):
+        params = {'dept': 'IT'}
+        _, limited_params = limit_query('SELECT * FROM people WHERE dept = :dept', 10, 'postgresql', params)
+        self.assertEqual(params, {'dept': 'IT'})
+        self.assertIsNot(limited_params, params)
+
+    def test_no_limit(self):
+        source = ' SELECT * FROM people; '
+        for max_rows in (0, -1, None):
+            with self.subTest(max_rows=max_rows):
+                params = {'dept': 'IT'}
+                query, limited_params = limit_query(source, max_rows, 'postgresql', params)
+                self.assertEqual(query, source)
+                self.assertEqual(limited_params, params)
+                self.assertIsNot(limited_params, params)
+
+    def test_other_statements_unchanged(self):
+        for source in (
+            "UPDATE people SET dept = 'IT'",
+            "INSERT INTO people VALUES (1, 'IT')",
+            "DELETE FROM people",
+            "EXEC refresh_people",
+        ):
+            with self.subTest(query=source):
+                self.assertEqual(limit_query(source, 10, 'postgresql'), (source, {}))
+
+    def test_leading_comments(self):
+        query, _ = limit_query('/* report */\n-- people\nSELECT * FROM people', 10, 'postgresql')
+        self.assertEqual(
+            query,
+            f"SELECT * FROM (/* report */\n-- people\nSELECT * FROM people) limited_rows LIMIT :{ROW_LIMIT_PARAM}"
+        )
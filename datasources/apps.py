@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class DatasourcesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'datasources'
+
+    def ready(self):
+        # Connect signals
+        from django.db.models.signals import post_save, post_delete
+        from datasources.connection_models import DatabaseConnection, invalidate_connection_pool
+        
+        # Drop pooled connections when a connection's settings change
+        post_save.connect(invalidate_connection_pool, sender=DatabaseConnection)
+        post_delete.connect(invalidate_connection_pool, sender=DatabaseConnection)
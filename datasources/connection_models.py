@@ -4,6 +4,9 @@ from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 from django.conf import settings
 from core.utils.encryption import encrypt_credentials, decrypt_credentials
+import logging
+
+logger = logging.getLogger(__name__)
 
 class DatabaseConnection(models.Model):
     """
@@ -38,6 +41,9 @@ class DatabaseConnection(models.Model):
     oracle_sid = models.CharField(_('Oracle SID'), max_length=255, blank=True,
                                help_text=_('System identifier for Oracle connection'))
     
+    dbapi_driver = models.CharField(_('DB-API Driver'), max_length=100, blank=True,
+                                 help_text=_('Python DB-API module for other databases, e.g. pymssql'))
+    
     # Connection options
     use_ssl = models.BooleanField(_('Use SSL'), default=False)
     ssl_cert_path = models.CharField(_('SSL Certificate Path'), max_length=255, blank=True)
@@ -76,19 +82,16 @@ class DatabaseConnection(models.Model):
             Dictionary with connection parameters
         """
         connection_info = {
+            'connection_id': self.pk,
             'type': self.db_type,
             'host': self.host,
             'port': self.port,
             'database': self.database_name,
             'schema': self.schema,
             'user': self.username,
+            'fetch_size': self.fetch_size,
         }
         
-        # Debug the credentials structure
-        print("Credentials structure:", type(self.credentials))
-        if self.credentials:
-            print("Credentials keys:", self.credentials.keys() if isinstance(self.credentials, dict) else "Not a dict")
-        
         # Add password from credentials if available
         password_found = False
         if self.credentials and isinstance(self.credentials, dict):
@@ -100,24 +103,26 @@ class DatabaseConnection(models.Model):
                     decrypted_creds = decrypt_credentials(encrypted_creds)
                     if decrypted_creds and isinstance(decrypted_creds, dict) and 'password' in decrypted_creds:
                         connection_info['password'] = decrypted_creds['password']
-                        print("Password retrieved from encrypted credentials")
+                        logger.debug("Password retrieved from encrypted credentials")
                         password_found = True
                 except Exception as e:
-                    print(f"Error decrypting credentials: {str(e)}")
-                    import traceback
-                    print(traceback.format_exc())
+                    logger.error(f"Error decrypting credentials of connection {self.name}: {str(e)}")
             
             # Fall back to direct password storage (legacy support)
             if not password_found and 'password' in self.credentials:
                 connection_info['password'] = self.credentials.get('password')
-                print("Password retrieved from direct credentials")
+                logger.debug("Password retrieved from direct credentials")
                 password_found = True
         
         # If no password found and this is a development environment, use a default
         if not password_found and hasattr(settings, 'DEBUG') and settings.DEBUG:
-            print("WARNING: Using default password for development")
+            logger.warning("Using default password for development")
             connection_info['password'] = 'dev_password'  # Only for development!
         
+        # Other databases are reached through their DB-API driver module
+        if self.db_type == 'other':
+            connection_info['driver'] = self.dbapi_driver
+        
         # Add Oracle-specific parameters
         if self.db_type == 'oracle':
             if self.oracle_service_name:
@@ -132,13 +137,6 @@ class DatabaseConnection(models.Model):
             if self.ssl_cert_path:
                 connection_info['ssl_cert'] = self.ssl_cert_path
         
-        # Debug output
-        safe_info = connection_info.copy()
-        if 'password' in safe_info:
-            safe_info['password'] = '******'
-        print("Connection info:", safe_info)
-        print("Password included:", 'password' in connection_info)
-        
         return connection_info
     
     def test_connection(self):
@@ -153,4 +151,13 @@ class DatabaseConnection(models.Model):
             connector = get_connector(self.get_connection_info())
             return connector.test_connection()
         except Exception as e:
-            return False, str(e)
\ No newline at end of file
+            return False, str(e)
+
+
+def invalidate_connection_pool(sender, instance, **kwargs):
+    """
+    Signal handler closing the pooled connections of an edited or deleted
+    database connection, so its new settings are used from the next query on.
+    """
+    from core.database import invalidate_pool
+    invalidate_pool(instance.pk)
\ No newline at end of file
@@ -13,9 +13,14 @@ import ssl
 
 from ..models import DataSource, DataSourceField, DataSourceSync
 from ..active_directory_models import ActiveDirectoryDataSource, ADSync
+from ..pipeline import RecordPipeline
+from ..sharding import integrate_shard
 
 logger = logging.getLogger(__name__)
 
+# Leading sAMAccountName characters sharded syncs split the directory on
+SHARD_PREFIX_CHARACTERS = 'abcdefghijklmnopqrstuvwxyz0123456789'
+
 class ADConnector:
     """
     Connector for Active Directory data sources via LDAP.
@@ -268,20 +273,21 @@ class ADConnector:
         # Default to text
         return 'text'
     
-    def sync_data(self, triggered_by=None, skip_profile_integration=False):
+    def sync_data(self, triggered_by=None, skip_profile_integration=False, sync=None):
         """
         Synchronize data from Active Directory.
         
         Args:
             triggered_by: User who triggered the sync
             skip_profile_integration: Boolean to skip profile integration (for debugging)
+            sync: Optional running DataSourceSync to report into instead of creating one
             
         Returns:
             Sync record
         """
         # Create sync record
         if self.datasource:
-            datasource_sync = DataSourceSync.objects.create(
+            datasource_sync = sync or DataSourceSync.objects.create(
                 datasource=self.datasource,
                 triggered_by=triggered_by,
                 status='running'
@@ -364,9 +370,6 @@ class ADConnector:
             updated_users = 0
             deleted_users = 0
             
-            # Track object IDs for later deletion detection
-            synced_object_ids = []
-            
             # Search for users with paged results to handle large directories
             try:
                 logger.info(f"Executing LDAP search with filter: {user_filter}")
@@ -383,107 +386,53 @@ class ADConnector:
                 logger.error(f"Error executing LDAP search: {str(search_error)}")
                 raise Exception(f"LDAP search failed: {str(search_error)}")
             
-            # Process each user
-            for entry in entry_generator:
+            def normalize(entry):
                 if 'attributes' not in entry:
-                    continue
+                    return None
+                normalized_data, object_id = self._entry_to_record(entry, include_groups, include_nested_groups)
+                return normalized_data, str(object_id) if object_id else None
+            
+            # Process each user
+            pipeline = None
+            if profile_service:
+                def update_progress(stats):
+                    # Update sync status after every batch
+                    self.sync.users_processed = stats.records_processed
+                    self.sync.users_created = stats.records_created
+                    self.sync.users_updated = stats.records_updated
+                    self.sync.save(update_fields=['users_processed', 'users_created', 'users_updated'])
+                    logger.info(f"Processed {stats.records_processed} users so far ({stats.records_created} created, {stats.records_updated} updated)")
                 
-                try:
-                    # Extract user data
-                    user_data = entry['attributes']
-                    
-                    # Add DN
-                    user_data['distinguishedName'] = entry['dn']
-                    
-                    # Generate a record ID for tracking
-                    object_id = user_data.get('objectGUID', None)
-                    if object_id:
-                        # Convert binary GUID to string if needed
-                        if isinstance(object_id, bytes):
-                            import uuid
-                            object_id = str(uuid.UUID(bytes_le=object_id))
-                        elif isinstance(object_id, list) and object_id and isinstance(object_id[0], bytes):
-                            import uuid
-                            object_id = str(uuid.UUID(bytes_le=object_id[0]))
-                    
-                    # Use sAMAccountName as fallback
-                    if not object_id:
-                        object_id = user_data.get('sAMAccountName', '')
-                        if isinstance(object_id, list) and object_id:
-                            object_id = object_id[0]
-                    
-                    if object_id:
-                        synced_object_ids.append(str(object_id))
-                    
-                    # Normalize data
-                    normalized_data = self._normalize_ldap_data(user_data)
-                    
-                    # Find group memberships if requested
-                    if include_groups and 'memberOf' in normalized_data:
-                        group_dns = normalized_data['memberOf']
-                        if isinstance(group_dns, str):
-                            group_dns = [group_dns]
-                        
-                        # Get group names
-                        normalized_data['groupNames'] = []
-                        for group_dn in group_dns:
-                            # Extract CN from DN
-                            if group_dn.startswith('CN='):
-                                group_name = group_dn.split(',')[0][3:]
-                                normalized_data['groupNames'].append(group_name)
-                        
-                        # If nested groups are enabled, we could expand them here
-                        if include_nested_groups and group_dns:
-                            logger.debug(f"Processing nested groups for user with ID {object_id}")
-                            # This would require additional LDAP queries to find parent groups
-                            # Implementation would depend on your specific needs
-                    
-                    # Process the record through profile integration if available
-                    if profile_service:
-                        try:
-                            logger.debug(f"Processing user with ID {object_id} through profile integration")
-                            person, created, changes = profile_service.process_record(normalized_data, str(object_id))
-                            
-                            if created:
-                                created_users += 1
-                                logger.debug(f"Created new profile for user with ID {object_id}")
-                            elif changes > 0:
-                                updated_users += 1
-                                logger.debug(f"Updated profile for user with ID {object_id} with {changes} changes")
-                        except Exception as profile_error:
-                            logger.error(f"Error processing user with ID {object_id} through profile integration: {str(profile_error)}")
-                            # Continue with next user
-                    else:
-                        # Just count the record if no profile integration
-                        logger.debug(f"Counted user with ID {object_id} (no profile integration)")
+                # Stream the entries through profile integration in batches, staging
+                # object IDs only when deleted objects have to be detected
+                pipeline = RecordPipeline(
+                    self.datasource,
+                    datasource_sync,
+                    normalize=normalize,
+                    track_record_ids=sync_deleted,
+                    profile_service=profile_service,
+                    on_batch=update_progress
+                )
+                stats = pipeline.run(entry_generator)
+                total_users = stats.records_processed
+                created_users = stats.records_created
+                updated_users = stats.records_updated
+            else:
+                # Just count the records if no profile integration
+                for entry in entry_generator:
+                    if 'attributes' in entry:
                         total_users += 1
-                    
-                    # Update sync status periodically
-                    if (created_users + updated_users) % 100 == 0:
-                        self.sync.users_processed = total_users
-                        self.sync.users_created = created_users
-                        self.sync.users_updated = updated_users
-                        self.sync.save(update_fields=['users_processed', 'users_created', 'users_updated'])
-                        logger.info(f"Processed {total_users} users so far ({created_users} created, {updated_users} updated)")
-                
-                except Exception as e:
-                    logger.error(f"Error processing user entry: {str(e)}")
-                    # Continue with next entry to make sync as robust as possible
             
             # Handle deleted objects if requested
-            if sync_deleted and profile_service and synced_object_ids:
+            if sync_deleted and pipeline:
                 try:
-                    logger.info(f"Removing attributes from profiles not in current dataset ({len(synced_object_ids)} objects processed)")
-                    deleted_count = profile_service.remove_missing_attributes(synced_object_ids)
+                    logger.info(f"Removing attributes from profiles not in current dataset ({pipeline.stats.records_staged} objects processed)")
+                    deleted_count = pipeline.remove_missing_attributes()
                     deleted_users = deleted_count
                     logger.info(f"Removed {deleted_count} attributes from profiles not in current dataset")
                 except Exception as cleanup_error:
                     logger.error(f"Error cleaning up missing attributes: {str(cleanup_error)}")
             
-            # Get final count if we haven't been tracking through profile service
-            if profile_service is None:
-                total_users = created_users + updated_users
-            
             # Update sync stats
             self.sync.users_processed = total_users or created_users + updated_users
             self.sync.users_created = created_users
@@ -496,6 +445,8 @@ class ADConnector:
             datasource_sync.records_created = created_users
             datasource_sync.records_updated = updated_users
             datasource_sync.records_deleted = deleted_users
+            if pipeline:
+                datasource_sync.records_skipped = pipeline.stats.records_skipped
             datasource_sync.complete(status='success')
             
             # Update datasource
@@ -533,6 +484,133 @@ class ADConnector:
                 finally:
                     self._connection = None
     
+    def _entry_to_record(self, entry, include_groups=True, include_nested_groups=True):
+        """
+        Turn an LDAP search entry into (normalized_data, object_id).
+        The object ID is the objectGUID, falling back to the sAMAccountName.
+        """
+        # Extract user data
+        user_data = entry['attributes']
+        
+        # Add DN
+        user_data['distinguishedName'] = entry['dn']
+        
+        # Generate a record ID for tracking
+        object_id = user_data.get('objectGUID', None)
+        if object_id:
+            # Convert binary GUID to string if needed
+            if isinstance(object_id, bytes):
+                import uuid
+                object_id = str(uuid.UUID(bytes_le=object_id))
+            elif isinstance(object_id, list) and object_id and isinstance(object_id[0], bytes):
+                import uuid
+                object_id = str(uuid.UUID(bytes_le=object_id[0]))
+        
+        # Use sAMAccountName as fallback
+        if not object_id:
+            object_id = user_data.get('sAMAccountName', '')
+            if isinstance(object_id, list) and object_id:
+                object_id = object_id[0]
+        
+        # Normalize data
+        normalized_data = self._normalize_ldap_data(user_data)
+        
+        # Find group memberships if requested
+        if include_groups and 'memberOf' in normalized_data:
+            group_dns = normalized_data['memberOf']
+            if isinstance(group_dns, str):
+                group_dns = [group_dns]
+            
+            # Get group names
+            normalized_data['groupNames'] = []
+            for group_dn in group_dns:
+                # Extract CN from DN
+                if group_dn.startswith('CN='):
+                    group_name = group_dn.split(',')[0][3:]
+                    normalized_data['groupNames'].append(group_name)
+            
+            # If nested groups are enabled, we could expand them here
+            if include_nested_groups and group_dns:
+                logger.debug(f"Processing nested groups for user with ID {object_id}")
+                # This would require additional LDAP queries to find parent groups
+                # Implementation would depend on your specific needs
+        
+        return normalized_data, object_id
+    
+    def plan_shards(self, shard_count):
+        """
+        Split the user search into shards by the first character of sAMAccountName.
+        
+        LDAP paging cookies are bound to one connection, so shards cannot share
+        a paged search. Each shard instead runs its own paged search with the
+        user filter narrowed to a range of leading characters, and a last shard
+        catches accounts starting with any other character.
+        """
+        if shard_count < 2:
+            return []
+        
+        groups = [[] for _ in range(shard_count - 1)]
+        for i, char in enumerate(SHARD_PREFIX_CHARACTERS):
+            groups[i * len(groups) // len(SHARD_PREFIX_CHARACTERS)].append(char)
+        
+        shards = [{'prefixes': group} for group in groups if group]
+        shards.append({'prefixes': list(SHARD_PREFIX_CHARACTERS), 'exclude': True})
+        return shards
+    
+    def sync_shard(self, shard, sync, stage=None):
+        """
+        Run the users of one shard planned by plan_shards through profile integration.
+        Record IDs are only staged when deleted objects are synced.
+        """
+        conn = self._get_connection()
+        try:
+            if not conn.bind():
+                raise Exception(f"Failed to bind: {conn.result}")
+            
+            user_filter = self.config.get('user_filter', '(&(objectClass=user)(objectCategory=person))')
+            prefix_filter = '(|' + ''.join(f'(sAMAccountName={char}*)' for char in shard['prefixes']) + ')'
+            if shard.get('exclude'):
+                prefix_filter = f'(!{prefix_filter})'
+            
+            user_attributes = self.config.get('user_attributes', []) or ALL_ATTRIBUTES
+            search_scope = {
+                'base': BASE,
+                'level': LEVEL,
+                'subtree': SUBTREE
+            }.get(self.config.get('search_scope', 'subtree'), SUBTREE)
+            
+            entry_generator = conn.extend.standard.paged_search(
+                search_base=self.config.get('base_dn', ''),
+                search_filter=f'(&{user_filter}{prefix_filter})',
+                search_scope=search_scope,
+                attributes=user_attributes,
+                paged_size=self.config.get('page_size', 1000),
+                generator=True
+            )
+            
+            include_groups = self.config.get('include_groups', True)
+            include_nested_groups = self.config.get('include_nested_groups', True)
+            
+            def records():
+                for entry in entry_generator:
+                    if 'attributes' not in entry:
+                        continue
+                    normalized_data, object_id = self._entry_to_record(entry, include_groups, include_nested_groups)
+                    yield normalized_data, str(object_id) if object_id else ''
+            
+            if not self.config.get('sync_deleted', False):
+                stage = None
+            return integrate_shard(self.datasource, sync, records(), stage)
+        finally:
+            # Each shard binds its own connection, so close it once the shard is done
+            if self._connection and self._connection.bound:
+                try:
+                    self._connection.unbind()
+                except Exception as conn_error:
+                    logger.warning(f"Error closing LDAP connection: {str(conn_error)}")
+                finally:
+                    self._connection = None
+    
     def _normalize_ldap_data(self, data):
         """
         Normalize LDAP data for integration.
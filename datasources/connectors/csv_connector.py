@@ -1,18 +1,194 @@
 # datasources/connectors/csv_connector.py
 import os
+import io
 import csv
 import codecs
-from datetime import datetime
+import itertools
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import logging
+from django.conf import settings
 from django.utils import timezone
+from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
 from django.db import transaction
 
 from ..models import DataSource, DataSourceField, DataSourceSync
 from ..csv_models import CSVDataSource, CSVFileUpload
+from ..csv_scan import scan_csv
+from ..csv_compression import detect_compression, open_text
+from ..type_inference import infer_column_types
+from ..csv_digest import CSVRowDiff, dump_digest_index, index_signature, load_digest_index
+from ..pipeline import RecordPipeline
+from ..sharding import integrate_shard
 
 logger = logging.getLogger(__name__)
 
+# Size of the byte ranges parsed by each worker in parallel parse mode
+PARSE_CHUNK_SIZE = 16 << 20
+
+
+def find_record_boundaries(file_path, quote_char, skip_records, targets, block_size=1 << 20):
+    """
+    Find where CSV records start in a file, without parsing it.
+    
+    A newline ends a record only when an even number of quote characters
+    precedes it, so records with quoted newlines are never split. Only the
+    blocks containing a target are scanned line by line; the rest of the
+    file just has its quotes counted.
+    
+    Args:
+        file_path: Path of the CSV file
+        quote_char: CSV quote character
+        skip_records: Number of leading records (header, skipped rows) before the data
+        targets: Byte offsets to find the next record start at or after
+    
+    Returns:
+        Tuple of (data_start, boundaries): the offset of the first data record
+        and the sorted record start offsets found for the targets
+    """
+    quote = quote_char.encode('ascii') if quote_char else b''
+    pending = sorted(targets)
+    boundaries = []
+    data_start = 0 if skip_records == 0 else None
+    in_quotes = False
+    position = 0
+    
+    with open(file_path, 'rb') as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            
+            # Quotes before cursor are already accounted for in in_quotes
+            cursor = 0
+            while True:
+                if data_start is None:
+                    want = cursor
+                elif pending and pending[0] < position + len(block):
+                    want = max(cursor, pending[0] - position)
+                else:
+                    break
+                
+                newline = block.find(b'\n', want)
+                if newline == -1:
+                    break
+                if quote and block.count(quote, cursor, newline) % 2:
+                    in_quotes = not in_quotes
+                cursor = newline + 1
+                if in_quotes:
+                    continue
+                
+                offset = position + cursor
+                if data_start is None:
+                    skip_records -= 1
+                    if skip_records == 0:
+                        data_start = offset
+                    continue
+                
+                while pending and pending[0] < offset:
+                    pending.pop(0)
+                if offset > data_start and (not boundaries or offset > boundaries[-1]):
+                    boundaries.append(offset)
+            
+            if quote and block.count(quote, cursor) % 2:
+                in_quotes = not in_quotes
+            position += len(block)
+    
+    if data_start is None:
+        data_start = position
+    return data_start, [offset for offset in boundaries if offset < position]
+
+
+# Separators of the packed rows a worker sends back, see _parse_byte_range
+_ROW_SEPARATOR = '\x1e'
+_FIELD_SEPARATOR = '\x1f'
+
+
+def _parse_byte_range(file_path, start, end, encoding, delimiter, quote_char):
+    """
+    Parse the CSV records in a byte range of a file. Runs in a worker process.
+    
+    Pickling lists of rows back to the parent costs several times more than
+    parsing them, so rows are returned packed into one string, joined with
+    the ASCII record and unit separators, which the parent splits again.
+    Ranges whose data contains those characters, or rows packing ambiguously,
+    are returned as a list of rows instead.
+    
+    Returns:
+        Tuple of (packed, rows), one of which is None
+    """
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        text = f.read(end - start).decode(encoding)
+    
+    def parse():
+        return csv.reader(io.StringIO(text, newline=''), delimiter=delimiter, quotechar=quote_char)
+    
+    if _ROW_SEPARATOR in text or _FIELD_SEPARATOR in text:
+        return None, list(parse())
+    
+    # Only strings are kept, as holding many row lists triggers costly garbage collections
+    lines = []
+    for row in parse():
+        if len(row) < 2 and (not row or not row[0]):
+            # [] and [''] would both pack to ''
+            return None, list(parse())
+        lines.append(_FIELD_SEPARATOR.join(row))
+    return _ROW_SEPARATOR.join(lines), None
+
+
+def _unpack_rows(result):
+    packed, rows = result
+    if packed is None:
+        yield from rows
+    elif packed:
+        for line in packed.split(_ROW_SEPARATOR):
+            yield line.split(_FIELD_SEPARATOR)
+
+
+def iter_parallel_rows(file_path, encoding, delimiter, quote_char, skip_records, workers, chunk_size=PARSE_CHUNK_SIZE):
+    """
+    Parse a CSV file in a pool of processes and yield its rows in file order.
+    
+    The file is cut into byte ranges of about chunk_size that start and end
+    on record boundaries (see find_record_boundaries), so quoted newlines are
+    never split. Each range is decoded and parsed in one go by a worker. At
+    most two ranges per worker are in flight, so a slow consumer holds back
+    the parsing instead of letting parsed rows pile up in memory.
+    
+    Args:
+        file_path: Path of the CSV file
+        encoding: Character encoding, which must keep quotes and newlines single bytes
+        delimiter: CSV delimiter
+        quote_char: CSV quote character
+        skip_records: Number of leading records (header, skipped rows) to skip
+        workers: Number of worker processes
+        chunk_size: Approximate size of the byte ranges in bytes
+    """
+    size = os.path.getsize(file_path)
+    data_start, boundaries = find_record_boundaries(
+        file_path, quote_char, skip_records, range(chunk_size, size, chunk_size)
+    )
+    ranges = zip([data_start] + boundaries, boundaries + [size])
+    
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        try:
+            for start, end in ranges:
+                if start >= end:
+                    continue
+                pending.append(pool.submit(_parse_byte_range, file_path, start, end, encoding, delimiter, quote_char))
+                if len(pending) >= workers * 2:
+                    yield from _unpack_rows(pending.popleft().result())
+            while pending:
+                yield from _unpack_rows(pending.popleft().result())
+        finally:
+            # The consumer may stop early, e.g. at max_rows
+            for future in pending:
+                future.cancel()
+
 class CSVConnector:
     """
     Connector for CSV data sources.
@@ -28,6 +204,7 @@ class CSVConnector:
             raise ValueError("CSV settings not found for this data source")
         
         self.sync = None
+        self._field_names = None
     
     def _get_file_path(self):
         """
@@ -50,119 +227,60 @@ class CSVConnector:
         else:
             raise ValueError(f"Unknown file location: {self.csv_settings.file_location}")
     
-    def detect_fields(self):
+    def scan_file(self, file_path=None):
+        """
+        Scan the CSV file once for its row count, header and a sample of rows.
         """
-        Auto-detect fields from CSV header or first data row.
+        return scan_csv(
+            file_path or self._get_file_path(),
+            encoding=self.csv_settings.encoding,
+            delimiter=self.csv_settings.delimiter,
+            quote_char=self.csv_settings.quote_char,
+            has_header=self.csv_settings.has_header,
+            skip_rows=self.csv_settings.skip_rows
+        )
+    
+    def detect_fields(self, scan=None):
+        """
+        Auto-detect fields from the CSV header, or name them by position if there is none.
+        Field types, nullability and type confidence are inferred from the sampled data rows.
         Returns a list of DataSourceField dictionaries.
         """
         try:
-            file_path = self._get_file_path()
-            fields = []
+            if scan is None:
+                scan = self.scan_file()
             
-            with codecs.open(file_path, 'r', encoding=self.csv_settings.encoding) as f:
-                reader = csv.reader(f, delimiter=self.csv_settings.delimiter, quotechar=self.csv_settings.quote_char)
-                
-                # Skip rows if needed
-                for _ in range(self.csv_settings.skip_rows):
-                    next(reader, None)
-                
-                # Read the header row if present, otherwise use the first data row
-                if self.csv_settings.has_header:
-                    header_row = next(reader, None)
-                    if not header_row:
-                        raise ValueError("CSV file is empty after skipping rows")
-                    
-                    # Create field entries from header names
-                    for i, name in enumerate(header_row):
-                        field_name = name.strip() or f"col_{i+1}"
-                        fields.append({
-                            'name': field_name,
-                            'display_name': field_name,
-                            'field_type': 'text',  # Default type, will be refined later
-                            'is_key': False,
-                            'is_nullable': True,
-                            'sample_data': ''
-                        })
-                    
-                    # Get first data row for samples
-                    sample_row = next(reader, None)
-                    if sample_row:
-                        for i, value in enumerate(sample_row):
-                            if i < len(fields):
-                                fields[i]['sample_data'] = value
-                                # Try to determine field type
-                                fields[i]['field_type'] = self._guess_field_type(value)
-                else:
-                    # No header, use first data row for field names and samples
-                    first_row = next(reader, None)
-                    if not first_row:
-                        raise ValueError("CSV file is empty after skipping rows")
-                    
-                    for i, value in enumerate(first_row):
-                        field_name = f"col_{i+1}"
-                        fields.append({
-                            'name': field_name,
-                            'display_name': field_name,
-                            'field_type': self._guess_field_type(value),
-                            'is_key': False,
-                            'is_nullable': True,
-                            'sample_data': value
-                        })
+            if scan.header is None and not scan.sample_rows:
+                raise ValueError("CSV file is empty after skipping rows")
+            
+            if scan.header is not None:
+                names = [name.strip() or f"col_{i+1}" for i, name in enumerate(scan.header)]
+            else:
+                names = [f"col_{i+1}" for i in range(len(scan.sample_rows[0]))]
+            
+            first_row = scan.sample_rows[0] if scan.sample_rows else []
+            column_types = infer_column_types(scan.sample_rows, range(len(names)))
+            fields = []
+            for i, (field_name, column_type) in enumerate(zip(names, column_types)):
+                fields.append({
+                    'name': field_name,
+                    'display_name': field_name,
+                    'field_type': column_type.field_type,
+                    'is_key': False,
+                    'is_nullable': column_type.is_nullable,
+                    'type_confidence': column_type.confidence,
+                    'sample_data': first_row[i] if i < len(first_row) else ''
+                })
             
             return fields
         except Exception as e:
             logger.error(f"Error detecting fields: {str(e)}")
             raise
     
-    def _guess_field_type(self, value):
-        """
-        Try to guess the field type from a sample value.
-        """
-        if not value or value.strip() == '':
-            return 'text'
-        
-        value = value.strip()
-        
-        # Check if boolean
-        if value.lower() in ['true', 'false', 'yes', 'no', 't', 'f', 'y', 'n', '1', '0']:
-            return 'boolean'
-        
-        # Check if integer
-        try:
-            int(value)
-            return 'integer'
-        except ValueError:
-            pass
-        
-        # Check if float
-        try:
-            float(value)
-            return 'float'
-        except ValueError:
-            pass
-        
-        # Check if date
-        for fmt in ['%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y', '%Y/%m/%d']:
-            try:
-                datetime.strptime(value, fmt)
-                return 'date'
-            except ValueError:
-                pass
-        
-        # Check if datetime
-        for fmt in ['%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%m/%d/%Y %H:%M:%S']:
-            try:
-                datetime.strptime(value, fmt)
-                return 'datetime'
-            except ValueError:
-                pass
-        
-        # Default to text
-        return 'text'
-    
     def process_upload(self, file_obj):
         """
-        Process a newly uploaded CSV file.
+        Process a newly uploaded CSV file. Compressed files (gzip, bz2, xz or
+        zip) are stored as uploaded and decompressed whenever they are read.
         """
         try:
             # Store the file
@@ -170,24 +288,15 @@ class CSVConnector:
             upload.file.save(file_obj.name, file_obj)
             upload.file_size = file_obj.size
             
-            # Count rows
-            row_count = 0
-            with codecs.open(upload.file.path, 'r', encoding=self.csv_settings.encoding) as f:
-                reader = csv.reader(f, delimiter=self.csv_settings.delimiter, quotechar=self.csv_settings.quote_char)
-                for _ in reader:
-                    row_count += 1
-            
-            # Adjust count if there's a header
-            if self.csv_settings.has_header and row_count > 0:
-                row_count -= 1
-            
-            upload.row_count = row_count
+            # Count rows and sample them for field detection in a single pass
+            scan = self.scan_file(upload.file.path)
+            upload.row_count = scan.row_count
             upload.save()
             
             # If this is the first upload, try to detect fields
             if self.datasource.fields.count() == 0:
                 try:
-                    detected_fields = self.detect_fields()
+                    detected_fields = self.detect_fields(scan)
                     with transaction.atomic():
                         for field_dict in detected_fields:
                             DataSourceField.objects.create(
@@ -202,50 +311,269 @@ class CSVConnector:
             logger.error(f"Error processing upload: {str(e)}")
             raise
     
-    def sync_data(self, triggered_by=None):
+    def plan_shards(self, shard_count):
         """
-        Synchronize data from the CSV file.
-        In a real implementation, this would process the data and store it.
-        For this example, we'll just simulate counting records.
+        Split the CSV file into byte ranges of whole records, one per shard.
+        Files that cannot be split safely are synced as a single shard.
         """
-        try:
-            # Create sync record
-            self.sync = DataSourceSync.objects.create(
-                datasource=self.datasource,
-                triggered_by=triggered_by,
-                status='running'
+        file_path = self._get_file_path()
+        if shard_count < 2 or self.csv_settings.max_rows or not self._is_byte_splittable(file_path):
+            return [{'path': file_path}]
+        if self.csv_settings.incremental_sync:
+            # The diff against the previous file needs a single pass over all rows
+            return [{'path': file_path}]
+        if self.csv_settings.digest_index:
+            # A full sync outdates the index of any earlier incremental sync
+            self._save_digest_index(None)
+        
+        size = os.path.getsize(file_path)
+        skip_records = self.csv_settings.skip_rows + (1 if self.csv_settings.has_header else 0)
+        data_start, boundaries = find_record_boundaries(
+            file_path,
+            self.csv_settings.quote_char,
+            skip_records,
+            [size * i // shard_count for i in range(1, shard_count)]
+        )
+        
+        starts = [data_start] + boundaries
+        ends = boundaries + [size]
+        return [{'path': file_path, 'start': start, 'end': end} for start, end in zip(starts, ends)]
+    
+    def sync_shard(self, shard, sync, stage=None):
+        """
+        Run the records of one shard planned by plan_shards through profile integration.
+        """
+        return integrate_shard(self.datasource, sync, self._iter_shard_records(shard), stage)
+    
+    def _is_byte_splittable(self, file_path):
+        """
+        Whether quote and newline bytes can be found without decoding, which
+        rules out UTF-16 and UTF-32 files, and at byte offsets of the file
+        itself, which rules out compressed files.
+        """
+        encoding = codecs.lookup(self.csv_settings.encoding).name
+        if encoding.startswith(('utf-16', 'utf-32')):
+            return False
+        return detect_compression(file_path) is None
+    
+    def _iter_shard_records(self, shard):
+        """
+        Yield (record_data, record_id) tuples for the rows of a shard.
+        """
+        for row in self._iter_shard_rows(shard):
+            yield self._normalize_row(row)
+    
+    def _get_field_names(self):
+        if self._field_names is None:
+            self._field_names = list(
+                DataSourceField.objects.filter(datasource=self.datasource).order_by('id').values_list('name', flat=True)
             )
-            
-            file_path = self._get_file_path()
-            
-            # Read and count rows
-            with codecs.open(file_path, 'r', encoding=self.csv_settings.encoding) as f:
-                reader = csv.reader(f, delimiter=self.csv_settings.delimiter, quotechar=self.csv_settings.quote_char)
+        return self._field_names
+    
+    def _digest_signature(self):
+        """
+        Signature of the settings and field mappings that decide how rows become profile attributes.
+        """
+        from users.profile_integration import ProfileFieldMapping
+        mappings = list(
+            ProfileFieldMapping.objects.filter(datasource=self.datasource).order_by('id').values_list(
+                'id', 'source_field_id', 'profile_attribute', 'is_key_field', 'transformation_logic'
+            )
+        )
+        csv_settings = self.csv_settings
+        return index_signature(
+            csv_settings.delimiter, csv_settings.quote_char, csv_settings.encoding, csv_settings.has_header,
+            csv_settings.skip_rows, csv_settings.max_rows, self._get_field_names(), mappings
+        )
+    
+    def _get_row_diff(self):
+        """
+        Get the diff against the previous file for an incremental sync, or None for a full sync.
+        """
+        if not self.csv_settings.incremental_sync:
+            return None
+        
+        field_names = self._get_field_names()
+        if 'id' not in field_names:
+            logger.warning(f"Data source {self.datasource.name} has no id field, running a full sync instead of an incremental one")
+            return None
+        
+        previous = None
+        if self.csv_settings.digest_index:
+            try:
+                with self.csv_settings.digest_index.open('rb') as f:
+                    previous = load_digest_index(f.read(), self._digest_signature())
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not read digest index of {self.datasource.name}: {str(e)}")
+        
+        return CSVRowDiff(previous, field_names.index('id'))
+    
+    def _save_digest_index(self, index):
+        """
+        Store the digest index of the file just synced, or drop the stored one if index is None.
+        """
+        if self.csv_settings.digest_index:
+            self.csv_settings.digest_index.delete(save=False)
+        
+        if index is not None:
+            data = dump_digest_index(index, self._digest_signature())
+            self.csv_settings.digest_index.save(f'{self.datasource.pk}.idx', ContentFile(data), save=False)
+        
+        self.csv_settings.save(update_fields=['digest_index'])
+    
+    def _normalize_row(self, row):
+        """
+        Map a CSV row to (record_data, record_id), pairing columns with the
+        data source fields by position.
+        """
+        record_data = dict(zip(self._get_field_names(), row))
+        return record_data, record_data.get('id', '')
+    
+    def _iter_file_rows(self, file_path):
+        """
+        Yield the CSV rows of the whole file, parsing it in parallel when it is
+        large enough and CSV_PARSE_WORKERS allows more than one process.
+        """
+        workers = getattr(settings, 'CSV_PARSE_WORKERS', 1)
+        min_size = getattr(settings, 'CSV_PARALLEL_PARSE_MIN_SIZE', 64 << 20)
+        
+        if workers > 1 and self._is_byte_splittable(file_path) and os.path.getsize(file_path) >= min_size:
+            if multiprocessing.current_process().daemon:
+                # Daemonic processes, such as prefork pool workers, cannot start child processes
+                logger.warning("Parallel CSV parsing is unavailable in a daemonic process, parsing serially")
+            else:
+                skip_records = self.csv_settings.skip_rows + (1 if self.csv_settings.has_header else 0)
+                rows = iter_parallel_rows(
+                    file_path,
+                    self.csv_settings.encoding,
+                    self.csv_settings.delimiter,
+                    self.csv_settings.quote_char,
+                    skip_records,
+                    workers
+                )
+                if self.csv_settings.max_rows:
+                    rows = itertools.islice(rows, self.csv_settings.max_rows)
+                return rows
+        
+        return self._iter_shard_rows({'path': file_path})
+    
+    def _iter_shard_rows(self, shard):
+        """
+        Yield the CSV rows of a shard, or of the whole file if the shard has no byte range.
+        """
+        delimiter = self.csv_settings.delimiter
+        quote_char = self.csv_settings.quote_char
+        
+        if shard.get('start') is None:
+            # Compressed files are decompressed as they are parsed
+            with open_text(shard['path'], self.csv_settings.encoding) as f:
+                reader = csv.reader(f, delimiter=delimiter, quotechar=quote_char)
                 
-                # Skip header if needed
                 if self.csv_settings.has_header:
                     next(reader, None)
-                
-                # Skip additional rows if configured
                 for _ in range(self.csv_settings.skip_rows):
                     next(reader, None)
                 
-                # Process rows
-                row_count = 0
                 max_rows = self.csv_settings.max_rows
-                
-                for row in reader:
-                    row_count += 1
-                    # Here you would actually process each row
-                    # For now, we're just counting
-                    
+                for row_count, row in enumerate(reader, 1):
+                    yield row
                     if max_rows and row_count >= max_rows:
                         break
+            return
+        
+        encoding = self.csv_settings.encoding
+        
+        def range_lines(f, remaining):
+            for line in f:
+                if remaining <= 0:
+                    break
+                remaining -= len(line)
+                yield line.decode(encoding)
+        
+        with open(shard['path'], 'rb') as f:
+            f.seek(shard['start'])
+            yield from csv.reader(range_lines(f, shard['end'] - shard['start']), delimiter=delimiter, quotechar=quote_char)
+    
+    def sync_data(self, triggered_by=None, sync=None):
+        """
+        Synchronize data from the CSV file through profile integration.
+        
+        The file is streamed through the record pipeline in fixed-size
+        batches, so memory use does not grow with the file size. Attributes
+        of records no longer in the file are removed afterwards.
+        
+        Args:
+            triggered_by: User who triggered the sync
+            sync: Optional running DataSourceSync to report into instead of creating one
+        """
+        try:
+            # Create sync record
+            self.sync = sync or DataSourceSync.objects.create(
+                datasource=self.datasource,
+                triggered_by=triggered_by,
+                status='running'
+            )
+            
+            file_path = self._get_file_path()
+            rows = self._iter_file_rows(file_path)
+            
+            diff = self._get_row_diff()
+            if diff is not None:
+                rows = diff.changed_rows(rows)
+            
+            # Without a previous index, what is missing can only be found from the seen record IDs
+            pipeline = RecordPipeline(
+                self.datasource,
+                self.sync,
+                normalize=self._normalize_row,
+                track_record_ids=diff is None or not diff.has_previous,
+                track_failures=diff is not None
+            )
+            stats = pipeline.run(rows)
+            
+            # Handle cleanup of missing records - in its own transaction
+            removed_count = 0
+            cleanup_error = None
+            try:
+                if diff is not None and diff.has_previous:
+                    removed_count = pipeline.profile_service.remove_record_attributes(diff.removed_keys)
+                else:
+                    removed_count = pipeline.remove_missing_attributes()
+            except Exception as e:
+                cleanup_error = f"Error cleaning up missing attributes: {str(e)}"
+                logger.error(cleanup_error)
             
             # Update sync record with results
-            self.sync.records_processed = row_count
-            self.sync.records_created = row_count  # Simplification
-            self.sync.complete(status='success')
+            self.sync.records_processed = stats.records_processed
+            self.sync.records_created = stats.records_created
+            self.sync.records_updated = stats.records_updated
+            self.sync.records_skipped = stats.records_skipped
+            self.sync.records_deleted = removed_count
+            if diff is not None:
+                self.sync.records_skipped += diff.unchanged
+                self.sync.rows_added = diff.added
+                self.sync.rows_changed = diff.changed
+                self.sync.rows_removed = len(diff.removed_keys)
+                logger.info(
+                    f"Incremental sync of {self.datasource.name}: {diff.added} rows added, "
+                    f"{diff.changed} changed, {len(diff.removed_keys)} removed, {diff.unchanged} unchanged"
+                )
+            
+            # The next sync diffs against this file, or a stale index is dropped.
+            # Rows that failed to integrate are synced again next time, and if
+            # the cleanup failed, only a full diff finds the removed rows again
+            if diff is not None and cleanup_error is None:
+                if pipeline.failed_record_ids:
+                    logger.warning(f"{len(pipeline.failed_record_ids)} rows of {self.datasource.name} failed to integrate and will be synced again")
+                diff.invalidate(pipeline.failed_record_ids)
+                self._save_digest_index(diff.index)
+            else:
+                self._save_digest_index(None)
+            
+            if cleanup_error:
+                self.sync.complete(status='warning', error_message=cleanup_error)
+            else:
+                self.sync.complete(status='success')
             
             # Update datasource
             self.datasource.update_last_sync()
@@ -8,18 +8,25 @@ leveraging the core database functionality.
 import logging
 import time
 from typing import Dict, Any, Optional, Tuple, List, Union
-import datetime
 
+from django.conf import settings
 from django.utils import timezone
 
-from core.database import get_connector, execute_query, execute_script
-from core.database.utils import validate_query, extract_query_type, extract_query_params
+from core.database import get_connector, execute_query, execute_script, stream_query, pooled_connector
+from core.database.utils import validate_query, extract_query_type, extract_query_params, limit_query
 
 from ..models import DataSource, DataSourceField, DataSourceSync
 from ..database_models import DatabaseDataSource, DatabaseQuery, DatabaseQueryExecution
+from ..keyset import KeysetPaginator, DEFAULT_CHUNK_SIZE, watermark_signature, encode_value, decode_value
+from ..pipeline import RecordPipeline
+from ..sharding import integrate_shard
+from ..type_inference import infer_column_types, reservoir_sample
 
 logger = logging.getLogger(__name__)
 
+# Rows fetched when detecting fields, sampled for type inference
+DETECTION_SAMPLE_ROWS = 1000
+
 class DatabaseConnector:
     """
     Connector for database data sources.
@@ -41,6 +48,15 @@ class DatabaseConnector:
         self.sync = None
         self._connection = None
         self._connector = None
+        self._connection_info = None
+    
+    def _get_connection_info(self):
+        """
+        Get the connection info, decrypting the credentials only once per connector.
+        """
+        if self._connection_info is None:
+            self._connection_info = self.db_settings.get_connection_info()
+        return self._connection_info
     
     def _get_connector(self):
         """
@@ -48,12 +64,7 @@ class DatabaseConnector:
         """
         if self._connector is None:
             # Get connection info
-            connection_info = self.db_settings.get_connection_info()
-            
-            # Debug output
-            print("Connection info for query (excluding password):", 
-                {k:v for k,v in connection_info.items() if k != 'password'})
-            print("Password present:", 'password' in connection_info)
+            connection_info = self._get_connection_info()
             
             # Get connector
             from core.database import get_connector
@@ -115,19 +126,9 @@ class DatabaseConnector:
                 if isinstance(results, dict):
                     raise ValueError("Query did not return tabular results")
                 
-                # Get field names from the first row
+                # Infer the field types from a sample of the rows
                 if results:
-                    first_row = results[0]
-                    for field_name, value in first_row.items():
-                        field_type = self._guess_field_type(value)
-                        fields.append({
-                            'name': field_name,
-                            'display_name': field_name.replace('_', ' ').title(),
-                            'field_type': field_type,
-                            'is_key': False,
-                            'is_nullable': True,
-                            'sample_data': str(value) if value is not None else ''
-                        })
+                    fields = self._fields_from_rows(results)
             
             elif table_name:
                 # Extract fields from table schema
@@ -153,54 +154,33 @@ class DatabaseConnector:
             logger.error(f"Error detecting fields: {str(e)}")
             raise
     
-    def _guess_field_type(self, value):
+    def _fields_from_rows(self, rows):
         """
-        Determine the field type based on the value.
+        Build field definitions from query result rows, inferring each column's
+        type, nullability and type confidence from a reservoir sample of the rows.
         
         Args:
-            value: Sample value to analyze
+            rows: Query result rows as dictionaries
             
         Returns:
-            Field type string
+            List of DataSourceField dictionaries
         """
-        if value is None:
-            return 'text'
-        
-        # Use type to determine field type
-        import datetime
-        
-        if isinstance(value, bool):
-            return 'boolean'
-        elif isinstance(value, int):
-            return 'integer'
-        elif isinstance(value, float):
-            return 'float'
-        elif isinstance(value, datetime.date):
-            if isinstance(value, datetime.datetime):
-                return 'datetime'
-            else:
-                return 'date'
-        
-        # If it's a string, try to detect if it might be a formatted date/datetime
-        if isinstance(value, str):
-            # Try various date formats
-            for fmt in ['%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y']:
-                try:
-                    datetime.datetime.strptime(value, fmt)
-                    return 'date'
-                except ValueError:
-                    pass
-            
-            # Try datetime formats
-            for fmt in ['%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%d/%m/%Y %H:%M:%S']:
-                try:
-                    datetime.datetime.strptime(value, fmt)
-                    return 'datetime'
-                except ValueError:
-                    pass
+        sample = reservoir_sample(rows, DETECTION_SAMPLE_ROWS)
+        first_row = rows[0]
+        column_types = infer_column_types(sample, list(first_row))
         
-        # Default to text for anything else
-        return 'text'
+        fields = []
+        for (field_name, value), column_type in zip(first_row.items(), column_types):
+            fields.append({
+                'name': field_name,
+                'display_name': field_name.replace('_', ' ').title(),
+                'field_type': column_type.field_type,
+                'is_key': False,  # Default to False, user can modify later
+                'is_nullable': column_type.is_nullable,
+                'type_confidence': column_type.confidence,
+                'sample_data': str(value) if value is not None else ''
+            })
+        return fields
     
     def _map_db_type_to_field_type(self, db_type: str) -> str:
         """
@@ -258,7 +238,6 @@ class DatabaseConnector:
         Returns:
             Tuple of (success, results, execution_record)
         """
-        connector = self._get_connector()
         execution_record = None
         
         # Create execution record if requested
@@ -281,10 +260,11 @@ class DatabaseConnector:
                     )
                 return False, None, execution_record
             
-            # Execute the query
+            # Execute the query on a pooled connection, so syncs running many
+            # queries reuse warm connections
             start_time = time.time()
             success, results, error = execute_query(
-                connector, 
+                self._get_connection_info(),
                 query, 
                 params,
                 timeout=self.db_settings.query_timeout
@@ -326,6 +306,64 @@ class DatabaseConnector:
             
             return False, None, execution_record
     
+    def stream_query(
+        self,
+        query: str,
+        params: Optional[Dict[str, Any]] = None,
+        create_execution_record: bool = True
+    ):
+        """
+        Execute a SELECT query and yield its rows one at a time, fetched in
+        batches of the connection's fetch size.
+        
+        Args:
+            query: SQL query to execute
+            params: Optional parameters for the query
+            create_execution_record: Whether to create an execution record
+            
+        Yields:
+            Result rows, as Row tuples that read like dictionaries
+            
+        Raises:
+            ValueError: If the query is invalid or fails
+        """
+        execution_record = None
+        if create_execution_record:
+            execution_record = DatabaseQueryExecution.objects.create(
+                database_datasource=self.db_settings,
+                query_text=query,
+                parameters=params or {},
+                status='running'
+            )
+        
+        is_valid, error = validate_query(query)
+        if not is_valid:
+            if execution_record:
+                execution_record.complete(status='failed', error_message=error)
+            raise ValueError(error)
+        
+        row_count = 0
+        try:
+            for rows in stream_query(
+                self._get_connection_info(),
+                query,
+                params,
+                fetch_size=self.db_settings.connection.fetch_size,
+                timeout=self.db_settings.query_timeout,
+                as_result_set=True
+            ):
+                row_count += len(rows)
+                yield from rows
+        except Exception as e:
+            error_message = f"Error executing query: {str(e)}"
+            logger.error(error_message)
+            if execution_record:
+                execution_record.complete(status='failed', rows_affected=row_count, error_message=error_message)
+            raise ValueError(error_message) from e
+        
+        if execution_record:
+            execution_record.complete(status='completed', rows_affected=row_count)
+    
     def execute_oracle_query(self, query_text, params=None):
         """
         Execute an Oracle-specific query with special handling for certain operations.
@@ -347,24 +385,21 @@ class DatabaseConnector:
         
         try:
             # Get connection info
-            connection_info = self.db_settings.get_connection_info()
-            
-            # Debug connection info
-            print("Oracle connection info keys:", connection_info.keys())
+            connection_info = dict(self._get_connection_info())
             
             # Ensure Oracle type is set
             connection_info['type'] = 'oracle'
             
             # If no password, try to get it from credentials directly
             if 'password' not in connection_info and hasattr(self.db_settings.connection, 'credentials'):
-                print("Trying to retrieve password directly from credentials")
+                logger.debug("Trying to retrieve password directly from credentials")
                 try:
                     creds = self.db_settings.connection.credentials
                     if isinstance(creds, dict):
                         # Try direct password
                         if 'password' in creds:
                             connection_info['password'] = creds['password']
-                            print("Found password in direct credentials")
+                            logger.debug("Found password in direct credentials")
                             
                         # Try encrypted credentials
                         elif 'encrypted_credentials' in creds:
@@ -372,20 +407,17 @@ class DatabaseConnector:
                             decrypted = decrypt_credentials(creds['encrypted_credentials'])
                             if isinstance(decrypted, dict) and 'password' in decrypted:
                                 connection_info['password'] = decrypted['password']
-                                print("Found password in encrypted credentials")
+                                logger.debug("Found password in encrypted credentials")
                 except Exception as e:
-                    print(f"Error retrieving password: {str(e)}")
-            
-            # Create Oracle connector directly
-            from core.database.oracle_connector import OracleConnector
-            connector = OracleConnector(connection_info)
-            
-            # Execute the query
-            success, results, error = connector.execute_query(
-                query_text, 
-                params,
-                timeout=self.db_settings.query_timeout
-            )
+                    logger.error(f"Error retrieving password: {str(e)}")
+            
+            # Execute the query on a pooled Oracle connection
+            with pooled_connector(connection_info) as connector:
+                success, results, error = connector.execute_query(
+                    query_text, 
+                    params,
+                    timeout=self.db_settings.query_timeout
+                )
             
             # Update execution record
             if success:
@@ -412,7 +444,7 @@ class DatabaseConnector:
         except Exception as e:
             import traceback
             error_message = f"Error executing Oracle query: {str(e)}\n{traceback.format_exc()}"
-            print(error_message)
+            logger.error(error_message)
             
             execution_record.complete(
                 status='failed',
@@ -452,18 +484,186 @@ class DatabaseConnector:
             logger.error(f"Error getting table schema: {str(e)}")
             return []
     
-    def sync_data(self, triggered_by=None):
+    def plan_shards(self, shard_count):
+        """
+        Split the sync into shards: ranges of the numeric 'id' column of the
+        default query, plus one shard for every other SELECT query.
+        
+        Data sources with non-SELECT queries or without a default query are
+        not split, as their queries have to run in order.
+        """
+        queries = list(DatabaseQuery.objects.filter(
+            database_datasource=self.db_settings,
+            is_enabled=True
+        ).order_by('-is_default', 'name'))
+        
+        if not queries or not queries[0].is_default:
+            return []
+        if any(query.query_type.lower() != 'select' for query in queries):
+            return []
+        if any(query.watermark_column for query in queries):
+            # Incremental queries read past a single stored position, in order
+            return []
+        
+        default_query = queries[0]
+        shards = []
+        id_range = self._get_id_range(default_query)
+        
+        if id_range and shard_count > 1:
+            low, high = id_range
+            step = max((high - low) // shard_count + 1, 1)
+            for shard_low in range(low, high + 1, step):
+                shards.append({'query_id': default_query.id, 'low': shard_low, 'high': shard_low + step})
+            # Leave the last range open so rows added since planning are not missed
+            shards[-1]['high'] = None
+        else:
+            shards.append({'query_id': default_query.id})
+        
+        shards.extend({'query_id': query.id} for query in queries[1:])
+        return shards
+    
+    def _get_id_range(self, query):
+        """
+        Get the (min, max) of the integer 'id' column returned by a query, or None.
+        """
+        query_text = query.query_text.strip().rstrip(';')
+        success, results, _ = self.execute_query(
+            f"SELECT MIN(shard_source.id) AS low_id, MAX(shard_source.id) AS high_id FROM ({query_text}) shard_source",
+            query.parameters,
+            create_execution_record=False
+        )
+        if not success or not results:
+            return None
+        
+        try:
+            low, high = list(results[0].values())
+            if low is None or high is None or int(low) != low or int(high) != high:
+                return None
+            return int(low), int(high)
+        except (TypeError, ValueError):
+            return None
+    
+    def sync_shard(self, shard, sync, stage=None):
+        """
+        Run the records of one shard planned by plan_shards through profile integration.
+        Only the default query stages record IDs, as only it is used to detect missing records.
+        """
+        query = DatabaseQuery.objects.get(pk=shard['query_id'], database_datasource=self.db_settings)
+        query_text = query.query_text
+        params = dict(query.parameters or {})
+        
+        if 'low' in shard:
+            query_text = f"SELECT * FROM ({query_text.strip().rstrip(';')}) shard_source WHERE shard_source.id >= :shard_low"
+            params['shard_low'] = shard['low']
+            if shard['high'] is not None:
+                query_text += " AND shard_source.id < :shard_high"
+                params['shard_high'] = shard['high']
+        
+        records = map(self._normalize_record, self.stream_query(query_text, params))
+        return integrate_shard(self.datasource, sync, records, stage if query.is_default else None)
+    
+    def _watermark_signature(self, query):
+        """
+        Signature of the query and field mappings a stored watermark was reached with.
+        """
+        from users.profile_integration import ProfileFieldMapping
+        mappings = list(
+            ProfileFieldMapping.objects.filter(datasource=self.datasource).order_by('id').values_list(
+                'id', 'source_field_id', 'profile_attribute', 'is_key_field', 'transformation_logic'
+            )
+        )
+        return watermark_signature(query.query_text, query.parameters, query.watermark_column, mappings)
+    
+    def _get_keyset_paginator(self, query):
+        """
+        Get the paginator that reads an incremental query past its stored
+        watermark, or None if the query has to be synced in full.
+        """
+        if not query.watermark_column:
+            return None
+        if not DataSourceField.objects.filter(datasource=self.datasource, name='id').exists():
+            logger.warning(f"Data source {self.datasource.name} has no id field, running query {query.name} in full instead of incrementally")
+            return None
+        
+        position = None
+        stored = query.watermark
+        if stored and stored.get('signature') == self._watermark_signature(query):
+            position = (decode_value(stored['watermark']), decode_value(stored['tie']))
+        elif stored:
+            # Rows synced under another query or mapping have to be synced again
+            logger.info(f"Query {query.name} or its field mappings changed, syncing it from the first row")
+        
+        return KeysetPaginator(
+            # The chunks are recorded as one execution, see _stream_paginated
+            lambda query_text, params: self.stream_query(query_text, params, create_execution_record=False),
+            query.query_text,
+            query.parameters,
+            query.watermark_column,
+            position=position,
+            chunk_size=getattr(settings, 'DATABASE_SYNC_CHUNK_SIZE', DEFAULT_CHUNK_SIZE),
+            limit_style='fetch' if self._get_connection_info().get('type') == 'oracle' else 'limit'
+        )
+    
+    def _stream_paginated(self, query, paginator):
+        """
+        Yield the rows of an incremental query, recording one execution for
+        all of its keyset chunks rather than one per chunk.
+        """
+        execution_record = DatabaseQueryExecution.objects.create(
+            query=query,
+            database_datasource=self.db_settings,
+            query_text=query.query_text,
+            parameters=query.parameters or {},
+            status='running'
+        )
+        
+        row_count = 0
+        try:
+            for row in paginator:
+                row_count += 1
+                yield row
+        except ValueError as e:
+            execution_record.complete(status='failed', rows_affected=row_count, error_message=str(e))
+            raise
+        
+        execution_record.complete(status='completed', rows_affected=row_count)
+    
+    def _save_watermark(self, query, paginator):
+        """
+        Store the position an incremental query was synced up to.
+        """
+        if paginator.position is None:
+            return
+        watermark, tie = paginator.position
+        query.watermark = {
+            'signature': self._watermark_signature(query),
+            'watermark': encode_value(watermark),
+            'tie': encode_value(tie),
+        }
+        query.save(update_fields=['watermark'])
+        logger.info(f"Query {query.name} synced up to {query.watermark_column} {watermark} in {paginator.chunks} chunks")
+    
+    @staticmethod
+    def _normalize_record(record):
+        """
+        Pair a query result row with its record ID, if the row has an 'id' column.
+        """
+        record_id = str(record.get('id', '')) if 'id' in record else None
+        return record, record_id
+    
+    def sync_data(self, triggered_by=None, sync=None):
         """
         Synchronize data from the database with user profile integration.
         
         Args:
             triggered_by: User who triggered the sync
+            sync: Optional running DataSourceSync to report into instead of creating one
             
         Returns:
             Sync record
         """
         # Create sync record
-        self.sync = DataSourceSync.objects.create(
+        self.sync = sync or DataSourceSync.objects.create(
             datasource=self.datasource,
             triggered_by=triggered_by,
             status='running'
@@ -495,48 +695,50 @@ class DatabaseConnector:
             # Execute each query
             for query in queries:
                 if query.query_type.lower() == 'select':
-                    # For SELECT queries, get the results and process them
-                    success, results, execution = self.execute_query(
-                        query.query_text,
-                        query.parameters,
-                        create_execution_record=True
+                    # For SELECT queries, stream the rows from a server-side cursor
+                    # through profile integration in batches, staging record IDs
+                    # for cleanup of the default query only. Incremental queries
+                    # only read rows past their watermark, in keyset chunks
+                    paginator = self._get_keyset_paginator(query)
+                    if paginator is not None:
+                        rows = self._stream_paginated(query, paginator)
+                    else:
+                        rows = self.stream_query(query.query_text, query.parameters)
+                    
+                    pipeline = RecordPipeline(
+                        self.datasource,
+                        self.sync,
+                        normalize=self._normalize_record,
+                        # Rows not returned by an incremental query are unchanged, not missing
+                        track_record_ids=query.is_default and paginator is None,
+                        profile_service=profile_service
                     )
+                    try:
+                        stats = pipeline.run(rows)
+                    except ValueError as query_error:
+                        # Keep what the failed query integrated, but skip its cleanup
+                        # as its record IDs are incomplete, and keep its watermark so
+                        # an incremental query resumes from the last completed sync
+                        logger.error(f"Query {query.name} failed: {str(query_error)}")
+                        created_count += pipeline.stats.records_created
+                        updated_count += pipeline.stats.records_updated
+                        total_records += pipeline.stats.records_processed
+                        continue
                     
-                    if success and results and isinstance(results, list):
-                        # Process each record through profile integration
-                        processed_records = 0
-                        record_ids = []
-                        
-                        for record in results:
-                            # Extract record ID if available (for identity resolution)
-                            record_id = str(record.get('id', '')) if 'id' in record else None
-                            if record_id:
-                                record_ids.append(record_id)
-                            
-                            # Process the record through profile integration - in its own transaction
-                            try:
-                                person, created, changes = profile_service.process_record(record, record_id)
-                                
-                                if created:
-                                    created_count += 1
-                                elif changes > 0:
-                                    updated_count += 1
-                                    
-                                processed_records += 1
-                            except Exception as row_error:
-                                logger.error(f"Error processing record: {str(row_error)}")
-                                # Continue with next record
-                        
-                        # If we have record IDs, handle cleanup of missing attributes
-                        if record_ids and query.is_default:  # Only do cleanup for default query
-                            try:
-                                removed_count = profile_service.remove_missing_attributes(record_ids)
-                                logger.info(f"Removed {removed_count} attributes from profiles not in current dataset")
-                            except Exception as cleanup_error:
-                                logger.error(f"Error cleaning up missing attributes: {str(cleanup_error)}")
-                        
-                        total_records += processed_records
-                        processed_queries += 1
+                    created_count += stats.records_created
+                    updated_count += stats.records_updated
+                    
+                    if paginator is not None:
+                        self._save_watermark(query, paginator)
+                    elif query.is_default and stats.records_processed:  # Only do cleanup for default query
+                        try:
+                            removed_count = pipeline.remove_missing_attributes()
+                            logger.info(f"Removed {removed_count} attributes from profiles not in current dataset")
+                        except Exception as cleanup_error:
+                            logger.error(f"Error cleaning up missing attributes: {str(cleanup_error)}")
+                    
+                    total_records += stats.records_processed
+                    processed_queries += 1
                 else:
                     # For non-SELECT queries, just execute them
                     success, results, execution = self.execute_query(
@@ -556,6 +758,7 @@ class DatabaseConnector:
             self.sync.records_processed = total_records
             self.sync.records_created = created_count
             self.sync.records_updated = updated_count
+            self.sync.records_skipped = profile_service.skipped_count
             self.sync.complete(status='success')
             
             # Update datasource
@@ -608,7 +811,7 @@ class DatabaseConnector:
             
             # Execute the query to get sample data
             # Limit the number of rows to improve performance
-            limited_query = self._limit_query_for_detection(query)
+            limited_query, params = limit_query(query, DETECTION_SAMPLE_ROWS, self.db_settings.connection.db_type, params)
             
             if is_oracle:
                 success, results, execution = self.execute_oracle_query(limited_query, params)
@@ -622,23 +825,7 @@ class DatabaseConnector:
             
             # Process results to extract field information
             if isinstance(results, list) and results:
-                # Get the first row for sample data
-                sample_row = results[0]
-                fields = []
-                
-                for field_name, value in sample_row.items():
-                    # Create field definition
-                    field = {
-                        'name': field_name,
-                        'display_name': field_name.replace('_', ' ').title(),
-                        'field_type': self._guess_field_type(value),
-                        'is_key': False,  # Default to False, user can modify later
-                        'is_nullable': True,  # Default to True, user can modify later
-                        'sample_data': str(value) if value is not None else ''
-                    }
-                    fields.append(field)
-                
-                return fields
+                return self._fields_from_rows(results)
             else:
                 raise ValueError("Unexpected result format")
         
@@ -648,105 +835,6 @@ class DatabaseConnector:
             print(traceback.format_exc())
             raise
 
-    def _limit_query_for_detection(self, query):
-        """
-        Add LIMIT/ROWNUM clause to query for field detection to improve performance.
-        Handles different database syntaxes.
-        
-        Args:
-            query: Original SQL query
-            
-        Returns:
-            Modified query with row limit
-        """
-        # Determine database type
-        db_type = self.db_settings.connection.db_type.lower()
-        
-        # Strip ending semicolon if present
-        query = query.strip()
-        if query.endswith(';'):
-            query = query[:-1].strip()
-        
-        # Different limits for different database types
-        if db_type == 'oracle':
-            # Check if query already has a ROWNUM condition
-            if 'rownum' in query.lower():
-                return query
-                
-            # Oracle uses ROWNUM
-            if 'where' in query.lower():
-                return f"{query} AND ROWNUM <= 5"
-            else:
-                return f"{query} WHERE ROWNUM <= 5"
-                
-        elif db_type in ['postgresql', 'mysql', 'sqlite']:
-            # Check if query already has a LIMIT clause
-            if 'limit' in query.lower():
-                return query
-                
-            # Most SQL databases use LIMIT
-            return f"{query} LIMIT 5"
-            
-        elif db_type == 'sqlserver':
-            # SQL Server uses TOP
-            if 'top' in query.lower():
-                return query
-                
-            # Insert TOP after the first SELECT
-            select_pos = query.lower().find('select')
-            if select_pos >= 0:
-                return f"{query[:select_pos+6]} TOP 5 {query[select_pos+6:]}"
-        
-        # Default - return query unchanged
-        return query
-
-    def _guess_field_type(self, value):
-        """
-        Determine the field type based on the value.
-        
-        Args:
-            value: Sample value to analyze
-            
-        Returns:
-            Field type string
-        """
-        if value is None:
-            return 'text'
-        
-        # Use type to determine field type
-        if isinstance(value, bool):
-            return 'boolean'
-        elif isinstance(value, int):
-            return 'integer'
-        elif isinstance(value, float):
-            return 'float'
-        elif isinstance(value, (datetime.date, datetime.datetime)):
-            if isinstance(value, datetime.datetime):
-                return 'datetime'
-            else:
-                return 'date'
-        
-        # If it's a string, try to detect if it might be a formatted date/datetime
-        if isinstance(value, str):
-            # Try various date formats
-            for fmt in ['%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y']:
-                try:
-                    datetime.datetime.strptime(value, fmt)
-                    return 'date'
-                except ValueError:
-                    pass
-            
-            # Try datetime formats
-            for fmt in ['%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%d/%m/%Y %H:%M:%S']:
-                try:
-                    datetime.datetime.strptime(value, fmt)
-                    return 'datetime'
-                except ValueError:
-                    pass
-        
-        # Default to text for anything else
-        return 'text'
-
     def create_fields_from_query(self, datasource, query, params=None):
         """
         Create field definitions in the database based on query results.
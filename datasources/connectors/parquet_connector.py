@@ -0,0 +1,400 @@
+# datasources/connectors/parquet_connector.py
+import os
+import itertools
+import logging
+from django.db import transaction
+
+from ..models import DataSourceField, DataSourceSync
+from ..parquet_models import ParquetDataSource, ParquetFileUpload
+from ..type_inference import infer_column_types
+from ..pipeline import RecordPipeline
+from ..sharding import integrate_shard
+
+logger = logging.getLogger(__name__)
+
+# Rows decoded at a time, so memory use does not grow with the row group size
+READ_BATCH_SIZE = 10000
+
+# Rows sampled to infer the types of string columns
+DETECTION_SAMPLE_ROWS = 1000
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        logger.error("pyarrow module not found. Please install it to use Parquet and Arrow data sources.")
+        raise
+    return pyarrow
+
+
+class ColumnarFile:
+    """
+    Lazy reader for a Parquet or Arrow IPC file.
+    
+    Both formats store rows in independently readable groups, Parquet row
+    groups and Arrow record batches, called row groups here. Only the row
+    groups being read and, within them, only the requested columns are ever
+    decoded: Parquet skips the pages of other columns, and a memory-mapped
+    Arrow file never touches their buffers.
+    """
+    def __init__(self, file_path, file_format='parquet'):
+        pa = _import_pyarrow()
+        self.file_format = file_format
+        self._source = pa.memory_map(file_path)
+        try:
+            if file_format == 'arrow':
+                self._reader = pa.ipc.open_file(self._source)
+                self.num_row_groups = self._reader.num_record_batches
+            else:
+                self._reader = pa.parquet.ParquetFile(self._source)
+                self.num_row_groups = self._reader.num_row_groups
+        except pa.ArrowException as e:
+            self._source.close()
+            raise ValueError(f"Not a valid {file_format} file: {str(e)}")
+        self.schema = self._reader.schema_arrow if file_format == 'parquet' else self._reader.schema
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def close(self):
+        self._source.close()
+    
+    @property
+    def num_rows(self):
+        if self.file_format == 'parquet':
+            return self._reader.metadata.num_rows
+        return sum(self._reader.get_batch(i).num_rows for i in range(self.num_row_groups))
+    
+    def null_counts(self):
+        """
+        Null count of each top-level column, from the Parquet statistics or
+        the Arrow batch headers, without decoding any data. Parquet columns
+        without statistics are left out.
+        """
+        if self.file_format != 'parquet':
+            counts = dict.fromkeys(self.schema.names, 0)
+            for i in range(self.num_row_groups):
+                batch = self._reader.get_batch(i)
+                for name, column in zip(batch.schema.names, batch.columns):
+                    counts[name] += column.null_count
+            return counts
+        
+        metadata = self._reader.metadata
+        counts = {}
+        unknown = set()
+        for i in range(metadata.num_row_groups):
+            row_group = metadata.row_group(i)
+            for j in range(row_group.num_columns):
+                column = row_group.column(j)
+                name = column.path_in_schema
+                statistics = column.statistics
+                if statistics is None or not statistics.has_null_count:
+                    unknown.add(name)
+                else:
+                    counts[name] = counts.get(name, 0) + statistics.null_count
+        return {name: count for name, count in counts.items() if name not in unknown}
+    
+    def iter_batches(self, columns=None, row_groups=None, batch_size=READ_BATCH_SIZE):
+        """
+        Yield Arrow record batches of up to batch_size rows.
+        
+        Args:
+            columns: Names of the columns to read, or None for all of them
+            row_groups: Indexes of the row groups to read, or None for all of them
+        """
+        if row_groups is None:
+            row_groups = range(self.num_row_groups)
+        
+        if self.file_format == 'parquet':
+            if row_groups:
+                yield from self._reader.iter_batches(batch_size=batch_size, row_groups=list(row_groups), columns=columns)
+            return
+        
+        for i in row_groups:
+            batch = self._reader.get_batch(i)
+            if columns is not None:
+                batch = batch.select(columns)
+            for offset in range(0, batch.num_rows, batch_size):
+                yield batch.slice(offset, batch_size)
+
+
+def _arrow_field_type(arrow_type):
+    """
+    Map an Arrow type to a field type, or None for strings, whose type is inferred from their values.
+    """
+    import pyarrow.types as types
+    
+    if types.is_boolean(arrow_type):
+        return 'boolean'
+    if types.is_integer(arrow_type):
+        return 'integer'
+    if types.is_floating(arrow_type) or types.is_decimal(arrow_type):
+        return 'float'
+    if types.is_timestamp(arrow_type):
+        return 'datetime'
+    if types.is_date(arrow_type):
+        return 'date'
+    if types.is_string(arrow_type) or types.is_large_string(arrow_type):
+        return None
+    if types.is_dictionary(arrow_type):
+        return _arrow_field_type(arrow_type.value_type)
+    return 'text'
+
+
+class ParquetConnector:
+    """
+    Connector for Parquet and Arrow IPC file data sources.
+    
+    Syncs read the file row group by row group and only decode the columns
+    referenced by the profile field mappings, so unmapped columns cost nothing.
+    """
+    def __init__(self, datasource):
+        """
+        Initialize with a DataSource instance.
+        """
+        self.datasource = datasource
+        try:
+            self.parquet_settings = datasource.parquet_settings
+        except ParquetDataSource.DoesNotExist:
+            raise ValueError("Parquet settings not found for this data source")
+        
+        self.sync = None
+    
+    def _get_file_path(self):
+        """
+        Get the file path based on the location type.
+        """
+        if self.parquet_settings.file_location == 'upload':
+            latest_upload = self.parquet_settings.uploads.order_by('-uploaded_at').first()
+            if not latest_upload:
+                raise ValueError("No uploaded file found for this data source")
+            return latest_upload.file.path
+        elif self.parquet_settings.file_location == 'local':
+            if not os.path.exists(self.parquet_settings.file_path):
+                raise ValueError(f"Local file not found: {self.parquet_settings.file_path}")
+            return self.parquet_settings.file_path
+        else:
+            raise ValueError(f"Unknown file location: {self.parquet_settings.file_location}")
+    
+    def open_file(self, file_path=None):
+        """
+        Open the data source's file for lazy reading.
+        """
+        return ColumnarFile(file_path or self._get_file_path(), self.parquet_settings.file_format)
+    
+    def detect_fields(self, columnar_file=None):
+        """
+        Detect fields from the file schema.
+        
+        Typed columns keep their declared type, and string columns have their
+        type inferred from a sample of rows. Nullability comes from the Parquet
+        null count statistics where the file has them.
+        Returns a list of DataSourceField dictionaries.
+        """
+        try:
+            if columnar_file is None:
+                with self.open_file() as f:
+                    return self.detect_fields(f)
+            
+            schema = columnar_file.schema
+            names = schema.names
+            first_batch = next(columnar_file.iter_batches(batch_size=DETECTION_SAMPLE_ROWS), None)
+            rows = first_batch.to_pylist() if first_batch is not None else []
+            first_row = rows[0] if rows else {}
+            column_types = infer_column_types(rows, names)
+            null_counts = columnar_file.null_counts()
+            
+            fields = []
+            for field, column_type in zip(schema, column_types):
+                field_type = _arrow_field_type(field.type)
+                if field_type is None:
+                    field_type, confidence = column_type.field_type, column_type.confidence
+                else:
+                    confidence = 1.0
+                
+                if field.name in null_counts:
+                    is_nullable = null_counts[field.name] > 0
+                else:
+                    is_nullable = field.nullable
+                
+                sample = first_row.get(field.name)
+                fields.append({
+                    'name': field.name,
+                    'display_name': field.name,
+                    'field_type': field_type,
+                    'is_key': False,
+                    'is_nullable': is_nullable,
+                    'type_confidence': confidence,
+                    'sample_data': str(sample) if sample is not None else ''
+                })
+            
+            return fields
+        except Exception as e:
+            logger.error(f"Error detecting fields: {str(e)}")
+            raise
+    
+    def process_upload(self, file_obj):
+        """
+        Process a newly uploaded Parquet or Arrow file.
+        The row count comes from the file metadata, no rows are decoded.
+        """
+        try:
+            upload = ParquetFileUpload(parquet_datasource=self.parquet_settings)
+            upload.file.save(file_obj.name, file_obj, save=False)
+            upload.file_size = file_obj.size
+            
+            try:
+                columnar_file = self.open_file(upload.file.path)
+            except ValueError:
+                upload.file.delete(save=False)
+                raise
+            
+            with columnar_file:
+                upload.row_count = columnar_file.num_rows
+                upload.row_group_count = columnar_file.num_row_groups
+                upload.save()
+                
+                # If this is the first upload, try to detect fields
+                if self.datasource.fields.count() == 0:
+                    try:
+                        detected_fields = self.detect_fields(columnar_file)
+                        with transaction.atomic():
+                            for field_dict in detected_fields:
+                                DataSourceField.objects.create(
+                                    datasource=self.datasource,
+                                    **field_dict
+                                )
+                    except Exception as e:
+                        logger.error(f"Error auto-detecting fields: {str(e)}")
+            
+            return upload
+        except Exception as e:
+            logger.error(f"Error processing upload: {str(e)}")
+            raise
+    
+    def _get_columns(self, schema):
+        """
+        Get the columns a sync has to read: the id column, the source fields of
+        the enabled profile field mappings and the fields their transformations
+        read from the record.
+        
+        Returns:
+            List of column names in file order, or None if every column is needed
+        """
+        from users.profile_integration import ProfileFieldMapping
+        from users.services.transformations import referenced_fields
+        
+        columns = {'id'}
+        mappings = ProfileFieldMapping.objects.filter(datasource=self.datasource, is_enabled=True).values_list(
+            'source_field__name', 'mapping_type', 'transformation_logic'
+        )
+        for field_name, mapping_type, transformation_logic in mappings:
+            columns.add(field_name)
+            if mapping_type == 'transform' and transformation_logic:
+                fields = referenced_fields(transformation_logic)
+                if fields is None:
+                    return None
+                columns |= fields
+        
+        return [name for name in schema.names if name in columns]
+    
+    def _iter_records(self, shard):
+        """
+        Yield (record_data, record_id) tuples for the rows of a shard, or of
+        the whole file if the shard lists no row groups.
+        """
+        with self.open_file(shard['path']) as columnar_file:
+            columns = self._get_columns(columnar_file.schema)
+            if columns is not None:
+                logger.info(f"Reading {len(columns)} of {len(columnar_file.schema.names)} columns of {self.datasource.name}")
+            
+            for batch in columnar_file.iter_batches(columns=columns, row_groups=shard.get('row_groups')):
+                for record_data in batch.to_pylist():
+                    record_id = record_data.get('id')
+                    yield record_data, '' if record_id is None else str(record_id)
+    
+    def plan_shards(self, shard_count):
+        """
+        Split the file into runs of whole row groups, one per shard.
+        """
+        file_path = self._get_file_path()
+        if shard_count < 2 or self.parquet_settings.max_rows:
+            return [{'path': file_path}]
+        
+        with self.open_file(file_path) as columnar_file:
+            num_row_groups = columnar_file.num_row_groups
+        
+        shards = []
+        for i in range(min(shard_count, num_row_groups)):
+            start = num_row_groups * i // shard_count
+            end = num_row_groups * (i + 1) // shard_count
+            if start < end:
+                shards.append({'path': file_path, 'row_groups': list(range(start, end))})
+        return shards or [{'path': file_path}]
+    
+    def sync_shard(self, shard, sync, stage=None):
+        """
+        Run the records of one shard planned by plan_shards through profile integration.
+        """
+        return integrate_shard(self.datasource, sync, self._iter_records(shard), stage)
+    
+    def sync_data(self, triggered_by=None, sync=None):
+        """
+        Synchronize data from the file through profile integration.
+        
+        Record batches are streamed through the record pipeline, so memory
+        use does not grow with the file size. Attributes of records no longer
+        in the file are removed afterwards.
+        
+        Args:
+            triggered_by: User who triggered the sync
+            sync: Optional running DataSourceSync to report into instead of creating one
+        """
+        try:
+            self.sync = sync or DataSourceSync.objects.create(
+                datasource=self.datasource,
+                triggered_by=triggered_by,
+                status='running'
+            )
+            
+            records = self._iter_records({'path': self._get_file_path()})
+            if self.parquet_settings.max_rows:
+                records = itertools.islice(records, self.parquet_settings.max_rows)
+            
+            pipeline = RecordPipeline(self.datasource, self.sync, track_record_ids=True)
+            stats = pipeline.run(records)
+            
+            # Handle cleanup of missing records - in its own transaction
+            removed_count = 0
+            try:
+                removed_count = pipeline.remove_missing_attributes()
+            except Exception as cleanup_error:
+                logger.error(f"Error cleaning up missing attributes: {str(cleanup_error)}")
+            
+            self.sync.records_processed = stats.records_processed
+            self.sync.records_created = stats.records_created
+            self.sync.records_updated = stats.records_updated
+            self.sync.records_skipped = stats.records_skipped
+            self.sync.records_deleted = removed_count
+            self.sync.complete(status='success')
+            
+            self.datasource.update_last_sync()
+            
+            return self.sync
+        except Exception as e:
+            error_message = str(e)
+            logger.error(f"Error syncing Parquet data: {error_message}")
+            
+            if self.sync:
+                self.sync.complete(status='error', error_message=error_message)
+            
+            self.datasource.status = 'error'
+            self.datasource.save(update_fields=['status'])
+            
+            return self.sync
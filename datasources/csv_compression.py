@@ -0,0 +1,94 @@
+# datasources/csv_compression.py
+import bz2
+import gzip
+import io
+import logging
+import lzma
+import zipfile
+
+logger = logging.getLogger(__name__)
+
+# Leading bytes of each supported compression format
+_MAGIC_NUMBERS = [
+    (b'\x1f\x8b', 'gzip'),
+    (b'BZh', 'bz2'),
+    (b'\xfd7zXZ\x00', 'xz'),
+    (b'PK\x03\x04', 'zip'),
+]
+
+# Extensions accepted for CSV uploads
+CSV_UPLOAD_EXTENSIONS = ['.csv', '.txt', '.gz', '.bz2', '.xz', '.zip']
+
+# Bytes buffered between the decompressor and the CSV parser
+_READ_BUFFER_SIZE = 1 << 20
+
+
+def detect_compression(file_path):
+    """
+    Detect the compression of a file from its leading bytes.
+
+    Returns:
+        'gzip', 'bz2', 'xz' or 'zip', or None for an uncompressed file
+    """
+    with open(file_path, 'rb') as f:
+        head = f.read(6)
+    for magic, compression in _MAGIC_NUMBERS:
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def _zip_member(archive):
+    """
+    Pick the CSV file of a zip archive: its only file, or its first .csv or .txt file.
+    """
+    names = [info.filename for info in archive.infolist() if not info.is_dir()]
+    if not names:
+        raise ValueError("Zip archive is empty")
+    if len(names) > 1:
+        csv_names = [name for name in names if name.lower().endswith(('.csv', '.txt'))]
+        if not csv_names:
+            raise ValueError(f"Zip archive holds {len(names)} files and none of them is a CSV file")
+        if len(csv_names) > 1:
+            logger.warning(f"Zip archive holds {len(csv_names)} CSV files, reading {csv_names[0]}")
+        return csv_names[0]
+    return names[0]
+
+
+def open_binary(file_path, compression=None):
+    """
+    Open a possibly compressed file for reading, decompressing it on the fly.
+    Nothing is extracted to disk.
+
+    Args:
+        file_path: Path of the file
+        compression: Compression from detect_compression, detected if omitted
+
+    Returns:
+        Binary file object of the decompressed content
+    """
+    if compression is None:
+        compression = detect_compression(file_path)
+
+    if compression == 'gzip':
+        return io.BufferedReader(gzip.GzipFile(file_path, 'rb'), _READ_BUFFER_SIZE)
+    if compression == 'bz2':
+        return io.BufferedReader(bz2.BZ2File(file_path, 'rb'), _READ_BUFFER_SIZE)
+    if compression == 'xz':
+        return io.BufferedReader(lzma.LZMAFile(file_path, 'rb'), _READ_BUFFER_SIZE)
+    if compression == 'zip':
+        archive = zipfile.ZipFile(file_path)
+        try:
+            member = archive.open(_zip_member(archive))
+        finally:
+            # The open member keeps the archive file open until it is closed itself
+            archive.close()
+        return io.BufferedReader(member, _READ_BUFFER_SIZE)
+    return open(file_path, 'rb', buffering=_READ_BUFFER_SIZE)
+
+
+def open_text(file_path, encoding, compression=None):
+    """
+    Open a possibly compressed CSV file as text, ready for csv.reader.
+    """
+    return io.TextIOWrapper(open_binary(file_path, compression), encoding=encoding, newline='')
@@ -0,0 +1,155 @@
+# datasources/csv_digest.py
+import hashlib
+import logging
+import struct
+import zlib
+
+logger = logging.getLogger(__name__)
+
+# Bytes of the row digest kept per key. At 8 bytes, a changed row going
+# unnoticed because of a collision is a 1 in 2^64 event.
+DIGEST_SIZE = 8
+
+# Digest of rows to be synced again, see CSVRowDiff.invalidate()
+_INVALID_DIGEST = bytes(DIGEST_SIZE)
+
+_MAGIC = b'HDX1'
+_KEY_LENGTH = struct.Struct('>I')
+
+
+def row_digest(row):
+    """
+    Return the digest of a parsed CSV row.
+    """
+    # The unit separator keeps ['a', 'bc'] and ['ab', 'c'] apart
+    return hashlib.blake2b('\x1f'.join(row).encode('utf-8'), digest_size=DIGEST_SIZE).digest()
+
+
+def index_signature(*parts):
+    """
+    Return a signature of everything that decides how rows become records, so
+    that an index built under different settings or mappings is not reused.
+    """
+    return hashlib.blake2b(repr(parts).encode('utf-8'), digest_size=16).digest()
+
+
+def dump_digest_index(index, signature):
+    """
+    Serialize a {key: digest} index into compressed bytes.
+    """
+    compressor = zlib.compressobj()
+    chunks = [_MAGIC, signature]
+    buffer = []
+    for key, digest in index.items():
+        encoded = key.encode('utf-8')
+        buffer.append(_KEY_LENGTH.pack(len(encoded)) + encoded + digest)
+        if len(buffer) >= 10000:
+            chunks.append(compressor.compress(b''.join(buffer)))
+            buffer = []
+    chunks.append(compressor.compress(b''.join(buffer)))
+    chunks.append(compressor.flush())
+    return b''.join(chunks)
+
+
+def load_digest_index(data, signature):
+    """
+    Deserialize an index written by dump_digest_index.
+
+    Returns:
+        {key: digest} dictionary, or None if the index is unreadable or was built with another signature
+    """
+    header = len(_MAGIC) + len(signature)
+    if len(data) < header or data[:len(_MAGIC)] != _MAGIC:
+        logger.warning("Ignoring unreadable CSV digest index")
+        return None
+    if data[len(_MAGIC):header] != signature:
+        logger.info("CSV digest index was built with other settings or mappings, ignoring it")
+        return None
+
+    try:
+        body = zlib.decompress(data[header:])
+    except zlib.error as e:
+        logger.warning(f"Ignoring corrupt CSV digest index: {str(e)}")
+        return None
+
+    index = {}
+    offset = 0
+    end = len(body)
+    while offset < end:
+        (length,) = _KEY_LENGTH.unpack_from(body, offset)
+        offset += _KEY_LENGTH.size
+        key = body[offset:offset + length].decode('utf-8')
+        offset += length
+        index[key] = body[offset:offset + DIGEST_SIZE]
+        offset += DIGEST_SIZE
+    return index
+
+
+class CSVRowDiff:
+    """
+    Diff the rows of a CSV file against the digest index of the previous one
+    in a single streaming pass.
+
+    changed_rows() yields only the rows that were added or changed, and
+    builds the index of the new file as it goes. Once it is exhausted, the
+    keys of the previous index that were not seen are the removed rows.
+    Rows without a key cannot be diffed and are always yielded.
+    """
+    def __init__(self, previous, key_position):
+        """
+        Args:
+            previous: {key: digest} index of the previous file, or None if there is none
+            key_position: Position of the key column in the rows
+        """
+        self.has_previous = previous is not None
+        self.previous = dict(previous or {})
+        self.key_position = key_position
+        self.index = {}
+        self.added = 0
+        self.changed = 0
+        self.unchanged = 0
+        self.unkeyed = 0
+
+    def changed_rows(self, rows):
+        previous = self.previous
+        index = self.index
+        key_position = self.key_position
+
+        for row in rows:
+            key = row[key_position] if key_position < len(row) else ''
+            if not key:
+                self.unkeyed += 1
+                yield row
+                continue
+
+            digest = row_digest(row)
+            # Popping matched keys leaves exactly the removed keys behind
+            old_digest = previous.pop(key, None)
+            duplicate = key in index
+            index[key] = digest
+
+            if duplicate:
+                # Duplicate key within the file, let profile integration sort it out
+                yield row
+            elif old_digest is None:
+                self.added += 1
+                yield row
+            elif old_digest != digest:
+                self.changed += 1
+                yield row
+            else:
+                self.unchanged += 1
+
+    def invalidate(self, keys):
+        """
+        Keep keys in the new index with a digest no row has, so that their
+        rows are synced again next time but still count as removed if they
+        are gone by then, e.g. rows that failed to integrate.
+        """
+        for key in keys:
+            if key in self.index:
+                self.index[key] = _INVALID_DIGEST
+
+    @property
+    def removed_keys(self):
+        return list(self.previous)
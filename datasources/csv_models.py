@@ -38,6 +38,14 @@ class CSVDataSource(models.Model):
     # Processing options
     skip_rows = models.PositiveIntegerField(_('Skip Rows'), default=0, help_text=_('Number of rows to skip at the beginning'))
     max_rows = models.PositiveIntegerField(_('Max Rows'), null=True, blank=True, help_text=_('Maximum number of rows to process (blank for all)'))
+    incremental_sync = models.BooleanField(
+        _('Incremental Sync'),
+        default=False,
+        help_text=_('Only integrate rows added, changed or removed since the last successful sync, keyed by the id field')
+    )
+    
+    # Row digests of the last successfully synced file, see csv_digest
+    digest_index = models.FileField(_('Digest Index'), upload_to='csv_digests/', blank=True, editable=False)
     
     class Meta:
         verbose_name = _('CSV Data Source')
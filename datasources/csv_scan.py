@@ -0,0 +1,151 @@
+# datasources/csv_scan.py
+import codecs
+import csv
+import itertools
+import logging
+import mmap
+import random
+from collections import namedtuple
+
+from .csv_compression import detect_compression, open_text
+from .type_inference import reservoir_sample
+
+logger = logging.getLogger(__name__)
+
+# Data rows sampled for field detection, both from the head of the file and spread across the rest of it
+SAMPLE_SIZE = 1000
+
+# Bytes counted at a time when counting records
+BLOCK_SIZE = 16 << 20
+
+CSVScan = namedtuple('CSVScan', ['row_count', 'header', 'sample_rows'])
+
+
+def count_records(mm, quote_char, targets=(), block_size=BLOCK_SIZE):
+    """
+    Count the CSV records in a memory-mapped file without parsing it.
+
+    A newline ends a record unless it lies between quotes. Splitting a block
+    on the quote character makes every other piece a quoted section, so the
+    newlines inside quotes are counted with a single join and the whole count
+    runs at C speed, however many fields are quoted.
+
+    In the same pass, the start of the first record after each of the target
+    byte offsets is found, for sampling records spread across the file.
+
+    Returns:
+        Tuple of (record count, sorted record start offsets found for the targets)
+    """
+    quote = quote_char.encode('ascii') if quote_char else b''
+    size = len(mm)
+    pending = sorted(targets)
+    boundaries = set()
+    records = 0
+    in_quotes = False
+
+    for position in range(0, size, block_size):
+        block = mm[position:position + block_size]
+        end = position + len(block)
+
+        # Quote parity is carried from target to target, so the block is counted once
+        parity_offset = 0
+        parity = in_quotes
+        while pending and pending[0] < end:
+            cursor = pending.pop(0) - position
+            if quote:
+                parity ^= bool(block.count(quote, parity_offset, cursor) % 2)
+            parity_offset = cursor
+            in_record_quotes = parity
+            while True:
+                newline = block.find(b'\n', cursor)
+                if newline == -1:
+                    break
+                if quote:
+                    in_record_quotes ^= bool(block.count(quote, cursor, newline) % 2)
+                cursor = newline + 1
+                if not in_record_quotes:
+                    if position + cursor < size:
+                        boundaries.add(position + cursor)
+                    break
+
+        newlines = block.count(b'\n')
+        if quote and quote in block:
+            pieces = block.split(quote)
+            quoted = pieces[0 if in_quotes else 1::2]
+            newlines -= b''.join(quoted).count(b'\n')
+            if (len(pieces) - 1) % 2:
+                in_quotes = not in_quotes
+        elif in_quotes:
+            newlines = 0
+        records += newlines
+
+    # A last record without a trailing newline
+    if size and mm[size - 1:size] != b'\n':
+        records += 1
+    return records, sorted(boundaries)
+
+
+def _read_record(mm, offset, encoding, delimiter, quote_char):
+    """
+    Parse the CSV record starting at a byte offset of a memory-mapped file.
+    """
+    mm.seek(offset)
+    lines = (line.decode(encoding, errors='replace') for line in iter(mm.readline, b''))
+    return next(csv.reader(lines, delimiter=delimiter, quotechar=quote_char), None)
+
+
+def scan_csv(file_path, encoding='utf-8', delimiter=',', quote_char='"', has_header=True,
+             skip_rows=0, sample_size=SAMPLE_SIZE, seed=None):
+    """
+    Collect the data row count, the header and a sample of data rows of a CSV
+    file in one pass over a memory map of it.
+
+    The sample holds the first sample_size data rows and, for larger files,
+    up to sample_size more rows at random positions across the rest of the
+    file, so columns filled in only later in the file are typed correctly.
+    Only the sampled rows are decoded and parsed, except in compressed files,
+    which are decompressed as a stream and have no offsets to jump to.
+
+    Returns:
+        CSVScan tuple; header is None when the file has no header row
+    """
+    header = None
+    sample_rows = []
+    compression = detect_compression(file_path)
+    
+    with open_text(file_path, encoding, compression) as f:
+        reader = csv.reader(f, delimiter=delimiter, quotechar=quote_char)
+        for _ in range(skip_rows):
+            next(reader, None)
+        if has_header:
+            header = next(reader, None)
+        for row in reader:
+            sample_rows.append(row)
+            if len(sample_rows) >= sample_size:
+                break
+        
+        byte_splittable = not codecs.lookup(encoding).name.startswith(('utf-16', 'utf-32'))
+        if len(sample_rows) < sample_size:
+            # The sample already holds every row
+            row_count = len(sample_rows)
+        elif compression or not byte_splittable:
+            # Without byte offsets to jump to, the rest of the file is parsed
+            # and the spread rows are sampled from it as it streams past
+            rows_seen = itertools.count()
+            rest = (row for row, _ in zip(reader, rows_seen))
+            sample_rows.extend(reservoir_sample(rest, sample_size, seed))
+            row_count = sample_size + next(rows_seen)
+        else:
+            head_end = f.buffer.tell()
+            with open(file_path, 'rb') as raw, mmap.mmap(raw.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                size = len(mm)
+                rng = random.Random(seed)
+                targets = [rng.randrange(head_end, size) for _ in range(sample_size)] if head_end < size else []
+                records, offsets = count_records(mm, quote_char, targets)
+                for offset in offsets:
+                    row = _read_record(mm, offset, encoding, delimiter, quote_char)
+                    if row:
+                        sample_rows.append(row)
+            row_count = max(records - skip_rows - (1 if has_header else 0), 0)
+    
+    return CSVScan(row_count, header, sample_rows)
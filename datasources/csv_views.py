@@ -13,7 +13,6 @@ from .csv_models import CSVDataSource, CSVFileUpload
 from .forms import CSVDataSourceForm, CSVSettingsForm, CSVFileUploadForm, DataSourceFieldFormSet
 from .connectors.csv_connector import CSVConnector
 from .tasks import sync_datasource
-import csv
 
 class CSVDataSourceCreateView(LoginRequiredMixin, CreateView):
     """
@@ -210,101 +209,16 @@ class CSVDataSourceSyncView(LoginRequiredMixin, View):
         sync = None
         
         try:
-            # Create a sync record
+            # Create a sync record, so the data source shows as syncing right away
             sync = DataSourceSync.objects.create(
                 datasource=datasource,
                 triggered_by=request.user,
                 status='running'
             )
-
-            # Queue the sync task
-            # sync_datasource.delay(datasource.id, request.user.id)
-            # messages.success(request, _('Data synchronization has been queued and will start shortly.'))
-            
-            # Get the CSV connector
-            connector = CSVConnector(datasource)
-            file_path = connector._get_file_path()
-            
-            # Set up profile integration service
-            from users.services.profile_integration import ProfileIntegrationService
-            profile_service = ProfileIntegrationService(datasource, sync)
-            
-            created_count = 0
-            updated_count = 0
-            record_ids = []
             
-            # Process the CSV file - use a smaller transaction scope
-            with open(file_path, 'r', encoding=connector.csv_settings.encoding) as f:
-                reader = csv.reader(f, delimiter=connector.csv_settings.delimiter, quotechar=connector.csv_settings.quote_char)
-                
-                # Skip header if needed
-                if connector.csv_settings.has_header:
-                    next(reader, None)
-                
-                # Skip additional rows if configured
-                skip_count = connector.csv_settings.skip_rows
-                if skip_count and skip_count > 0:
-                    for i in range(skip_count):
-                        next(reader, None)
-                
-                # Process each row
-                row_count = 0
-                max_rows = connector.csv_settings.max_rows
-                
-                # Get fields for this data source
-                fields = DataSourceField.objects.filter(datasource=datasource).order_by('id')
-                field_list = list(fields)
-                
-                # Process each row
-                for row in reader:
-                    # Convert row to dictionary with field names
-                    record_data = {}
-                    for i, value in enumerate(row):
-                        if i < len(field_list):
-                            record_data[field_list[i].name] = value
-                    
-                    # Store record ID if available
-                    if 'id' in record_data:
-                        record_ids.append(record_data['id'])
-                    
-                    # Process the record through profile integration - in its own transaction
-                    try:
-                        person, created, changes = profile_service.process_record(record_data, record_data.get('id', ''))
-                        
-                        if created:
-                            created_count += 1
-                        elif changes > 0:
-                            updated_count += 1
-                    except Exception as row_error:
-                        logger.error(f"Error processing row: {str(row_error)}")
-                        # Continue with next row
-                    
-                    row_count += 1
-                    if max_rows and row_count >= max_rows:
-                        break
-            
-            # Handle cleanup of missing records - in its own transaction
-            removed_count = 0
-            if record_ids:
-                try:
-                    removed_count = profile_service.remove_missing_attributes(record_ids)
-                except Exception as cleanup_error:
-                    logger.error(f"Error cleaning up missing attributes: {str(cleanup_error)}")
-            
-            # Update sync stats
-            sync.records_processed = row_count
-            sync.records_created = created_count  
-            sync.records_updated = updated_count
-            sync.complete(status='success')
-            
-            messages.success(
-                request, 
-                _('Data source sync completed successfully. {processed} records processed, {created} profiles created, {updated} profiles updated.').format(
-                    processed=row_count,
-                    created=created_count,
-                    updated=updated_count
-                )
-            )
+            # Queue the sync task, which streams the file through profile integration
+            sync_datasource.delay(datasource.id, request.user.id, sync_id=sync.id)
+            messages.success(request, _('Data synchronization has been queued and will start shortly.'))
             
         except Exception as e:
             if sync:
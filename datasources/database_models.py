@@ -87,6 +87,15 @@ class DatabaseQuery(models.Model):
     is_default = models.BooleanField(_('Default Query'), default=False, 
                                     help_text=_('This query will be used as the default for syncing'))
     
+    # Incremental sync, see datasources.keyset
+    watermark_column = models.CharField(
+        _('Watermark Column'), max_length=100, blank=True,
+        help_text=_('Column that increases whenever a row is added or changed, e.g. modified_at. '
+                    'Syncs then only fetch rows past the last one synced. Leave blank to sync all rows.')
+    )
+    watermark = models.JSONField(_('Watermark'), null=True, blank=True, editable=False,
+                                 help_text=_('Position of the last row synced incrementally'))
+    
     # Audit fields
     created_by = models.ForeignKey(
         'accounts.User', on_delete=models.SET_NULL, null=True,
@@ -5,7 +5,10 @@ from django.forms import inlineformset_factory
 
 from .models import DataSource, DataSourceField
 from .csv_models import CSVDataSource, CSVFileUpload
+from .csv_compression import CSV_UPLOAD_EXTENSIONS
+from .parquet_models import ParquetDataSource, ParquetFileUpload
 from .database_models import DatabaseDataSource, DatabaseQuery
+from .keyset import is_valid_column
 from .connection_models import DatabaseConnection
 from cryptography.fernet import Fernet
 from django.conf import settings
@@ -36,7 +39,7 @@ class CSVSettingsForm(forms.ModelForm):
     class Meta:
         model = CSVDataSource
         fields = ['file_location', 'file_path', 'delimiter', 'has_header', 
-                 'encoding', 'quote_char', 'skip_rows', 'max_rows']
+                 'encoding', 'quote_char', 'skip_rows', 'max_rows', 'incremental_sync']
         widgets = {
             'file_path': forms.TextInput(attrs={'placeholder': '/path/to/file.csv or leave blank for uploaded files'}),
             'delimiter': forms.TextInput(attrs={'placeholder': ','}),
@@ -65,7 +68,38 @@ class CSVFileUploadForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         self.fields['file'].widget.attrs.update({
             'class': 'focus:ring-blue-500 focus:border-blue-500 block w-full text-sm text-gray-500 file:mr-4 file:py-2 file:px-4 file:rounded-md file:border-0 file:text-sm file:font-semibold file:bg-blue-50 file:text-blue-700 hover:file:bg-blue-100',
-            'accept': '.csv,.txt'
+            'accept': ','.join(CSV_UPLOAD_EXTENSIONS)
+        })
+
+class ParquetSettingsForm(forms.ModelForm):
+    """
+    Form for Parquet and Arrow file settings.
+    """
+    class Meta:
+        model = ParquetDataSource
+        fields = ['file_format', 'file_location', 'file_path', 'max_rows']
+        widgets = {
+            'file_path': forms.TextInput(attrs={'placeholder': '/path/to/file.parquet or leave blank for uploaded files'}),
+        }
+        
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name in self.fields:
+            self.fields[name].widget.attrs.update({'class': 'focus:ring-blue-500 focus:border-blue-500 block w-full shadow-sm sm:text-sm border-gray-300 rounded-md'})
+
+class ParquetFileUploadForm(forms.ModelForm):
+    """
+    Form for uploading a Parquet or Arrow file.
+    """
+    class Meta:
+        model = ParquetFileUpload
+        fields = ['file']
+        
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['file'].widget.attrs.update({
+            'class': 'focus:ring-blue-500 focus:border-blue-500 block w-full text-sm text-gray-500 file:mr-4 file:py-2 file:px-4 file:rounded-md file:border-0 file:text-sm file:font-semibold file:bg-blue-50 file:text-blue-700 hover:file:bg-blue-100',
+            'accept': '.parquet,.arrow,.feather,.ipc'
         })
 
 class DataSourceFieldInlineForm(forms.ModelForm):
@@ -124,7 +158,7 @@ class DatabaseConnectionForm(forms.ModelForm):
         model = DatabaseConnection
         fields = [
             'name', 'description', 'db_type', 'host', 'port', 'database_name', 
-            'schema', 'username', 'oracle_service_name', 'oracle_sid',
+            'schema', 'username', 'oracle_service_name', 'oracle_sid', 'dbapi_driver',
             'use_ssl', 'ssl_cert_path', 'connection_timeout',
             'query_timeout', 'max_rows', 'fetch_size'
         ]
@@ -277,7 +311,8 @@ class DatabaseQueryForm(forms.ModelForm):
     """
     class Meta:
         model = DatabaseQuery
-        fields = ['name', 'description', 'query_text', 'query_type', 'parameters', 'is_enabled', 'is_default']
+        fields = ['name', 'description', 'query_text', 'query_type', 'parameters', 'is_enabled', 'is_default',
+                  'watermark_column']
         widgets = {
             'name': forms.TextInput(attrs={'class': 'focus:ring-blue-500 focus:border-blue-500 block w-full shadow-sm sm:text-sm border-gray-300 rounded-md'}),
             'description': forms.Textarea(attrs={'rows': 2, 'class': 'focus:ring-blue-500 focus:border-blue-500 block w-full shadow-sm sm:text-sm border-gray-300 rounded-md'}),
@@ -289,6 +324,7 @@ class DatabaseQueryForm(forms.ModelForm):
             'parameters': forms.Textarea(attrs={'rows': 3, 'class': 'font-mono focus:ring-blue-500 focus:border-blue-500 block w-full shadow-sm sm:text-sm border-gray-300 rounded-md'}),
             'is_enabled': forms.CheckboxInput(attrs={'class': 'focus:ring-blue-500 h-4 w-4 text-blue-600 border-gray-300 rounded'}),
             'is_default': forms.CheckboxInput(attrs={'class': 'focus:ring-blue-500 h-4 w-4 text-blue-600 border-gray-300 rounded'}),
+            'watermark_column': forms.TextInput(attrs={'class': 'font-mono focus:ring-blue-500 focus:border-blue-500 block w-full shadow-sm sm:text-sm border-gray-300 rounded-md'}),
         }
 
     def __init__(self, *args, **kwargs):
@@ -303,6 +339,12 @@ class DatabaseQueryForm(forms.ModelForm):
         # For parameters, ensure we convert empty values to a valid JSON object
         if not self.instance.parameters and self.instance.pk:
             self.initial['parameters'] = '{}'
+    
+    def clean_watermark_column(self):
+        watermark_column = self.cleaned_data.get('watermark_column', '').strip()
+        if watermark_column and not is_valid_column(watermark_column):
+            raise forms.ValidationError(_('Enter a plain column name, e.g. modified_at.'))
+        return watermark_column
             
 class DataSourceBaseForm(forms.ModelForm):
     """
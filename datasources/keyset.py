@@ -0,0 +1,170 @@
+# datasources/keyset.py
+"""
+Keyset pagination over a watermark column, for incremental database syncs.
+
+A query with a watermark column, e.g. modified_at or an increasing ID, is
+read in chunks ordered by (watermark, id). Each chunk starts after the last
+row of the previous one, so every chunk is a cheap index range scan however
+far the sync has progressed, and the position reached is a small value that
+is stored with the query to resume from on the next sync.
+"""
+import datetime
+import decimal
+import hashlib
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Watermark and tie-breaker columns are put in the SQL text, so only plain identifiers are allowed
+_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_$]*$')
+
+DEFAULT_CHUNK_SIZE = 10000
+
+
+def is_valid_column(name):
+    """
+    Whether a column name can be used as a watermark or tie-breaker column.
+    """
+    return bool(name) and _IDENTIFIER.match(name) is not None
+
+
+def watermark_signature(*parts):
+    """
+    Return a signature of everything that decides which rows a watermark
+    stands for, so that a watermark stored for another query is not reused.
+    """
+    return hashlib.blake2b(repr(parts).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def encode_value(value):
+    """
+    Encode a watermark or key value for a JSON field, keeping its type.
+    """
+    if isinstance(value, datetime.datetime):
+        return {'type': 'datetime', 'value': value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {'type': 'date', 'value': value.isoformat()}
+    if isinstance(value, decimal.Decimal):
+        return {'type': 'decimal', 'value': str(value)}
+    return {'type': 'value', 'value': value}
+
+
+def decode_value(encoded):
+    """
+    Decode a value encoded by encode_value, so it binds with its original type.
+    """
+    value_type = encoded['type']
+    value = encoded['value']
+    if value_type == 'datetime':
+        return datetime.datetime.fromisoformat(value)
+    if value_type == 'date':
+        return datetime.date.fromisoformat(value)
+    if value_type == 'decimal':
+        return decimal.Decimal(value)
+    return value
+
+
+class KeysetPaginator:
+    """
+    Iterate over the rows of a query past a watermark, in bounded chunks.
+
+    Rows with a NULL watermark are never returned, as they cannot be ordered
+    against the stored position.
+    """
+
+    def __init__(self, fetch, query_text, params, watermark_column, tie_column='id',
+                 position=None, chunk_size=DEFAULT_CHUNK_SIZE, limit_style='limit'):
+        """
+        Args:
+            fetch: Callable(query, params) returning an iterable of result rows
+            query_text: SELECT query to paginate
+            params: Parameters of the query
+            watermark_column: Column that increases when a row is added or changed
+            tie_column: Unique column ordering rows with the same watermark
+            position: (watermark, tie) of the last row synced, or None to start from the first row
+            chunk_size: Maximum rows fetched by one query
+            limit_style: 'limit' for LIMIT n, 'fetch' for FETCH FIRST n ROWS ONLY
+        """
+        for column in (watermark_column, tie_column):
+            if not is_valid_column(column):
+                raise ValueError(f"Invalid watermark column name: {column}")
+
+        self.fetch = fetch
+        self.query_text = query_text.strip().rstrip(';')
+        self.params = dict(params or {})
+        self.watermark_column = watermark_column
+        # A unique watermark, such as an increasing ID, needs no tie-breaker
+        self.tie_column = None if tie_column.lower() == watermark_column.lower() else tie_column
+        self.position = position
+        self.chunk_size = max(int(chunk_size), 1)
+        self.limit_style = limit_style
+        self.chunks = 0
+
+    def build_query(self):
+        """
+        Build the query and parameters for the chunk after the current position.
+        """
+        watermark = f"keyset_source.{self.watermark_column}"
+        params = dict(self.params)
+        conditions = [f"{watermark} IS NOT NULL"]
+        order_by = [watermark]
+
+        if self.tie_column:
+            tie = f"keyset_source.{self.tie_column}"
+            order_by.append(tie)
+            if self.position is not None:
+                conditions.append(
+                    f"({watermark} > :keyset_watermark OR ({watermark} = :keyset_watermark AND {tie} > :keyset_tie))"
+                )
+                params['keyset_watermark'], params['keyset_tie'] = self.position
+        elif self.position is not None:
+            conditions.append(f"{watermark} > :keyset_watermark")
+            params['keyset_watermark'] = self.position[0]
+
+        query = (
+            f"SELECT * FROM ({self.query_text}) keyset_source "
+            f"WHERE {' AND '.join(conditions)} ORDER BY {', '.join(order_by)}"
+        )
+        if self.limit_style == 'fetch':
+            query += " FETCH FIRST :keyset_limit ROWS ONLY"
+        else:
+            query += " LIMIT :keyset_limit"
+        params['keyset_limit'] = self.chunk_size
+        return query, params
+
+    def _column_key(self, row, column):
+        """
+        Find the key of a column in a result row. Some databases, such as
+        Oracle, return unquoted column names in upper case.
+        """
+        if column in row:
+            return column
+        for key in row.keys():
+            if key.lower() == column.lower():
+                return key
+        raise ValueError(f"Column {column} is not in the query results")
+
+    def __iter__(self):
+        watermark_key = tie_key = None
+
+        while True:
+            query, params = self.build_query()
+            count = 0
+            last_row = None
+            for row in self.fetch(query, params):
+                count += 1
+                last_row = row
+                yield row
+            self.chunks += 1
+
+            if last_row is None:
+                return
+
+            if watermark_key is None:
+                watermark_key = self._column_key(last_row, self.watermark_column)
+                tie_key = self._column_key(last_row, self.tie_column) if self.tie_column else watermark_key
+            self.position = (last_row[watermark_key], last_row[tie_key])
+
+            if count < self.chunk_size:
+                return
@@ -0,0 +1,124 @@
+# datasources/management/commands/benchmark_csv_parsing.py
+import bz2
+import codecs
+import csv
+import gzip
+import lzma
+import os
+import shutil
+import random
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from datasources.connectors.csv_connector import iter_parallel_rows
+from datasources.csv_compression import open_text
+
+
+class Command(BaseCommand):
+    help = 'Benchmark serial, parallel and compressed CSV parsing on a large file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', help='CSV file to parse (default: generate one)')
+        parser.add_argument('--size', type=int, default=1024, help='Size in MB of the generated file')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help='Worker processes for parallel parsing')
+        parser.add_argument('--encoding', default='utf-8', help='Character encoding of the file')
+        parser.add_argument('--compression', choices=['gzip', 'bz2', 'xz'], help='Also parse a compressed copy of the file')
+
+    def handle(self, *args, **options):
+        path = options['file']
+        generated = False
+        if path:
+            if not os.path.exists(path):
+                raise CommandError(f'File not found: {path}')
+        else:
+            path = self._generate(options['size'] * 1024 * 1024)
+            generated = True
+
+        try:
+            size_mb = os.path.getsize(path) / (1024 * 1024)
+            encoding = options['encoding']
+            workers = options['workers']
+            self.stdout.write(f'Parsing {path} ({size_mb:.0f} MB)')
+
+            def codecs_reader():
+                with codecs.open(path, 'r', encoding=encoding) as f:
+                    reader = csv.reader(f)
+                    next(reader, None)
+                    yield from reader
+
+            def open_reader():
+                with open(path, 'r', encoding=encoding, newline='') as f:
+                    reader = csv.reader(f)
+                    next(reader, None)
+                    yield from reader
+
+            results = []
+            for name, rows in (
+                ('codecs.open reader (previous)', codecs_reader()),
+                ('open reader (serial)', open_reader()),
+                (f'parallel, {workers} workers', iter_parallel_rows(path, encoding, ',', '"', 1, workers)),
+            ):
+                start = time.perf_counter()
+                count = 0
+                for _ in rows:
+                    count += 1
+                elapsed = time.perf_counter() - start
+                results.append(count)
+                self.stdout.write(f'  {name}: {count} rows in {elapsed:.2f}s ({size_mb / elapsed:.0f} MB/s)')
+
+            # codecs.open splits lines on more than \n, so it is not a correctness reference
+            if results[1] != results[2]:
+                raise CommandError(f'Parallel parsing returned {results[2]} rows instead of {results[1]}')
+            self.stdout.write(self.style.SUCCESS('Parallel and serial parsing returned the same rows'))
+            
+            if options['compression']:
+                self._benchmark_compressed(path, encoding, options['compression'], size_mb, results[1])
+        finally:
+            if generated:
+                os.remove(path)
+    
+    def _benchmark_compressed(self, path, encoding, compression, size_mb, expected):
+        """Parse a compressed copy of the file, decompressing it on the fly"""
+        opener = {'gzip': gzip.open, 'bz2': bz2.open, 'xz': lzma.open}[compression]
+        compressed_path = f'{path}.{compression}'
+        self.stdout.write(f'Writing {compression} copy')
+        with open(path, 'rb') as source, opener(compressed_path, 'wb') as target:
+            shutil.copyfileobj(source, target, 1 << 20)
+        
+        try:
+            compressed_mb = os.path.getsize(compressed_path) / (1024 * 1024)
+            start = time.perf_counter()
+            with open_text(compressed_path, encoding) as f:
+                reader = csv.reader(f)
+                next(reader, None)
+                count = sum(1 for _ in reader)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'  {compression} reader ({compressed_mb:.0f} MB compressed): {count} rows in {elapsed:.2f}s '
+                f'({size_mb / elapsed:.0f} MB/s uncompressed)'
+            )
+            if count != expected:
+                raise CommandError(f'Compressed parsing returned {count} rows instead of {expected}')
+        finally:
+            os.remove(compressed_path)
+
+    def _generate(self, size):
+        """Write a CSV file of about size bytes, with some quoted fields holding newlines and delimiters"""
+        rng = random.Random(42)
+        f = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, newline='', encoding='utf-8')
+        self.stdout.write(f'Generating {size // (1024 * 1024)} MB test file')
+        with f:
+            writer = csv.writer(f)
+            writer.writerow(['id', 'first_name', 'last_name', 'email', 'department', 'notes'])
+            i = 0
+            while f.tell() < size:
+                for _ in range(10000):
+                    notes = 'line one\nline two, "quoted"' if rng.random() < 0.05 else 'none'
+                    writer.writerow([
+                        i, f'first{i % 9973}', f'last{i % 7919}', f'user{i}@example.com',
+                        rng.choice(('HR', 'IT', 'Finance', 'Sales')), notes
+                    ])
+                    i += 1
+        return f.name
@@ -0,0 +1,111 @@
+# datasources/management/commands/benchmark_database_queries.py
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.database import execute_query, stream_query, bulk_write, invalidate_pool, get_pool
+
+
+class Command(BaseCommand):
+    help = 'Benchmark database query execution and streaming on a local SQLite database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', help='SQLite database to query (default: generate one)')
+        parser.add_argument('--rows', type=int, default=1000000, help='Rows in the generated table')
+        parser.add_argument('--query', default='SELECT * FROM people', help='SELECT query to run')
+        parser.add_argument('--fetch-size', type=int, default=1000, help='Rows per fetch when streaming')
+        parser.add_argument('--lookups', type=int, default=10000, help='Single-row parameterized queries to run')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per batch when bulk writing')
+
+    def handle(self, *args, **options):
+        path = options['file']
+        generated = False
+        if path:
+            if not os.path.exists(path):
+                raise CommandError(f'File not found: {path}')
+        else:
+            path = self._generate(options['rows'])
+            generated = True
+
+        # Not tied to a DatabaseConnection, so the pool is keyed by the connection info alone
+        connection_info = {'type': 'sqlite', 'database': path, 'fetch_size': options['fetch_size']}
+        query = options['query']
+
+        try:
+            self.stdout.write(f'Querying {path}: {query}')
+
+            for name, as_result_set in (('execute_query, dict rows', False), ('execute_query, ResultSet', True)):
+                start = time.perf_counter()
+                success, results, error = execute_query(connection_info, query, as_result_set=as_result_set)
+                elapsed = time.perf_counter() - start
+                if not success:
+                    raise CommandError(error)
+                self.stdout.write(f'  {name}: {len(results)} rows in {elapsed:.2f}s')
+                del results
+
+            start = time.perf_counter()
+            count = 0
+            for chunk in stream_query(connection_info, query, as_result_set=True):
+                count += len(chunk)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f'  stream_query, {options["fetch_size"]} rows per fetch: {count} rows in {elapsed:.2f}s')
+
+            # The same statement with different parameters, as run by workflow actions in a loop
+            if not options['file']:
+                lookups = options['lookups']
+                start = time.perf_counter()
+                for i in range(lookups):
+                    execute_query(connection_info, 'SELECT * FROM people WHERE id = :id', {'id': i % options['rows'] + 1})
+                elapsed = time.perf_counter() - start
+                stats = get_pool(connection_info).stats()
+                self.stdout.write(
+                    f'  {lookups} parameterized lookups in {elapsed:.2f}s '
+                    f'({lookups / elapsed:.0f}/s), statement cache hit rate {stats["statement_hit_rate"]}'
+                )
+                
+                # Copy the table through the bulk write path of workflow actions
+                success, results, error = execute_query(connection_info, 'SELECT * FROM people', as_result_set=True)
+                execute_query(connection_info, 'CREATE TABLE people_copy AS SELECT * FROM people WHERE 0')
+                start = time.perf_counter()
+                success, summary, error = bulk_write(
+                    connection_info, results, table='people_copy', batch_size=options['batch_size']
+                )
+                elapsed = time.perf_counter() - start
+                if not success:
+                    raise CommandError(error)
+                self.stdout.write(
+                    f'  bulk_write, {options["batch_size"]} rows per batch: {summary["rows_written"]} rows '
+                    f'in {summary["batches"]} batches in {elapsed:.2f}s ({summary["rows_written"] / elapsed:.0f}/s)'
+                )
+        finally:
+            invalidate_pool(None)
+            if generated:
+                os.remove(path)
+
+    def _generate(self, rows):
+        fd, path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(fd)
+        self.stdout.write(f'Generating {rows} rows in {path}')
+
+        connection = sqlite3.connect(path)
+        try:
+            connection.execute(
+                'CREATE TABLE people (id INTEGER PRIMARY KEY, email TEXT, first_name TEXT, '
+                'last_name TEXT, score REAL, modified_at TEXT)'
+            )
+            connection.executemany(
+                'INSERT INTO people VALUES (?, ?, ?, ?, ?, ?)',
+                (
+                    (i, f'user{i}@example.com', f'First{i}', f'Last{i}', random.random() * 100,
+                     f'2024-01-{i % 28 + 1:02d}T00:00:00')
+                    for i in range(1, rows + 1)
+                )
+            )
+            connection.commit()
+        finally:
+            connection.close()
+        return path
@@ -13,6 +13,7 @@ class DataSource(models.Model):
     TYPE_CHOICES = [
         ('database', _('Database')),
         ('csv', _('CSV File')),
+        ('parquet', _('Parquet / Arrow File')),
         ('api', _('API')),
         ('active_directory', _('Active Directory')),
         ('graph_api', _('Microsoft Graph API')),
@@ -94,6 +95,12 @@ class DataSourceField(models.Model):
     is_key = models.BooleanField(_('Is Key Field'), default=False)
     is_nullable = models.BooleanField(_('Is Nullable'), default=True)
     sample_data = models.TextField(_('Sample Data'), blank=True)
+    type_confidence = models.FloatField(
+        _('Type Confidence'),
+        null=True,
+        blank=True,
+        help_text=_('Share of the sampled values matching the detected field type')
+    )
     
     class Meta:
         verbose_name = _('Data Source Field')
@@ -127,6 +134,14 @@ class DataSourceSync(models.Model):
     records_created = models.IntegerField(_('Records Created'), default=0)
     records_updated = models.IntegerField(_('Records Updated'), default=0)
     records_deleted = models.IntegerField(_('Records Deleted'), default=0)
+    records_skipped = models.IntegerField(_('Records Skipped'), default=0,
+                                        help_text=_('Records left untouched because they had not changed'))
+    rows_added = models.IntegerField(_('Rows Added'), null=True, blank=True,
+                                   help_text=_('Incremental syncs: rows not in the previous file'))
+    rows_changed = models.IntegerField(_('Rows Changed'), null=True, blank=True,
+                                     help_text=_('Incremental syncs: rows that differ from the previous file'))
+    rows_removed = models.IntegerField(_('Rows Removed'), null=True, blank=True,
+                                     help_text=_('Incremental syncs: rows of the previous file no longer present'))
     error_message = models.TextField(_('Error Message'), blank=True)
     triggered_by = models.ForeignKey(
         User, on_delete=models.SET_NULL, null=True,
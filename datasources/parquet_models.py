@@ -0,0 +1,72 @@
+# datasources/parquet_models.py
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+from .models import DataSource
+
+class ParquetDataSource(models.Model):
+    """
+    Extension model for columnar (Parquet or Arrow IPC) file data source settings.
+    """
+    datasource = models.OneToOneField(
+        DataSource,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='parquet_settings'
+    )
+    
+    FILE_FORMAT_CHOICES = [
+        ('parquet', _('Parquet')),
+        ('arrow', _('Arrow IPC (Feather v2)')),
+    ]
+    file_format = models.CharField(
+        _('File Format'),
+        max_length=20,
+        choices=FILE_FORMAT_CHOICES,
+        default='parquet'
+    )
+    
+    # File storage options
+    FILE_LOCATION_CHOICES = [
+        ('local', _('Local File')),
+        ('upload', _('Uploaded File')),
+    ]
+    file_location = models.CharField(
+        _('File Location'),
+        max_length=20,
+        choices=FILE_LOCATION_CHOICES,
+        default='upload'
+    )
+    file_path = models.CharField(_('File Path'), max_length=255, blank=True)
+    
+    # Processing options
+    max_rows = models.PositiveIntegerField(_('Max Rows'), null=True, blank=True, help_text=_('Maximum number of rows to process (blank for all)'))
+    
+    class Meta:
+        verbose_name = _('Parquet Data Source')
+        verbose_name_plural = _('Parquet Data Sources')
+    
+    def __str__(self):
+        return f"Parquet Settings for {self.datasource.name}"
+
+class ParquetFileUpload(models.Model):
+    """
+    Model to track uploaded Parquet and Arrow files.
+    """
+    parquet_datasource = models.ForeignKey(
+        ParquetDataSource,
+        on_delete=models.CASCADE,
+        related_name='uploads'
+    )
+    file = models.FileField(_('File'), upload_to='parquet_files/%Y/%m/%d/')
+    uploaded_at = models.DateTimeField(_('Uploaded At'), auto_now_add=True)
+    row_count = models.PositiveIntegerField(_('Row Count'), null=True, blank=True)
+    row_group_count = models.PositiveIntegerField(_('Row Groups'), null=True, blank=True)
+    file_size = models.PositiveIntegerField(_('File Size (bytes)'), null=True, blank=True)
+    
+    class Meta:
+        verbose_name = _('Parquet File Upload')
+        verbose_name_plural = _('Parquet File Uploads')
+        ordering = ['-uploaded_at']
+    
+    def __str__(self):
+        return f"Upload for {self.parquet_datasource.datasource.name} at {self.uploaded_at}"
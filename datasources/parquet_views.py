@@ -0,0 +1,240 @@
+# datasources/parquet_views.py
+from django.shortcuts import redirect, get_object_or_404
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib import messages
+from django.views.generic import DetailView, CreateView, UpdateView, View
+from django.utils.translation import gettext_lazy as _
+from django.db import transaction
+
+from .models import DataSource, DataSourceField, DataSourceSync
+from .parquet_models import ParquetDataSource, ParquetFileUpload
+from .forms import CSVDataSourceForm, ParquetSettingsForm, ParquetFileUploadForm
+from .connectors.parquet_connector import ParquetConnector
+from .tasks import sync_datasource
+
+class ParquetDataSourceCreateView(LoginRequiredMixin, CreateView):
+    """
+    View for creating a new Parquet data source
+    """
+    template_name = 'datasources/parquet/create.html'
+    form_class = CSVDataSourceForm
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        if self.request.POST:
+            context['settings_form'] = ParquetSettingsForm(self.request.POST)
+        else:
+            context['settings_form'] = ParquetSettingsForm()
+        return context
+    
+    def form_valid(self, form):
+        context = self.get_context_data()
+        settings_form = context['settings_form']
+        
+        if settings_form.is_valid():
+            with transaction.atomic():
+                # Save the base data source
+                datasource = form.save(commit=False)
+                datasource.type = 'parquet'
+                datasource.created_by = self.request.user
+                datasource.modified_by = self.request.user
+                datasource.save()
+                
+                # Save the Parquet settings
+                parquet_settings = settings_form.save(commit=False)
+                parquet_settings.datasource = datasource
+                parquet_settings.save()
+                
+                messages.success(self.request, _('Parquet data source created successfully.'))
+                return redirect('datasources:parquet_detail', pk=datasource.pk)
+        else:
+            return self.form_invalid(form)
+    
+    def form_invalid(self, form):
+        messages.error(self.request, _('Please correct the errors below.'))
+        return super().form_invalid(form)
+
+class ParquetDataSourceUpdateView(LoginRequiredMixin, UpdateView):
+    """
+    View for updating a Parquet data source
+    """
+    model = DataSource
+    template_name = 'datasources/parquet/create.html'
+    form_class = CSVDataSourceForm
+    
+    def get_queryset(self):
+        return DataSource.objects.filter(type='parquet')
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        try:
+            instance = self.object.parquet_settings
+        except ParquetDataSource.DoesNotExist:
+            instance = None
+        if self.request.POST:
+            context['settings_form'] = ParquetSettingsForm(self.request.POST, instance=instance)
+        else:
+            context['settings_form'] = ParquetSettingsForm(instance=instance)
+        return context
+    
+    def form_valid(self, form):
+        context = self.get_context_data()
+        settings_form = context['settings_form']
+        
+        if settings_form.is_valid():
+            with transaction.atomic():
+                # Update the base data source
+                datasource = form.save(commit=False)
+                datasource.modified_by = self.request.user
+                datasource.save()
+                
+                # Update or create the Parquet settings
+                parquet_settings = settings_form.save(commit=False)
+                parquet_settings.datasource = datasource
+                parquet_settings.save()
+                
+                messages.success(self.request, _('Parquet data source updated successfully.'))
+                return redirect('datasources:parquet_detail', pk=datasource.pk)
+        else:
+            return self.form_invalid(form)
+
+class ParquetDataSourceDetailView(LoginRequiredMixin, DetailView):
+    """
+    View for Parquet data source details
+    """
+    model = DataSource
+    template_name = 'datasources/parquet/detail.html'
+    context_object_name = 'datasource'
+    
+    def get_queryset(self):
+        return DataSource.objects.filter(type='parquet')
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        
+        try:
+            context['parquet_settings'] = self.object.parquet_settings
+        except ParquetDataSource.DoesNotExist:
+            context['parquet_settings'] = None
+        
+        if context['parquet_settings']:
+            context['uploads'] = ParquetFileUpload.objects.filter(
+                parquet_datasource=context['parquet_settings']
+            ).order_by('-uploaded_at')[:5]
+        else:
+            context['uploads'] = []
+        
+        context['fields'] = self.object.fields.all().order_by('name')
+        context['recent_syncs'] = self.object.syncs.all().order_by('-start_time')[:5]
+        context['upload_form'] = ParquetFileUploadForm()
+        
+        return context
+
+class ParquetFileUploadView(LoginRequiredMixin, View):
+    """
+    View for uploading a Parquet or Arrow file
+    """
+    def post(self, request, pk):
+        datasource = get_object_or_404(DataSource, pk=pk)
+        
+        if datasource.type != 'parquet':
+            messages.error(request, _('This is not a Parquet data source.'))
+            return redirect('datasources:index')
+        
+        # Make sure we have Parquet settings
+        try:
+            datasource.parquet_settings
+        except ParquetDataSource.DoesNotExist:
+            ParquetDataSource.objects.create(datasource=datasource)
+        
+        form = ParquetFileUploadForm(request.POST, request.FILES)
+        if form.is_valid():
+            try:
+                connector = ParquetConnector(datasource)
+                upload = connector.process_upload(request.FILES['file'])
+                
+                messages.success(
+                    request,
+                    _('File uploaded successfully. {count} rows in {groups} row groups.').format(
+                        count=upload.row_count,
+                        groups=upload.row_group_count
+                    )
+                )
+            except Exception as e:
+                messages.error(request, _('Error uploading file: {error}').format(error=str(e)))
+        else:
+            messages.error(request, _('Invalid file upload.'))
+        
+        return redirect('datasources:parquet_detail', pk=pk)
+
+class ParquetDataSourceSyncView(LoginRequiredMixin, View):
+    """
+    View to trigger a manual sync of a Parquet data source
+    with profile integration
+    """
+    def post(self, request, pk):
+        datasource = get_object_or_404(DataSource, pk=pk)
+        
+        if datasource.type != 'parquet':
+            messages.error(request, _('This is not a Parquet data source.'))
+            return redirect('datasources:index')
+        
+        if datasource.is_syncing():
+            messages.warning(request, _('This data source is already being synchronized.'))
+            return redirect('datasources:parquet_detail', pk=pk)
+        
+        sync = None
+        
+        try:
+            # Create a sync record, so the data source shows as syncing right away
+            sync = DataSourceSync.objects.create(
+                datasource=datasource,
+                triggered_by=request.user,
+                status='running'
+            )
+            
+            sync_datasource.delay(datasource.id, request.user.id, sync_id=sync.id)
+            messages.success(request, _('Data synchronization has been queued and will start shortly.'))
+        
+        except Exception as e:
+            if sync:
+                sync.complete(status='error', error_message=str(e))
+            
+            messages.error(request, _('Error syncing data: {error}').format(error=str(e)))
+        
+        return redirect('datasources:parquet_detail', pk=pk)
+
+class ParquetDetectFieldsView(LoginRequiredMixin, View):
+    """
+    View for detecting fields from the schema of a Parquet or Arrow file
+    """
+    def post(self, request, pk):
+        datasource = get_object_or_404(DataSource, pk=pk)
+        
+        if datasource.type != 'parquet':
+            messages.error(request, _('This is not a Parquet data source.'))
+            return redirect('datasources:index')
+        
+        try:
+            connector = ParquetConnector(datasource)
+            fields = connector.detect_fields()
+            
+            # Replace existing fields with detected ones
+            with transaction.atomic():
+                datasource.fields.all().delete()
+                for field_dict in fields:
+                    DataSourceField.objects.create(
+                        datasource=datasource,
+                        **field_dict
+                    )
+            
+            messages.success(
+                request,
+                _('Successfully detected {count} fields from the file.').format(
+                    count=len(fields)
+                )
+            )
+        except Exception as e:
+            messages.error(request, _('Error detecting fields: {error}').format(error=str(e)))
+        
+        return redirect('datasources:parquet_detail', pk=pk)
@@ -0,0 +1,242 @@
+# datasources/pipeline.py
+import logging
+import time
+import uuid
+
+from django.db.models import F
+
+from .models import DataSourceSync
+
+logger = logging.getLogger(__name__)
+
+PIPELINE_STAGES = ('source', 'normalize', 'map', 'batch', 'reconcile', 'commit')
+
+
+class PipelineStats:
+    """
+    Counters and per-stage timings of a pipeline run.
+    Stage times are exclusive: the time a stage spent waiting on the stages
+    upstream of it is not counted against it.
+    """
+    def __init__(self):
+        self.records_read = 0
+        self.records_dropped = 0
+        self.records_processed = 0
+        self.records_created = 0
+        self.records_updated = 0
+        self.records_skipped = 0
+        self.records_staged = 0
+        self.batches = 0
+        self.stage_times = {stage: 0.0 for stage in PIPELINE_STAGES}
+
+    def timings(self):
+        """Stage timings formatted for logging"""
+        return ', '.join(f"{stage} {seconds:.2f}s" for stage, seconds in self.stage_times.items())
+
+    def as_dict(self):
+        return {
+            'processed': self.records_processed,
+            'created': self.records_created,
+            'updated': self.records_updated,
+            'skipped': self.records_skipped,
+            'staged': self.records_staged,
+        }
+
+
+class RecordPipeline:
+    """
+    Streams records from a connector into profile integration:
+
+        source -> normalize -> map/transform -> batch -> reconcile -> commit
+
+    - source: any iterable of raw items supplied by the connector (CSV rows,
+      query results, LDAP entries)
+    - normalize: the connector's function turning a raw item into a
+      (record_data, record_id) tuple, or None to drop it
+    - map/transform: field mappings and compiled transformations
+    - batch: groups records into batches of batch_size
+    - reconcile: identity resolution and attribute diffing with bulk writes,
+      one transaction per batch
+    - commit: stages the batch's record IDs and adds its counters to the sync
+
+    Every stage is a generator pulling from the one before it, so the source
+    is only read as fast as reconciliation consumes batches. That pull is
+    the backpressure, and it bounds memory to a single batch of records
+    however large the source is.
+    """
+    def __init__(self, datasource, sync=None, normalize=None, batch_size=None,
+                 track_record_ids=False, stage=None, profile_service=None, on_batch=None,
+                 track_failures=False):
+        """
+        Args:
+            datasource: DataSource being synced
+            sync: Optional DataSourceSync to add progress counters to after every batch
+            normalize: Function turning a raw source item into (record_data, record_id) or None
+            batch_size: Records per batch, defaults to the profile integration batch size
+            track_record_ids: Stage the record IDs seen, for remove_missing_attributes()
+            stage: Stage key to stage record IDs under, shared by the shards of a sharded sync
+            profile_service: ProfileIntegrationService to use instead of creating one
+            on_batch: Optional callback receiving the PipelineStats after every batch
+            track_failures: Collect the IDs of records that were not integrated in failed_record_ids
+        """
+        if profile_service is None:
+            from users.services.profile_integration import ProfileIntegrationService
+            profile_service = ProfileIntegrationService(datasource, sync, batch_size=batch_size)
+
+        self.datasource = datasource
+        self.sync = sync
+        self.normalize = normalize or (lambda item: item)
+        self.profile_service = profile_service
+        self.batch_size = batch_size or profile_service.batch_size
+        self.stage = stage or (uuid.uuid4() if track_record_ids else None)
+        # A stage passed in is shared with other shards and cleaned up by whoever finalizes the sync
+        self.owns_stage = stage is None and track_record_ids
+        self.on_batch = on_batch
+        self.stats = PipelineStats()
+        self.failed_record_ids = [] if track_failures else None
+
+    def run(self, source):
+        """
+        Run every item of the source through the pipeline.
+
+        Returns:
+            PipelineStats of the run
+        """
+        stats = self.stats
+        skipped_before = self.profile_service.skipped_count
+
+        batches = self._batch(self._map(self._normalize(self._read(source))))
+        try:
+            for batch in batches:
+                start = time.perf_counter()
+                results = self.profile_service.process_batch(batch)
+                stats.stage_times['reconcile'] += time.perf_counter() - start
+
+                start = time.perf_counter()
+                self._commit(batch, results, self.profile_service.skipped_count - skipped_before - stats.records_skipped)
+                stats.stage_times['commit'] += time.perf_counter() - start
+
+                if self.on_batch:
+                    self.on_batch(stats)
+        except BaseException:
+            # Missing attributes are never removed after a failed run, so nothing would delete its staged IDs
+            self.discard_staged_record_ids()
+            raise
+
+        logger.info(
+            f"Pipeline for {self.datasource.name} processed {stats.records_processed} records "
+            f"in {stats.batches} batches ({stats.timings()})"
+        )
+        return stats
+
+    def remove_missing_attributes(self):
+        """
+        Remove the attributes of records not seen by this run, using the staged record IDs.
+        """
+        if not self.stats.records_staged:
+            return 0
+        try:
+            return self.profile_service.remove_missing_attributes(stage=self.stage)
+        finally:
+            # Left behind when the removal failed
+            self.discard_staged_record_ids()
+
+    def discard_staged_record_ids(self):
+        """
+        Delete the record IDs staged by this run, unless its stage is shared.
+        """
+        if not self.owns_stage or not self.stats.records_staged:
+            return
+        from users.profile_integration import StagedRecordId
+        StagedRecordId.objects.filter(stage=self.stage).delete()
+
+    def _read(self, source):
+        times = self.stats.stage_times
+        iterator = iter(source)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                times['source'] += time.perf_counter() - start
+                return
+            times['source'] += time.perf_counter() - start
+            self.stats.records_read += 1
+            yield item
+
+    def _normalize(self, items):
+        times = self.stats.stage_times
+        for item in items:
+            start = time.perf_counter()
+            try:
+                record = self.normalize(item)
+            except Exception as e:
+                logger.error(f"Error normalizing record from {self.datasource.name}: {str(e)}")
+                record = None
+            times['normalize'] += time.perf_counter() - start
+
+            if record is None:
+                self.stats.records_dropped += 1
+                continue
+            yield record
+
+    def _map(self, records):
+        times = self.stats.stage_times
+        map_record = self.profile_service.map_record
+        for record_data, record_id in records:
+            start = time.perf_counter()
+            mapped = map_record(record_data, record_id)
+            times['map'] += time.perf_counter() - start
+            yield mapped
+
+    def _batch(self, records):
+        # Only the batching itself is timed, not the upstream stages producing the records
+        times = self.stats.stage_times
+        batch = []
+        for record in records:
+            start = time.perf_counter()
+            batch.append(record)
+            full = len(batch) >= self.batch_size
+            times['batch'] += time.perf_counter() - start
+            if full:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _commit(self, batch, results, skipped):
+        stats = self.stats
+        stats.batches += 1
+        stats.records_skipped += skipped
+
+        processed = created = updated = 0
+        for person, was_created, changes in results:
+            processed += 1
+            if was_created:
+                created += 1
+            elif changes > 0:
+                updated += 1
+        stats.records_processed += processed
+        stats.records_created += created
+        stats.records_updated += updated
+
+        if self.failed_record_ids is not None:
+            # Records without a person were either skipped as unchanged or not integrated
+            is_integrated = self.profile_service.is_integrated
+            self.failed_record_ids.extend(
+                record.record_id for record, (person, _, _) in zip(batch, results)
+                if person is None and record.record_id and not is_integrated(record)
+            )
+
+        if self.stage:
+            record_ids = [record.record_id for record in batch if record.record_id]
+            if record_ids:
+                stats.records_staged += self.profile_service.stage_record_ids(record_ids, self.stage)
+
+        if self.sync:
+            DataSourceSync.objects.filter(pk=self.sync.pk).update(
+                records_processed=F('records_processed') + processed,
+                records_created=F('records_created') + created,
+                records_updated=F('records_updated') + updated,
+                records_skipped=F('records_skipped') + skipped
+            )
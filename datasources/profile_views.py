@@ -9,6 +9,7 @@ from django.db import transaction
 
 from .models import DataSource, DataSourceField
 from users.profile_integration import ProfileFieldMapping, IdentityResolutionConfig
+from users.services.transformations import compile_transformation
 
 
 
@@ -93,6 +94,8 @@ class CreateFieldMappingView(LoginRequiredMixin, View):
             
             if datasource.type == 'csv':
                 return redirect('datasources:csv_detail', pk=pk)
+            elif datasource.type == 'parquet':
+                return redirect('datasources:parquet_detail', pk=pk)
             elif datasource.type == 'database':
                 return redirect('datasources:database_detail', pk=pk)
             else:
@@ -141,6 +144,8 @@ class CreateFieldMappingView(LoginRequiredMixin, View):
                 priority=int(request.POST.get('priority', 100)),
                 transformation_logic=request.POST.get('transformation_logic', '')
             )
+            if mapping.mapping_type == 'transform' and mapping.transformation_logic:
+                compile_transformation(mapping.transformation_logic)
             mapping.save()
             
             messages.success(request, _('Field mapping created successfully.'))
@@ -211,6 +216,8 @@ class EditFieldMappingView(LoginRequiredMixin, View):
             mapping.is_enabled = 'is_enabled' in request.POST
             mapping.priority = int(request.POST.get('priority', 100))
             mapping.transformation_logic = request.POST.get('transformation_logic', '')
+            if mapping.mapping_type == 'transform' and mapping.transformation_logic:
+                compile_transformation(mapping.transformation_logic)
             mapping.save()
             
             messages.success(request, _('Field mapping updated successfully.'))
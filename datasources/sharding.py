@@ -0,0 +1,32 @@
+# datasources/sharding.py
+import logging
+
+from .pipeline import RecordPipeline
+
+logger = logging.getLogger(__name__)
+
+
+def integrate_shard(datasource, sync, records, stage=None):
+    """
+    Run one shard of a sharded sync through profile integration.
+
+    The pipeline adds its counters to the shared DataSourceSync with F()
+    expressions, so shards running in parallel on different workers never
+    overwrite each other's totals. When a stage key is given, the record IDs
+    seen by the shard are staged for the single remove_missing_attributes
+    run that finalizes the sync.
+
+    Args:
+        datasource: DataSource being synced
+        sync: DataSourceSync shared by all shards
+        records: Iterable of (record_data, record_id) tuples
+        stage: Optional stage key to stage the shard's record IDs under
+
+    Returns:
+        Dictionary of the shard's counters
+    """
+    pipeline = RecordPipeline(datasource, sync, stage=stage)
+    counters = pipeline.run(records).as_dict()
+
+    logger.info(f"Integrated shard of {datasource.name}: {counters}")
+    return counters
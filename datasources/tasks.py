@@ -1,18 +1,55 @@
-from celery import shared_task
+from celery import shared_task, chord
 import logging
+import uuid
+from django.conf import settings
 from django.utils import timezone
 
 from .models import DataSource, DataSourceSync
 
 logger = logging.getLogger(__name__)
 
+
+def _get_connector(datasource):
+    """
+    Get the connector for a data source, or None if its type cannot be synced.
+    """
+    if datasource.type == 'csv':
+        from .connectors.csv_connector import CSVConnector
+        return CSVConnector(datasource)
+    elif datasource.type == 'parquet':
+        from .connectors.parquet_connector import ParquetConnector
+        return ParquetConnector(datasource)
+    elif datasource.type == 'database':
+        from .connectors.database_connector import DatabaseConnector
+        return DatabaseConnector(datasource)
+    elif datasource.type == 'active_directory':
+        from .connectors.active_directory_connector import ADConnector
+        return ADConnector(datasource=datasource)
+    return None
+
+
 @shared_task(bind=True)
-def sync_datasource(self, datasource_id, triggered_by_id=None):
+def sync_datasource(self, datasource_id, triggered_by_id=None, shard_count=None, sync_id=None):
     """
     Task to synchronize a data source asynchronously.
+    
+    sync_id is the running DataSourceSync created by the caller, if any, so
+    the view or workflow action queuing the task can show it right away.
+    
+    When shard_count (default: the DATASOURCE_SYNC_SHARDS setting) is above 1
+    and the connector can split its input, the sync is fanned out to
+    sync_datasource_shard tasks instead of running serially.
     """
     logger.info(f"Starting sync for DataSource ID: {datasource_id}")
+    
     try:
+        # Planning shards can fail, e.g. on the key range query of a database
+        shard_count = shard_count or getattr(settings, 'DATASOURCE_SYNC_SHARDS', 1)
+        if shard_count > 1:
+            result = start_sharded_sync(datasource_id, triggered_by_id, shard_count, sync_id)
+            if result is not None:
+                return result
+        
         # Get data source
         datasource = DataSource.objects.get(id=datasource_id)
         
@@ -24,33 +61,32 @@ def sync_datasource(self, datasource_id, triggered_by_id=None):
             triggered_by = User.objects.get(id=triggered_by_id)
         
         # Create sync record if it doesn't exist
-        sync, created = DataSourceSync.objects.get_or_create(
-            datasource=datasource,
-            status='running',
-            triggered_by=triggered_by,
-            defaults={
-                'start_time': timezone.now()
-            }
-        )
+        if sync_id:
+            sync = DataSourceSync.objects.get(id=sync_id)
+            created = False
+        else:
+            sync, created = DataSourceSync.objects.get_or_create(
+                datasource=datasource,
+                status='running',
+                triggered_by=triggered_by,
+                defaults={
+                    'start_time': timezone.now()
+                }
+            )
         
         if not created:
             logger.warning(f"Using existing sync record ID: {sync.id}")
         
         # Get appropriate connector
-        if datasource.type == 'csv':
-            from .connectors.csv_connector import CSVConnector
-            connector = CSVConnector(datasource)
-        elif datasource.type == 'database':
-            from .connectors.database_connector import DatabaseConnector
-            connector = DatabaseConnector(datasource)
-        else:
+        connector = _get_connector(datasource)
+        if connector is None:
             error_msg = f"Unsupported data source type: {datasource.type}"
             logger.error(error_msg)
             sync.complete(status='error', error_message=error_msg)
             return False
         
-        # Execute sync
-        result = connector.sync_data(triggered_by=triggered_by)
+        # Execute sync, reporting into the sync record instead of creating another
+        result = connector.sync_data(triggered_by=triggered_by, sync=sync)
         
         logger.info(f"Sync completed for DataSource ID: {datasource_id}, Status: {result.status}")
         
@@ -58,18 +94,19 @@ def sync_datasource(self, datasource_id, triggered_by_id=None):
             'success': result.status == 'success',
             'datasource_id': datasource_id,
             'sync_id': result.id,
-            'records_processed': result.records_processed
+            'records_processed': result.records_processed,
+            'records_skipped': result.records_skipped
         }
     
     except Exception as e:
         logger.error(f"Error syncing DataSource ID {datasource_id}: {str(e)}", exc_info=True)
         
-        # Try to update sync record if possible
+        # Try to update sync record if possible, so the data source does not stay syncing
         try:
-            sync = DataSourceSync.objects.filter(
-                datasource_id=datasource_id,
-                status='running'
-            ).first()
+            syncs = DataSourceSync.objects.filter(datasource_id=datasource_id, status='running')
+            if sync_id:
+                syncs = syncs.filter(id=sync_id)
+            sync = syncs.first()
             
             if sync:
                 sync.complete(status='error', error_message=str(e))
@@ -82,6 +119,149 @@ def sync_datasource(self, datasource_id, triggered_by_id=None):
             'datasource_id': datasource_id
         }
 
+def _supports_chords():
+    """
+    Whether the Celery result backend can join the shards of a sharded sync.
+    The rpc:// backend only returns results to the client that sent the
+    tasks, and without a backend there is nothing to join them with.
+    """
+    from celery import current_app
+    from celery.backends.base import DisabledBackend
+    from celery.backends.rpc import RPCBackend
+    
+    if current_app.conf.task_always_eager:
+        # Eager chords run in the calling process
+        return True
+    return not isinstance(current_app.backend, (RPCBackend, DisabledBackend))
+
+
+def start_sharded_sync(datasource_id, triggered_by_id=None, shard_count=None, sync_id=None):
+    """
+    Split a data source sync into shards and fan them out as a Celery chord.
+    
+    The connector plans the shards (CSV byte ranges, Parquet row groups,
+    database key ranges or LDAP name ranges). Every shard reports into the same DataSourceSync and
+    stages the record IDs it saw, and finalize_sharded_sync removes missing
+    attributes once after all shards finish.
+    
+    Shards each resolve identities against their own index, so they cannot
+    see the persons other shards create. Data sources creating missing
+    profiles are therefore synced serially, as two rows of the same identity
+    in different shards would create two persons.
+    
+    Returns:
+        Result dictionary, or None if the data source cannot be sharded and should sync serially
+    """
+    if not _supports_chords():
+        logger.warning("Sharded syncs need a Celery result backend that supports chords, syncing serially")
+        return None
+    
+    from users.profile_integration import IdentityResolutionConfig
+    
+    datasource = DataSource.objects.get(id=datasource_id)
+    if IdentityResolutionConfig.objects.filter(
+        datasource=datasource, is_enabled=True, create_missing_profiles=True
+    ).exists():
+        logger.info(f"Data source {datasource.name} creates missing profiles, syncing serially")
+        return None
+    
+    connector = _get_connector(datasource)
+    if connector is None or not hasattr(connector, 'plan_shards'):
+        return None
+    
+    shards = connector.plan_shards(shard_count or getattr(settings, 'DATASOURCE_SYNC_SHARDS', 1))
+    if len(shards) < 2:
+        logger.info(f"Data source {datasource.name} cannot be split, syncing serially")
+        return None
+    
+    if sync_id:
+        sync = DataSourceSync.objects.get(id=sync_id)
+    else:
+        sync = DataSourceSync.objects.create(
+            datasource=datasource,
+            triggered_by_id=triggered_by_id,
+            status='running'
+        )
+    stage = str(uuid.uuid4())
+    
+    chord(
+        sync_datasource_shard.s(datasource_id, sync.id, shard, stage) for shard in shards
+    )(finalize_sharded_sync.s(datasource_id, sync.id, stage))
+    
+    logger.info(f"Started sharded sync {sync.id} for {datasource.name} with {len(shards)} shards")
+    
+    return {
+        'success': True,
+        'datasource_id': datasource_id,
+        'sync_id': sync.id,
+        'shards': len(shards)
+    }
+
+
+@shared_task
+def sync_datasource_shard(datasource_id, sync_id, shard, stage):
+    """
+    Task to sync one shard of a sharded data source sync.
+    Errors are returned rather than raised so the chord still reaches finalize_sharded_sync.
+    """
+    try:
+        datasource = DataSource.objects.get(id=datasource_id)
+        sync = DataSourceSync.objects.get(id=sync_id)
+        connector = _get_connector(datasource)
+        return connector.sync_shard(shard, sync, stage)
+    except Exception as e:
+        logger.error(f"Error syncing shard {shard} of DataSource ID {datasource_id}: {str(e)}", exc_info=True)
+        return {'error': str(e), 'shard': shard}
+
+
+@shared_task
+def finalize_sharded_sync(shard_results, datasource_id, sync_id, stage):
+    """
+    Task run once all shards of a sharded sync finished.
+    
+    Missing attributes are only removed when every shard succeeded, as
+    records of a failed shard would otherwise look deleted.
+    """
+    from users.profile_integration import StagedRecordId
+    
+    sync = DataSourceSync.objects.get(id=sync_id)
+    errors = [result['error'] for result in shard_results if 'error' in result]
+    
+    try:
+        if errors:
+            sync.refresh_from_db()
+            sync.complete(
+                status='warning' if len(errors) < len(shard_results) else 'error',
+                error_message=f"{len(errors)} of {len(shard_results)} shards failed: " + '; '.join(errors)
+            )
+        else:
+            removed_count = 0
+            if any(result.get('staged') for result in shard_results):
+                from users.services.profile_integration import ProfileIntegrationService
+                profile_service = ProfileIntegrationService(sync.datasource, sync)
+                removed_count = profile_service.remove_missing_attributes(stage=stage)
+            
+            sync.refresh_from_db()
+            sync.records_deleted = removed_count
+            sync.complete(status='success')
+        
+        logger.info(f"Finalized sharded sync {sync_id} for DataSource ID {datasource_id}: {sync.status}")
+    except Exception as e:
+        logger.error(f"Error finalizing sharded sync {sync_id}: {str(e)}", exc_info=True)
+        sync.complete(status='error', error_message=str(e))
+    finally:
+        # Staged IDs are left behind when the removal was skipped or failed
+        StagedRecordId.objects.filter(stage=stage).delete()
+    
+    return {
+        'success': sync.status == 'success',
+        'datasource_id': datasource_id,
+        'sync_id': sync_id,
+        'records_processed': sync.records_processed,
+        'records_skipped': sync.records_skipped
+    }
+
+
 @shared_task
 def add(x, y):
     return x + y
\ No newline at end of file
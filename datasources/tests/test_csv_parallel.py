@@ -0,0 +1,148 @@
+import csv
+import io
+import os
+import tempfile
+
+from django.test import SimpleTestCase
+
+from datasources.connectors.csv_connector import find_record_boundaries, iter_parallel_rows
+
+
+class ParallelCSVTestCase(SimpleTestCase):
+    """
+    Base class writing CSV files to a temporary directory.
+    """
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def write_file(self, data, name='data.csv'):
+        path = os.path.join(self.tmp_dir.name, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def write_rows(self, rows, lineterminator='\r\n'):
+        """
+        Write rows with csv.writer, returning the file path and the byte offset each record starts at.
+        """
+        data = b''
+        starts = []
+        for row in rows:
+            buffer = io.StringIO()
+            csv.writer(buffer, lineterminator=lineterminator).writerow(row)
+            starts.append(len(data))
+            data += buffer.getvalue().encode('utf-8')
+        return self.write_file(data), starts, len(data)
+
+    def serial_rows(self, path, skip_records=0, delimiter=',', quote_char='"'):
+        with open(path, newline='', encoding='utf-8') as f:
+            return list(csv.reader(f, delimiter=delimiter, quotechar=quote_char))[skip_records:]
+
+
+class FindRecordBoundariesTests(ParallelCSVTestCase):
+    """
+    Tests for find_record_boundaries.
+    """
+    rows = [
+        ['id', 'name', 'notes'],
+        ['1', 'Ada', 'first line\nsecond line'],
+        ['2', 'Grace', 'says "hello",\nthen leaves'],
+        ['3', 'Linus', ''],
+        ['4', 'Barbara', '"\n"\n"'],
+        ['5', 'Ken', 'plain'],
+    ]
+
+    def expected_boundaries(self, starts, data_start, size, targets):
+        # The first record starting after each target
+        boundaries = set()
+        for target in targets:
+            following = [start for start in starts if max(target, data_start) < start < size]
+            if following:
+                boundaries.add(min(following))
+        return sorted(boundaries)
+
+    def test_quoted_newlines_across_blocks(self):
+        path, starts, size = self.write_rows(self.rows)
+        targets = range(1, size)
+
+        # Block sizes cutting records, quotes and CRLF pairs at every position
+        for block_size in (1, 2, 3, 5, 7, 16, 1 << 20):
+            with self.subTest(block_size=block_size):
+                data_start, boundaries = find_record_boundaries(path, '"', 1, targets, block_size=block_size)
+                self.assertEqual(data_start, starts[1])
+                self.assertEqual(boundaries, self.expected_boundaries(starts[2:], data_start, size, targets))
+
+    def test_skip_records(self):
+        path, starts, size = self.write_rows(self.rows)
+        targets = range(1, size)
+
+        for skip_records in range(len(self.rows)):
+            with self.subTest(skip_records=skip_records):
+                data_start, boundaries = find_record_boundaries(path, '"', skip_records, targets, block_size=4)
+                self.assertEqual(data_start, starts[skip_records])
+                self.assertEqual(
+                    boundaries,
+                    self.expected_boundaries(starts[skip_records + 1:], data_start, size, targets)
+                )
+
+    def test_skipping_every_record(self):
+        path, starts, size = self.write_rows(self.rows)
+        data_start, boundaries = find_record_boundaries(path, '"', len(self.rows), [size // 2])
+        self.assertEqual(data_start, size)
+        self.assertEqual(boundaries, [])
+
+    def test_no_trailing_newline(self):
+        path, starts, size = self.write_rows(self.rows)
+        with open(path, 'rb') as f:
+            data = f.read()
+        path = self.write_file(data.rstrip(b'\r\n'), name='unterminated.csv')
+
+        # No boundary is reported at or past the end of the file
+        data_start, boundaries = find_record_boundaries(path, '"', 1, range(1, size), block_size=3)
+        self.assertEqual(boundaries, starts[2:])
+
+
+class IterParallelRowsTests(ParallelCSVTestCase):
+    """
+    Tests comparing iter_parallel_rows with a serial csv.reader.
+    """
+    def assertParsesLikeSerial(self, path, skip_records=0, delimiter=',', quote_char='"'):
+        expected = self.serial_rows(path, skip_records, delimiter, quote_char)
+        size = os.path.getsize(path)
+        for chunk_size in (1, 7, 32, size):
+            with self.subTest(chunk_size=chunk_size):
+                rows = list(iter_parallel_rows(path, 'utf-8', delimiter, quote_char, skip_records, 2, chunk_size=chunk_size))
+                self.assertEqual(rows, expected)
+
+    def test_quoted_newlines_across_chunks(self):
+        rows = [['id', 'text']] + [[str(i), f'line {i}\nspans\n"chunks"'] for i in range(20)]
+        path, _, _ = self.write_rows(rows)
+        self.assertParsesLikeSerial(path, skip_records=1)
+
+    def test_crlf_line_endings(self):
+        path = self.write_file(b'id,name\r\n1,"Ada\r\nLovelace"\r\n2,Grace\r\n3,"Hopper, Grace"\r\n')
+        self.assertParsesLikeSerial(path, skip_records=1)
+
+    def test_escaped_quotes(self):
+        path = self.write_file(b'id,quote\n1,"He said ""hi"""\n2,""""\n3,"a ""quoted\nnewline"""\n4,plain\n')
+        self.assertParsesLikeSerial(path, skip_records=1)
+
+    def test_skip_records(self):
+        path, _, _ = self.write_rows([['# export'], ['# generated'], ['id', 'name'], ['1', 'a\nb'], ['2', 'c']])
+        for skip_records in range(6):
+            with self.subTest(skip_records=skip_records):
+                self.assertParsesLikeSerial(path, skip_records=skip_records)
+
+    def test_no_trailing_newline(self):
+        path = self.write_file(b'id,name\n1,Ada\n\n2,"Grace\nHopper"')
+        self.assertParsesLikeSerial(path, skip_records=1)
+
+    def test_separator_characters_in_data(self):
+        # The ASCII record and unit separators pack the rows workers return
+        path = self.write_file('id,name\n1,a\x1eb\n2,c\x1fd\n3,"e\x1e\nf"\n4,\n5,g\n'.encode('utf-8'))
+        self.assertParsesLikeSerial(path, skip_records=1)
+
+    def test_other_delimiter_and_quote(self):
+        path = self.write_file(b"id;name\n1;'a;b'\n2;'c\nd'\n3;'it''s'\n")
+        self.assertParsesLikeSerial(path, skip_records=1, delimiter=';', quote_char="'")
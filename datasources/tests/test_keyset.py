@@ -0,0 +1,188 @@
+import datetime
+import decimal
+import sqlite3
+
+from django.test import SimpleTestCase
+
+from datasources.keyset import KeysetPaginator, decode_value, encode_value
+
+
+class BuildQueryTests(SimpleTestCase):
+    """
+    Tests for KeysetPaginator.build_query.
+    """
+    def test_first_chunk(self):
+        paginator = KeysetPaginator(None, 'SELECT * FROM people;', {'dept': 'IT'}, 'modified_at', chunk_size=100)
+        query, params = paginator.build_query()
+        self.assertEqual(
+            query,
+            "SELECT * FROM (SELECT * FROM people) keyset_source "
+            "WHERE keyset_source.modified_at IS NOT NULL "
+            "ORDER BY keyset_source.modified_at, keyset_source.id LIMIT :keyset_limit"
+        )
+        self.assertEqual(params, {'dept': 'IT', 'keyset_limit': 100})
+
+    def test_after_position(self):
+        paginator = KeysetPaginator(None, 'SELECT * FROM people', None, 'modified_at', position=('2024-01-01', 7))
+        query, params = paginator.build_query()
+        self.assertIn(
+            "WHERE keyset_source.modified_at IS NOT NULL AND (keyset_source.modified_at > :keyset_watermark OR "
+            "(keyset_source.modified_at = :keyset_watermark AND keyset_source.id > :keyset_tie))",
+            query
+        )
+        self.assertEqual(params['keyset_watermark'], '2024-01-01')
+        self.assertEqual(params['keyset_tie'], 7)
+
+    def test_unique_watermark_needs_no_tie_breaker(self):
+        paginator = KeysetPaginator(None, 'SELECT * FROM people', None, 'ID', position=(41, 41))
+        query, params = paginator.build_query()
+        self.assertIn("WHERE keyset_source.ID IS NOT NULL AND keyset_source.ID > :keyset_watermark", query)
+        self.assertIn("ORDER BY keyset_source.ID LIMIT", query)
+        self.assertNotIn('keyset_tie', params)
+
+    def test_fetch_first_limit_style(self):
+        paginator = KeysetPaginator(None, 'SELECT * FROM people', None, 'modified_at', limit_style='fetch')
+        query, _ = paginator.build_query()
+        self.assertTrue(query.endswith("FETCH FIRST :keyset_limit ROWS ONLY"))
+
+    def test_params_are_not_modified(self):
+        params = {'dept': 'IT'}
+        paginator = KeysetPaginator(None, 'SELECT * FROM people', params, 'modified_at', position=(1, 2))
+        paginator.build_query()
+        self.assertEqual(params, {'dept': 'IT'})
+
+    def test_invalid_column_names(self):
+        for column in ('', 'modified_at; DROP TABLE people', 'a.b', '1st', 'modified at'):
+            with self.subTest(column=column):
+                with self.assertRaises(ValueError):
+                    KeysetPaginator(None, 'SELECT * FROM people', None, column)
+        with self.assertRaises(ValueError):
+            KeysetPaginator(None, 'SELECT * FROM people', None, 'modified_at', tie_column='id--')
+
+
+class KeysetIterationTests(SimpleTestCase):
+    """
+    Tests iterating a KeysetPaginator over an in-memory SQLite table.
+    """
+    def setUp(self):
+        self.connection = sqlite3.connect(':memory:')
+        self.connection.row_factory = sqlite3.Row
+        self.addCleanup(self.connection.close)
+        self.connection.execute('CREATE TABLE people (id INTEGER PRIMARY KEY, modified_at INTEGER, name TEXT)')
+        # Watermarks repeat, so chunks end in the middle of rows sharing one
+        rows = [(i, i // 3 if i % 10 else None, f'person {i}') for i in range(1, 31)]
+        # Ids in another order than the watermarks
+        rows += [(100 + i, 2, f'late {i}') for i in range(3)]
+        self.connection.executemany('INSERT INTO people VALUES (?, ?, ?)', rows)
+        self.queries = []
+
+    def fetch(self, query, params):
+        self.queries.append(params)
+        return [dict(row) for row in self.connection.execute(query, params)]
+
+    def fetch_upper_case(self, query, params):
+        # Like Oracle, which returns unquoted column names in upper case
+        return [{key.upper(): value for key, value in row.items()} for row in self.fetch(query, params)]
+
+    def expected_ids(self, after=None):
+        rows = self.connection.execute(
+            'SELECT id, modified_at FROM people WHERE modified_at IS NOT NULL ORDER BY modified_at, id'
+        ).fetchall()
+        return [row['id'] for row in rows if after is None or (row['modified_at'], row['id']) > after]
+
+    def paginate(self, chunk_size, position=None, fetch=None, query='SELECT * FROM people', watermark_column='modified_at'):
+        return KeysetPaginator(
+            fetch or self.fetch, query, None, watermark_column, position=position, chunk_size=chunk_size
+        )
+
+    def test_rows_in_order_once(self):
+        for chunk_size in (1, 2, 3, 4, 7, 100):
+            with self.subTest(chunk_size=chunk_size):
+                ids = [row['id'] for row in self.paginate(chunk_size)]
+                self.assertEqual(ids, self.expected_ids())
+
+    def test_ties_at_chunk_boundary(self):
+        # Six rows have watermark 2, the second chunk ends between them
+        paginator = self.paginate(4)
+        ids = [row['id'] for row in paginator]
+        self.assertEqual(ids, self.expected_ids())
+        self.assertEqual(ids.count(101), 1)
+        self.assertEqual(self.queries[2]['keyset_watermark'], 2)
+        self.assertEqual(self.queries[2]['keyset_tie'], 8)
+
+    def test_position_is_last_row(self):
+        paginator = self.paginate(4)
+        rows = list(paginator)
+        self.assertEqual(paginator.position, (rows[-1]['modified_at'], rows[-1]['id']))
+
+    def test_resume_from_position(self):
+        for position in ((2, 7), (2, 8), (2, 100), (0, 0), (9, 29)):
+            with self.subTest(position=position):
+                ids = [row['id'] for row in self.paginate(3, position=position)]
+                self.assertEqual(ids, self.expected_ids(after=position))
+
+    def test_resume_past_the_end(self):
+        paginator = self.paginate(3, position=(9, 29))
+        self.assertEqual(list(paginator), [])
+        self.assertEqual(paginator.chunks, 1)
+        # The stored position is kept when no row follows it
+        self.assertEqual(paginator.position, (9, 29))
+
+    def test_last_short_chunk(self):
+        total = len(self.expected_ids())
+        paginator = self.paginate(4)
+        list(paginator)
+        # A short last chunk ends the iteration without querying for an empty one
+        self.assertEqual(total % 4, 2)
+        self.assertEqual(paginator.chunks, total // 4 + 1)
+        self.assertEqual(len(self.queries), paginator.chunks)
+
+    def test_last_full_chunk(self):
+        total = len(self.expected_ids())
+        paginator = self.paginate(total // 2)
+        list(paginator)
+        # Only an empty chunk tells the last full one was the end
+        self.assertEqual(paginator.chunks, 3)
+
+    def test_null_watermarks_skipped(self):
+        ids = [row['id'] for row in self.paginate(5)]
+        self.assertFalse(set(ids) & {10, 20, 30})
+
+    def test_upper_case_column_keys(self):
+        paginator = self.paginate(4, fetch=self.fetch_upper_case)
+        ids = [row['ID'] for row in paginator]
+        self.assertEqual(ids, self.expected_ids())
+        self.assertEqual(paginator.position, (9, 29))
+
+    def test_unique_watermark(self):
+        paginator = self.paginate(4, watermark_column='id')
+        ids = [row['id'] for row in paginator]
+        self.assertEqual(ids, list(range(1, 31)) + [100, 101, 102])
+        self.assertEqual(paginator.position, (102, 102))
+
+    def test_missing_watermark_column(self):
+        def fetch(query, params):
+            return [{'id': row['id']} for row in self.fetch(query, params)]
+
+        paginator = self.paginate(4, fetch=fetch)
+        with self.assertRaises(ValueError):
+            list(paginator)
+
+
+class EncodeValueTests(SimpleTestCase):
+    """
+    Tests for storing watermark values.
+    """
+    def test_round_trip(self):
+        for value in (
+            datetime.datetime(2024, 1, 2, 3, 4, 5, 6),
+            datetime.date(2024, 1, 2),
+            decimal.Decimal('12.50'),
+            42,
+            'abc',
+            None,
+        ):
+            with self.subTest(value=value):
+                decoded = decode_value(encode_value(value))
+                self.assertEqual(decoded, value)
+                self.assertIs(type(decoded), type(value))
@@ -0,0 +1,156 @@
+# datasources/type_inference.py
+import datetime
+import decimal
+import random
+import re
+from collections import namedtuple
+
+ColumnType = namedtuple('ColumnType', ['field_type', 'is_nullable', 'confidence'])
+
+# Share of non-null values that must match a type for a column to get it
+MIN_CONFIDENCE = 0.95
+
+# Values treated as missing
+NULL_TOKENS = frozenset(['', 'null', 'none', 'n/a'])
+
+_DATE = (
+    r'(?:\d{4}[-/](?:0?[1-9]|1[0-2])[-/](?:0?[1-9]|[12]\d|3[01])'
+    r'|(?:0?[1-9]|[12]\d|3[01])/(?:0?[1-9]|[12]\d|3[01])/\d{4})'
+)
+_TIME = r'(?:[01]\d|2[0-3]):[0-5]\d(?::[0-5]\d(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?'
+
+# Candidate types from most to least specific. Each pattern also accepts the
+# values of the types it widens: float accepts integers, datetime accepts dates.
+# Leading zeros are kept out of the numeric types, as codes such as zip codes
+# would lose them.
+_TYPE_PATTERNS = [
+    ('boolean', r'(?i:true|false|yes|no|t|f|y|n)'),
+    ('integer', r'[+-]?(?:0|[1-9]\d*)'),
+    ('float', r'[+-]?(?:(?:0|[1-9]\d*)(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?'),
+    ('date', _DATE),
+    ('datetime', _DATE + r'(?:[T ]' + _TIME + r')?'),
+]
+
+# Anchored per line, so one findall over the newline-joined values of a
+# column counts the matching values without a Python-level loop per value
+_COLUMN_PATTERNS = [(field_type, re.compile(f'^(?:{pattern})$', re.MULTILINE)) for field_type, pattern in _TYPE_PATTERNS]
+
+_NULL_PATTERN = re.compile('^(?:' + '|'.join(re.escape(token) for token in NULL_TOKENS) + ')$', re.MULTILINE | re.IGNORECASE)
+
+# Types a typed database value counts towards
+_WIDENS = {
+    'boolean': ('boolean',),
+    'integer': ('integer', 'float'),
+    'float': ('float',),
+    'date': ('date', 'datetime'),
+    'datetime': ('datetime',),
+}
+
+
+def _value_type(value):
+    if isinstance(value, bool):
+        return 'boolean'
+    if isinstance(value, int):
+        return 'integer'
+    if isinstance(value, (float, decimal.Decimal)):
+        return 'float'
+    if isinstance(value, datetime.datetime):
+        return 'datetime'
+    if isinstance(value, datetime.date):
+        return 'date'
+    return None
+
+
+def infer_column_type(values, min_confidence=MIN_CONFIDENCE):
+    """
+    Infer the field type of a column from a sample of its values.
+
+    The string values are joined and matched with one findall per candidate
+    type; typed values, such as those returned by database drivers, count
+    towards their own type. The column gets the most specific type
+    matching at least min_confidence of its non-null values, or text.
+
+    Returns:
+        ColumnType of (field_type, is_nullable, confidence), where confidence
+        is the share of non-null values matching the type
+    """
+    matches = dict.fromkeys(_WIDENS, 0)
+    strings = [value for value in values if type(value) is str]
+    nulls = 0
+
+    if len(strings) < len(values):
+        for value in values:
+            if type(value) is str:
+                continue
+            if value is None:
+                nulls += 1
+                continue
+            kind = _value_type(value)
+            if kind is not None:
+                for field_type in _WIDENS[kind]:
+                    matches[field_type] += 1
+            else:
+                strings.append(str(value))
+
+    joined = None
+    if strings:
+        # Values spanning lines match no type and would break the per-line matching
+        strings = [value for value in map(str.strip, strings) if '\n' not in value]
+        if strings:
+            joined = '\n'.join(strings)
+            # Null tokens match none of the type patterns, so they are only counted
+            nulls += len(_NULL_PATTERN.findall(joined))
+
+    present = len(values) - nulls
+    if not present:
+        return ColumnType('text', True, 0.0)
+
+    # Types are tried from the most specific one, so most columns stop matching early
+    best = 0.0
+    for field_type, pattern in _COLUMN_PATTERNS:
+        if joined is not None:
+            matches[field_type] += len(pattern.findall(joined))
+        confidence = matches[field_type] / present
+        if confidence >= min_confidence:
+            return ColumnType(field_type, nulls > 0, round(confidence, 3))
+        best = max(best, confidence)
+
+    return ColumnType('text', nulls > 0, round(1.0 - best, 3))
+
+
+def infer_column_types(rows, columns, min_confidence=MIN_CONFIDENCE):
+    """
+    Infer the type of every column of a sample of rows.
+
+    Args:
+        rows: Sequence of rows, either lists indexed by position or dictionaries keyed by column name
+        columns: Column positions or names to infer, in order
+
+    Returns:
+        List of ColumnType, one per column
+    """
+    results = []
+    for column in columns:
+        if rows and isinstance(rows[0], dict):
+            values = [row.get(column) for row in rows]
+        else:
+            values = [row[column] if column < len(row) else None for row in rows]
+        results.append(infer_column_type(values, min_confidence))
+    return results
+
+
+def reservoir_sample(iterable, size, seed=None):
+    """
+    Return a uniform random sample of up to size items from an iterable of
+    unknown length, in one pass and holding no more than size items.
+    """
+    rng = random.Random(seed)
+    sample = []
+    for i, item in enumerate(iterable):
+        if i < size:
+            sample.append(item)
+        else:
+            j = rng.randint(0, i)
+            if j < size:
+                sample[j] = item
+    return sample
@@ -2,6 +2,7 @@
 from django.urls import path
 from . import views
 from . import csv_views
+from . import parquet_views
 from . import profile_views 
 from . import database_views
 from . import connection_views
@@ -40,6 +41,14 @@ urlpatterns = [
     path('csv/<int:pk>/fields/', csv_views.CSVFieldsUpdateView.as_view(), name='csv_fields'),
     path('csv/<int:pk>/detect_fields/', csv_views.CSVDetectFieldsView.as_view(), name='csv_detect_fields'),
 
+    # Parquet / Arrow file views
+    path('parquet/create/', parquet_views.ParquetDataSourceCreateView.as_view(), name='parquet_create'),
+    path('parquet/<int:pk>/', parquet_views.ParquetDataSourceDetailView.as_view(), name='parquet_detail'),
+    path('parquet/<int:pk>/update/', parquet_views.ParquetDataSourceUpdateView.as_view(), name='parquet_update'),
+    path('parquet/<int:pk>/upload/', parquet_views.ParquetFileUploadView.as_view(), name='parquet_upload'),
+    path('parquet/<int:pk>/sync/', parquet_views.ParquetDataSourceSyncView.as_view(), name='parquet_sync'),
+    path('parquet/<int:pk>/detect_fields/', parquet_views.ParquetDetectFieldsView.as_view(), name='parquet_detect_fields'),
+
     # Profile mapping
     path('<int:pk>/profile-mapping/', profile_views.ProfileMappingView.as_view(), name='profile_mapping'),
     path('<int:pk>/save-identity-config/', profile_views.SaveIdentityConfigView.as_view(), name='save_identity_config'),
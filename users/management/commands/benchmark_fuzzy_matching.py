@@ -0,0 +1,103 @@
+# users/management/commands/benchmark_fuzzy_matching.py
+import random
+import string
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.services.fuzzy_matching import FuzzyIndex
+
+
+FIRST_NAMES = [
+    'james', 'mary', 'john', 'patricia', 'robert', 'jennifer', 'michael', 'linda', 'william', 'elizabeth',
+    'david', 'barbara', 'richard', 'susan', 'joseph', 'jessica', 'thomas', 'sarah', 'charles', 'karen',
+    'christopher', 'nancy', 'daniel', 'lisa', 'matthew', 'betty', 'anthony', 'margaret', 'mark', 'sandra',
+    'donald', 'ashley', 'steven', 'kimberly', 'paul', 'emily', 'andrew', 'donna', 'joshua', 'michelle',
+]
+
+SYLLABLES = [
+    'an', 'ber', 'cal', 'dor', 'el', 'fen', 'gar', 'hol', 'is', 'jan', 'kel', 'lin', 'mor', 'nes',
+    'os', 'per', 'quin', 'ros', 'sten', 'tal', 'ur', 'van', 'wick', 'yor', 'zel', 'son', 'ton', 'ley',
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark fuzzy identity matching against synthetic persons'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--persons', type=int, default=100000, help='Number of synthetic persons to index')
+        parser.add_argument('--queries', type=int, default=10000, help='Number of misspelled records to match')
+        parser.add_argument('--threshold', type=float, default=0.9, help='Match confidence threshold')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed')
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options['seed'])
+
+        persons = self._generate_persons(rnd, options['persons'])
+        index = FuzzyIndex(['email', 'display_name'], str.lower, threshold=options['threshold'])
+
+        # Build the index in memory, the way IdentityIndex.build() feeds it
+        start = time.perf_counter()
+        for person_id, (email, display_name) in enumerate(persons):
+            index.add('email', email, person_id)
+            index.add('display_name', display_name, person_id)
+        build_time = time.perf_counter() - start
+
+        self.stdout.write(
+            f'Indexed {len(persons)} persons in {build_time:.2f}s '
+            f'({len(persons) / build_time:,.0f} persons/s)'
+        )
+
+        queries = []
+        for _ in range(options['queries']):
+            person_id = rnd.randrange(len(persons))
+            email, display_name = persons[person_id]
+            queries.append((person_id, {
+                'email': self._misspell(rnd, email),
+                'display_name': self._misspell(rnd, display_name),
+            }))
+
+        correct = wrong = unmatched = 0
+        start = time.perf_counter()
+        for person_id, match_fields in queries:
+            matched = index.match(match_fields)
+            if matched is None:
+                unmatched += 1
+            elif matched == person_id:
+                correct += 1
+            else:
+                wrong += 1
+        match_time = time.perf_counter() - start
+
+        self.stdout.write(
+            f'Matched {len(queries)} misspelled records in {match_time:.2f}s '
+            f'({len(queries) / match_time:,.0f} records/s)'
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Correct: {correct}, wrong: {wrong}, unmatched: {unmatched} '
+            f'(threshold {options["threshold"]})'
+        ))
+
+    def _generate_persons(self, rnd, count):
+        """Generate unique (email, display name) pairs"""
+        persons = []
+        seen = set()
+        while len(persons) < count:
+            first = rnd.choice(FIRST_NAMES)
+            last = ''.join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(2, 3)))
+            email = f'{first}.{last}@example.com'
+            if email in seen:
+                continue
+            seen.add(email)
+            persons.append((email, f'{first.title()} {last.title()}'))
+        return persons
+
+    def _misspell(self, rnd, value):
+        """Apply a single typo: substitution, deletion or transposition"""
+        position = rnd.randrange(1, len(value) - 1)
+        kind = rnd.choice(['substitute', 'delete', 'transpose'])
+        if kind == 'substitute':
+            return value[:position] + rnd.choice(string.ascii_lowercase) + value[position + 1:]
+        if kind == 'delete':
+            return value[:position] + value[position + 1:]
+        return value[:position - 1] + value[position] + value[position - 1] + value[position + 1:]
@@ -0,0 +1,57 @@
+# users/management/commands/benchmark_transformations.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.services.transformations import compile_transformation
+
+
+EXPRESSIONS = [
+    "value.strip().lower()",
+    "value.split('@')[0]",
+    "concat(record['first_name'], record['last_name'], sep=' ')",
+    "lookup(value, {'HR': 'Human Resources', 'IT': 'Information Technology', 'FIN': 'Finance'})",
+    "regex_sub(r'\\D', '', record['phone'])",
+    "reformat_date(record['hired'], '%m/%d/%Y', '%Y-%m-%d')",
+    "value.upper() if record['department'] == 'IT' else value.title()",
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark compiled transformation expressions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=1000000, help='Number of transformations per expression')
+
+    def handle(self, *args, **options):
+        count = options['count']
+        record = {
+            'email': ' Jane.Doe@Example.com ',
+            'first_name': 'Jane',
+            'last_name': 'Doe',
+            'department': 'IT',
+            'phone': '(555) 123-4567',
+            'hired': '03/15/2021',
+        }
+
+        for expression in EXPRESSIONS:
+            start = time.perf_counter()
+            transformation = compile_transformation(expression)
+            compile_time = time.perf_counter() - start
+
+            value = record['department'] if 'lookup' in expression else record['email']
+            result = transformation(value, record)
+
+            start = time.perf_counter()
+            for _ in range(count):
+                transformation(value, record)
+            run_time = time.perf_counter() - start
+
+            self.stdout.write(f'{expression}')
+            self.stdout.write(
+                f'  -> {result!r}: compiled in {compile_time * 1000:.2f}ms, '
+                f'{count} calls in {run_time:.2f}s ({count / run_time:,.0f}/s, '
+                f'{run_time / count * 1e9:.0f}ns per call)'
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'Benchmarked {len(EXPRESSIONS)} expressions'))
@@ -232,6 +232,7 @@ class Command(BaseCommand):
             sync.records_processed = created_count + updated_count
             sync.records_created = created_count
             sync.records_updated = updated_count
+            sync.records_skipped = profile_service.skipped_count
             sync.save()
             
             # Update datasource status
@@ -232,6 +232,20 @@ def handle_datasource_deletion(sender, instance, **kwargs):
             except ImportError:
                 logger.warning(f"Could not import CSV models for cleanup")
         
+        # Handle Parquet-specific cleanup
+        if instance.type == 'parquet':
+            from datasources.parquet_models import ParquetFileUpload
+            
+            # Delete the uploaded files, the records go with the data source
+            uploads = ParquetFileUpload.objects.filter(parquet_datasource__datasource=instance)
+            for upload in uploads:
+                try:
+                    if upload.file:
+                        upload.file.delete(save=False)
+                except Exception as file_error:
+                    logger.error(f"Error deleting file {upload.file}: {str(file_error)}")
+            logger.info(f"Deleted {len(uploads)} Parquet file uploads from data source {instance.name}")
+        
         logger.info(f"Successfully cleaned up all data for data source: {instance.name}")
         
     except Exception as e:
@@ -277,3 +291,48 @@ class AttributeDisplayConfig(models.Model):
 
 
 
+
+
+class RecordFingerprint(models.Model):
+    """
+    Hash of the mapped values last integrated from a source record, used to
+    skip records that have not changed since the previous sync.
+    """
+    datasource = models.ForeignKey(
+        DataSource,
+        on_delete=models.CASCADE,
+        related_name='record_fingerprints'
+    )
+    source_record_id = models.CharField(_('Source Record ID'), max_length=255)
+    person = models.ForeignKey(
+        'users.Person',
+        on_delete=models.CASCADE,
+        related_name='record_fingerprints'
+    )
+    fingerprint = models.CharField(_('Fingerprint'), max_length=64)
+    last_updated = models.DateTimeField(_('Last Updated'), auto_now=True)
+    
+    class Meta:
+        verbose_name = _('Record Fingerprint')
+        verbose_name_plural = _('Record Fingerprints')
+        unique_together = ('datasource', 'source_record_id')
+    
+    def __str__(self):
+        return f"{self.datasource.name}: {self.source_record_id}"
+
+class StagedRecordId(models.Model):
+    """
+    Record IDs seen by a sync, staged so the database can compute which
+    attribute sources went missing from a data source.
+    Rows only live for the duration of ProfileIntegrationService.remove_missing_attributes.
+    """
+    stage = models.UUIDField(_('Stage'))
+    record_id = models.CharField(_('Record ID'), max_length=255)
+    
+    class Meta:
+        verbose_name = _('Staged Record ID')
+        verbose_name_plural = _('Staged Record IDs')
+        indexes = [models.Index(fields=['stage', 'record_id'])]
+    
+    def __str__(self):
+        return f"{self.stage}: {self.record_id}"
@@ -0,0 +1,319 @@
+# users/services/fuzzy_matching.py
+import logging
+import re
+from collections import Counter
+
+from django.conf import settings
+
+from users.services.identity_index import IdentityIndex
+
+logger = logging.getLogger(__name__)
+
+# Candidates scored per record, ranked by the number of shared blocking keys
+MAX_CANDIDATES = 20
+
+# Blocks holding more persons than this are too common to narrow anything down
+MAX_BLOCK_SIZE = 500
+
+# Single-token values up to this length also get one blocking key per deleted character
+MAX_DELETION_KEY_LENGTH = 12
+
+_TOKEN_RE = re.compile(r'[^a-z0-9]+')
+
+# Only names and email addresses are scored; a typo in any other key, e.g. an
+# employee ID one digit off, identifies another person rather than the same one
+_FUZZY_ATTRIBUTE_RE = re.compile(r'name|mail', re.IGNORECASE)
+
+# Values made of digits and separators only, e.g. '100234' or '555-0142'
+_IDENTIFIER_RE = re.compile(r'^[\d\W_]+$')
+
+_SOUNDEX_CODES = {}
+for _letters, _code in (('bfpv', '1'), ('cgjkqsxz', '2'), ('dt', '3'), ('l', '4'), ('mn', '5'), ('r', '6')):
+    for _letter in _letters:
+        _SOUNDEX_CODES[_letter] = _code
+
+
+def soundex(token):
+    """
+    Return the American Soundex code of an alphabetic token.
+    """
+    token = token.lower()
+    if not token:
+        return ''
+
+    code = token[0].upper()
+    previous = _SOUNDEX_CODES.get(token[0], '')
+    for letter in token[1:]:
+        digit = _SOUNDEX_CODES.get(letter, '')
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        # 'h' and 'w' do not separate letters with the same code
+        if letter not in 'hw':
+            previous = digit
+
+    return code.ljust(4, '0')
+
+
+def jaro_winkler(a, b, prefix_scale=0.1):
+    """
+    Return the Jaro-Winkler similarity of two strings, from 0.0 to 1.0.
+    """
+    if a == b:
+        return 1.0
+    len_a, len_b = len(a), len(b)
+    if not len_a or not len_b:
+        return 0.0
+
+    window = max(max(len_a, len_b) // 2 - 1, 0)
+    matched_b = [False] * len_b
+    matches_a = []
+
+    for i, char in enumerate(a):
+        start = max(0, i - window)
+        end = min(i + window + 1, len_b)
+        for j in range(start, end):
+            if not matched_b[j] and b[j] == char:
+                matched_b[j] = True
+                matches_a.append(char)
+                break
+
+    matches = len(matches_a)
+    if not matches:
+        return 0.0
+
+    matches_b = [b[j] for j in range(len_b) if matched_b[j]]
+    transpositions = sum(1 for x, y in zip(matches_a, matches_b) if x != y) / 2
+
+    jaro = (matches / len_a + matches / len_b + (matches - transpositions) / matches) / 3
+
+    prefix = 0
+    for x, y in zip(a[:4], b[:4]):
+        if x != y:
+            break
+        prefix += 1
+
+    return jaro + prefix * prefix_scale * (1 - jaro)
+
+
+def is_fuzzy_attribute(attribute_name):
+    """
+    Return whether an attribute holds names or email addresses, which may be scored by similarity.
+    """
+    return bool(_FUZZY_ATTRIBUTE_RE.search(attribute_name))
+
+
+def looks_like_identifier(value):
+    """
+    Return whether a normalized key value looks like a numeric ID, which only matches exactly.
+    """
+    return bool(_IDENTIFIER_RE.match(value))
+
+
+def similarity(a, b):
+    """
+    Score how likely two normalized key values refer to the same identity.
+    Email addresses compare their local parts and are penalized for differing domains.
+    """
+    if a == b:
+        return 1.0
+
+    if '@' in a and '@' in b:
+        local_a, _, domain_a = a.rpartition('@')
+        local_b, _, domain_b = b.rpartition('@')
+        score = jaro_winkler(local_a, local_b)
+        return score if domain_a == domain_b else score * 0.9
+
+    return jaro_winkler(a, b)
+
+
+def blocking_keys(value):
+    """
+    Return the blocking keys of a normalized key value.
+
+    Values sharing at least one blocking key are compared during fuzzy
+    matching. The keys are chosen so that a single typo leaves at least one
+    of them intact:
+    - the Soundex codes of all tokens together
+    - each token spelled exactly, plus the initials of the other tokens
+    - for single-token values such as usernames, the token with one character deleted
+    """
+    if '@' in value:
+        value = value.rpartition('@')[0]
+
+    tokens = [token for token in _TOKEN_RE.split(value) if token]
+    if not tokens:
+        return set()
+
+    keys = {'S:' + '.'.join(token if token.isdigit() else soundex(token) for token in tokens)}
+
+    if len(tokens) == 1:
+        token = tokens[0]
+        keys.add('T:' + token)
+        if len(token) <= MAX_DELETION_KEY_LENGTH:
+            keys.update('D:' + token[:i] + token[i + 1:] for i in range(len(token)))
+    else:
+        initials = [token[0] for token in tokens]
+        for i, token in enumerate(tokens[:4]):
+            keys.add(f'T{i}:{token}|' + ''.join(initials[:i] + initials[i + 1:]))
+
+    return keys
+
+
+class FuzzyIndex(IdentityIndex):
+    """
+    Identity index that falls back to similarity scoring when no key value
+    matches exactly.
+
+    Every indexed value is also filed under its blocking keys, so a record
+    is only scored against the few persons sharing a blocking key with it
+    rather than against every attribute source. A candidate's confidence is
+    the mean over the record's name and email attributes of the best
+    similarity with the candidate's values, and must reach the threshold to
+    match.
+
+    Other key attributes, those listed in exact_attributes (defaulting to the
+    IDENTITY_EXACT_MATCH_ATTRIBUTES setting) and values that look like
+    numeric IDs only match exactly. A candidate holding a different value for
+    such an attribute than the record is never fuzzy matched.
+    """
+    def __init__(self, attribute_names, normalize=str, threshold=0.9,
+                 max_candidates=MAX_CANDIDATES, max_block_size=MAX_BLOCK_SIZE,
+                 exact_attributes=None):
+        super().__init__(attribute_names, normalize)
+        self.threshold = threshold
+        self.max_candidates = max_candidates
+        self.max_block_size = max_block_size
+        if exact_attributes is None:
+            exact_attributes = getattr(settings, 'IDENTITY_EXACT_MATCH_ATTRIBUTES', ())
+        self.fuzzy_attributes = {
+            attribute_name for attribute_name in self.attribute_names
+            if attribute_name not in exact_attributes and is_fuzzy_attribute(attribute_name)
+        }
+        # (attribute_name, blocking key) -> person IDs
+        self._blocks = {}
+        # person_id -> {attribute_name: [normalized values]}
+        self._values = {}
+
+    def build(self):
+        self._blocks = {}
+        self._values = {}
+        return super().build()
+
+    def add(self, attribute_name, value, person_id):
+        super().add(attribute_name, value, person_id)
+        if attribute_name not in self.attribute_names:
+            return
+
+        value = self.normalize(value)
+        self._values.setdefault(person_id, {}).setdefault(attribute_name, []).append(value)
+        if not self._is_fuzzy(attribute_name, value):
+            return
+        for key in blocking_keys(value):
+            self._blocks.setdefault((attribute_name, key), set()).add(person_id)
+
+    def remove(self, attribute_name, value, person_id):
+        super().remove(attribute_name, value, person_id)
+        if attribute_name not in self.attribute_names:
+            return
+
+        value = self.normalize(value)
+        values = self._values.get(person_id, {}).get(attribute_name)
+        if not values or value not in values:
+            return
+        values.remove(value)
+        if not self._is_fuzzy(attribute_name, value):
+            return
+
+        # Only drop blocking keys no remaining value of the person still produces
+        remaining = set()
+        for other in values:
+            if self._is_fuzzy(attribute_name, other):
+                remaining |= blocking_keys(other)
+        for key in blocking_keys(value) - remaining:
+            block = self._blocks.get((attribute_name, key))
+            if block is not None:
+                block.discard(person_id)
+                if not block:
+                    del self._blocks[(attribute_name, key)]
+
+    def _is_fuzzy(self, attribute_name, value):
+        """
+        Return whether a normalized value of an attribute is scored by similarity.
+        """
+        return attribute_name in self.fuzzy_attributes and not looks_like_identifier(value)
+
+    def match(self, match_fields):
+        """
+        Return the exactly matching person ID, or the most similar candidate
+        whose confidence reaches the threshold, or None.
+        """
+        person_id = super().match(match_fields)
+        if person_id is not None:
+            return person_id
+
+        person_id, confidence = self.best_match(match_fields)
+        if person_id is not None and confidence >= self.threshold:
+            logger.debug(f"Fuzzy matched person {person_id} with confidence {confidence:.3f}")
+            return person_id
+        return None
+
+    def best_match(self, match_fields):
+        """
+        Return (person_id, confidence) for the highest scoring candidate.
+        """
+        normalized = {
+            attribute_name: self.normalize(value)
+            for attribute_name, value in match_fields.items()
+            if attribute_name in self.attribute_names
+        }
+
+        fuzzy = {
+            attribute_name: value
+            for attribute_name, value in normalized.items()
+            if self._is_fuzzy(attribute_name, value)
+        }
+        exact = {
+            attribute_name: value
+            for attribute_name, value in normalized.items()
+            if attribute_name not in fuzzy
+        }
+
+        best_id, best_score = None, 0.0
+        for person_id in self.candidates(fuzzy):
+            person_values = self._values.get(person_id, {})
+
+            # A differing ID rules the candidate out, however similar the names
+            if any(
+                person_values.get(attribute_name) and value not in person_values[attribute_name]
+                for attribute_name, value in exact.items()
+            ):
+                continue
+
+            scores = []
+            for attribute_name, value in fuzzy.items():
+                candidates = person_values.get(attribute_name)
+                if candidates:
+                    scores.append(max(similarity(value, other) for other in candidates))
+            if not scores:
+                continue
+
+            score = sum(scores) / len(scores)
+            if score > best_score:
+                best_id, best_score = person_id, score
+
+        return best_id, best_score
+
+    def candidates(self, normalized):
+        """
+        Return the persons sharing the most blocking keys with the normalized values.
+        """
+        hits = Counter()
+        for attribute_name, value in normalized.items():
+            for key in blocking_keys(value):
+                block = self._blocks.get((attribute_name, key))
+                if block and len(block) <= self.max_block_size:
+                    hits.update(block)
+
+        return [person_id for person_id, _ in hits.most_common(self.max_candidates)]
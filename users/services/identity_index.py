@@ -0,0 +1,107 @@
+# users/services/identity_index.py
+import logging
+
+from users.profile_integration import AttributeSource
+
+logger = logging.getLogger(__name__)
+
+
+class IdentityIndex:
+    """
+    In-memory index of current key attribute values used for identity matching.
+
+    Maps (attribute_name, normalized value) to the persons holding that value,
+    newest first, so a sync can match records with dict lookups instead of
+    one query per key attribute per record. The index is built once at the
+    start of a sync and must be kept in step with the attribute sources the
+    sync writes through add() and remove().
+    """
+    def __init__(self, attribute_names, normalize=str):
+        self.attribute_names = set(attribute_names)
+        self.normalize = normalize
+        self._entries = {}
+
+    def build(self):
+        """
+        Load every current value of the indexed attributes from the database.
+        """
+        self._entries = {}
+        if not self.attribute_names:
+            return self
+
+        # Oldest first, so the most recently updated row ends up at the front
+        # like AttributeSource's default ordering
+        rows = AttributeSource.objects.filter(
+            attribute_name__in=self.attribute_names,
+            is_current=True
+        ).order_by('last_updated').values_list('attribute_name', 'attribute_value', 'person_id')
+
+        for attribute_name, value, person_id in rows.iterator(chunk_size=5000):
+            self.add(attribute_name, value, person_id)
+
+        logger.info(f"Built identity index with {len(self._entries)} key values")
+        return self
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, attribute_name, value):
+        """
+        Return the ID of the person most recently given this key value, or None.
+        """
+        entry = self._entries.get((attribute_name, self.normalize(value)))
+        if entry is None:
+            return None
+        if isinstance(entry, list):
+            return entry[0]
+        return entry
+
+    def match(self, match_fields):
+        """
+        Return the person ID matching the first key attribute found, or None.
+        """
+        for attribute_name, value in match_fields.items():
+            person_id = self.lookup(attribute_name, value)
+            if person_id is not None:
+                return person_id
+        return None
+
+    def add(self, attribute_name, value, person_id):
+        """
+        Record that a person now holds a current key value.
+        """
+        if attribute_name not in self.attribute_names:
+            return
+
+        key = (attribute_name, self.normalize(value))
+        entry = self._entries.get(key)
+
+        # Most keys belong to a single person, so only collisions pay for a list
+        if entry is None:
+            self._entries[key] = person_id
+        elif isinstance(entry, list):
+            entry.insert(0, person_id)
+        else:
+            self._entries[key] = [person_id, entry]
+
+    def remove(self, attribute_name, value, person_id):
+        """
+        Record that one of a person's current key values is no longer current.
+        """
+        if attribute_name not in self.attribute_names:
+            return
+
+        key = (attribute_name, self.normalize(value))
+        entry = self._entries.get(key)
+
+        if entry is None:
+            return
+        if isinstance(entry, list):
+            if person_id in entry:
+                entry.remove(person_id)
+            if len(entry) == 1:
+                self._entries[key] = entry[0]
+            elif not entry:
+                del self._entries[key]
+        elif entry == person_id:
+            del self._entries[key]
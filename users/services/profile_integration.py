@@ -1,22 +1,60 @@
 # users/services/profile_integration.py
+import hashlib
+import json
 import logging
 import re
+import uuid
+from collections import namedtuple
 from datetime import datetime
+from django.conf import settings
 from django.db import transaction
+from django.db.models import Exists, OuterRef
 from django.utils import timezone
 
 from users.models import Person
-from users.profile_integration import AttributeSource, ProfileAttributeChange, ProfileFieldMapping, IdentityResolutionConfig
+from users.profile_integration import (
+    AttributeSource, ProfileAttributeChange, ProfileFieldMapping, IdentityResolutionConfig,
+    RecordFingerprint, StagedRecordId
+)
+from users.services.fuzzy_matching import FuzzyIndex
+from users.services.identity_index import IdentityIndex
+from users.services.transformations import TransformationError, get_transformation
 
 logger = logging.getLogger(__name__)
 
+# Number of records reconciled per transaction by process_batch
+DEFAULT_BATCH_SIZE = 500
+
+# A source record with its mapped and transformed (mapping, value) pairs, as returned by map_record
+MappedRecord = namedtuple('MappedRecord', ['record_data', 'record_id', 'values'])
+
+
+class _BatchState:
+    """
+    In-memory view of the attribute sources touched by one batch of records.
+    """
+    def __init__(self):
+        # person_id -> {(attribute_name, attribute_value): AttributeSource} for this data source
+        self.rows = {}
+        # person_id -> Person
+        self.persons = {}
+        
+        # Pending writes, flushed once at the end of the batch
+        self.to_create = []
+        self.to_update = {}
+        self.changes = []
+        # source_record_id -> (fingerprint, person_id)
+        self.fingerprints = {}
+
+
 class ProfileIntegrationService:
     """
     Service for integrating data source records with user profiles.
     """
-    def __init__(self, datasource, sync=None):
+    def __init__(self, datasource, sync=None, batch_size=None):
         self.datasource = datasource
         self.sync = sync
+        self.batch_size = batch_size or getattr(settings, 'PROFILE_INTEGRATION_BATCH_SIZE', DEFAULT_BATCH_SIZE)
         
         # Get identity resolution config or create default
         try:
@@ -38,6 +76,23 @@ class ProfileIntegrationService:
         
         # Get key field mappings for identity resolution
         self.key_mappings = [m for m in self.mappings if m.is_key_field]
+        self.key_attributes = {m.profile_attribute for m in self.key_mappings}
+        
+        # Compile transformation expressions once for the whole sync
+        self.transformations = {}
+        for mapping in self.mappings:
+            if mapping.mapping_type == 'transform' and mapping.transformation_logic:
+                try:
+                    self.transformations[mapping.id] = get_transformation(mapping)
+                except TransformationError as e:
+                    logger.error(f"Invalid transformation for mapping {mapping}: {str(e)}")
+        
+        # Built on first use and kept up to date for the rest of the sync
+        self.identity_index = None
+        
+        # source_record_id -> fingerprint of the values last integrated, loaded on first use
+        self.fingerprints = None
+        self.skipped_count = 0
     
     def process_record(self, record_data, record_id=None):
         """
@@ -48,7 +103,8 @@ class ProfileIntegrationService:
             record_id: Optional ID of the record in the source system
         
         Returns:
-            Tuple of (person, created, changes_count)
+            Tuple of (person, created, changes_count). Records unchanged since
+            the last sync are skipped and return (None, False, 0).
         """
         if not self.mappings:
             logger.warning(f"No field mappings configured for {self.datasource.name}")
@@ -59,20 +115,23 @@ class ProfileIntegrationService:
             logger.info(f"Identity resolution disabled for {self.datasource.name}")
             return None, False, 0
         
+        values = list(self._iter_mapped_values(record_data))
+        
+        # Skip records whose mapped values have not changed since they were last integrated
+        fingerprint = None
+        if record_id:
+            fingerprint = self._record_fingerprint(values)
+            if self._get_fingerprints().get(record_id) == fingerprint:
+                self.skipped_count += 1
+                return None, False, 0
+        
         # Debug log the record data and mappings
         logger.debug(f"Processing record: {record_data}")
         logger.debug(f"Key mappings: {[m.source_field.name for m in self.key_mappings]}")
         
         # Build key-value pairs for matching
-        match_fields = {}
-        for mapping in self.key_mappings:
-            field_name = mapping.source_field.name
-            if field_name in record_data and record_data[field_name]:
-                match_fields[mapping.profile_attribute] = record_data[field_name]
-        
+        match_fields = self._build_match_fields(record_data)
         if not match_fields:
-            logger.warning(f"No key fields found in record for {self.datasource.name}. Available fields: {list(record_data.keys())}")
-            logger.warning(f"Key mappings: {[f'{m.source_field.name} -> {m.profile_attribute}' for m in self.key_mappings]}")
             return None, False, 0
         
         logger.info(f"Match fields: {match_fields}")
@@ -94,10 +153,442 @@ class ProfileIntegrationService:
             return None, False, 0
         
         # Process all field mappings and update attributes
-        changes_count = self._update_person_attributes(person, record_data, record_id)
+        changes_count = self._update_person_attributes(person, values, record_id, fingerprint)
         
         return person, created, changes_count
     
+    def process_batch(self, records):
+        """
+        Process many records from a data source in batches.
+        
+        Produces the same profile changes as calling process_record on each
+        record in order, but resolves identities and preloads attribute
+        sources for a whole batch at once and writes the changes with bulk
+        operations in a single transaction per batch.
+        
+        Args:
+            records: Iterable of (record_data, record_id) tuples, or of
+                MappedRecords already returned by map_record
+        
+        Returns:
+            List of (person, created, changes_count) tuples, one per record
+        """
+        results = []
+        chunk = []
+        
+        for record in records:
+            if not isinstance(record, MappedRecord):
+                record = self.map_record(*record)
+            chunk.append(record)
+            if len(chunk) >= self.batch_size:
+                results.extend(self._process_chunk(chunk))
+                chunk = []
+        
+        if chunk:
+            results.extend(self._process_chunk(chunk))
+        
+        return results
+    
+    def map_record(self, record_data, record_id=None):
+        """
+        Apply the field mappings and transformations to a record.
+        
+        Returns:
+            MappedRecord of the record and its (mapping, value) pairs
+        """
+        return MappedRecord(record_data, record_id, list(self._iter_mapped_values(record_data)))
+    
+    def _process_chunk(self, chunk):
+        """
+        Reconcile one batch of records, replaying them one at a time if the bulk write fails.
+        """
+        if not self.mappings:
+            logger.warning(f"No field mappings configured for {self.datasource.name}")
+            return [(None, False, 0)] * len(chunk)
+        
+        if not self.id_config.is_enabled:
+            logger.info(f"Identity resolution disabled for {self.datasource.name}")
+            return [(None, False, 0)] * len(chunk)
+        
+        skipped_count = self.skipped_count
+        try:
+            with transaction.atomic():
+                results = self._reconcile_chunk(chunk)
+            logger.info(f"Reconciled batch of {len(chunk)} records for {self.datasource.name}")
+            return results
+        except Exception as e:
+            logger.error(f"Batch reconciliation failed, replaying {len(chunk)} records individually: {str(e)}")
+            # The rolled back batch may have updated the index and fingerprints, so reload them
+            self.identity_index = None
+            self.fingerprints = None
+            self.skipped_count = skipped_count
+        
+        results = []
+        for record_data, record_id, _ in chunk:
+            try:
+                results.append(self.process_record(record_data, record_id))
+            except Exception as record_error:
+                logger.error(f"Error processing record {record_id}: {str(record_error)}")
+                results.append((None, False, 0))
+        return results
+    
+    def _reconcile_chunk(self, chunk):
+        """
+        Match, diff and write a batch of records using preloaded state.
+        """
+        state = _BatchState()
+        fingerprints = self._get_fingerprints()
+        
+        # Fingerprint the records up front so unchanged ones are never matched
+        fingerprint_list = []
+        match_fields_list = []
+        for record_data, record_id, values in chunk:
+            fingerprint = self._record_fingerprint(values) if record_id else None
+            fingerprint_list.append(fingerprint)
+            if fingerprint and fingerprints.get(record_id) == fingerprint:
+                match_fields_list.append(None)
+            else:
+                match_fields_list.append(self._build_match_fields(record_data))
+        
+        # Preload the persons the batch currently matches and their attribute sources
+        if self._uses_identity_index():
+            index = self._get_identity_index()
+            self._load_batch_persons(state, [index.match(match_fields) for match_fields in match_fields_list if match_fields])
+        
+        results = []
+        for (record_data, record_id, values), match_fields, fingerprint in zip(chunk, match_fields_list, fingerprint_list):
+            # Checked again here as an earlier record of the batch may share the record ID
+            if fingerprint and fingerprints.get(record_id) == fingerprint:
+                self.skipped_count += 1
+                results.append((None, False, 0))
+                continue
+            
+            if match_fields is None:
+                match_fields = self._build_match_fields(record_data)
+            if not match_fields:
+                results.append((None, False, 0))
+                continue
+            
+            person = self._match_from_state(state, match_fields)
+            
+            created = False
+            if not person and self.id_config.create_missing_profiles:
+                person = self._create_new_person(record_data)
+                created = True
+            
+            if not person:
+                logger.warning("Could not find or create a matching person")
+                results.append((None, False, 0))
+                continue
+            
+            state.persons[person.id] = person
+            self._load_batch_persons(state, [person.id])
+            
+            changes_count = 0
+            for mapping, value in values:
+                if mapping.is_multivalued:
+                    changes_count += self._batch_multi_valued_attribute(state, person, mapping, value, record_id)
+                else:
+                    changes_count += self._batch_single_valued_attribute(state, person, mapping, value, record_id)
+            
+            if fingerprint:
+                fingerprints[record_id] = fingerprint
+                state.fingerprints[record_id] = (fingerprint, person.id)
+            
+            results.append((person, created, changes_count))
+        
+        self._flush_batch(state)
+        return results
+    
+    def _build_match_fields(self, record_data):
+        """
+        Build the key attribute values used to match a record to a person.
+        """
+        match_fields = {}
+        for mapping in self.key_mappings:
+            field_name = mapping.source_field.name
+            if field_name in record_data and record_data[field_name]:
+                match_fields[mapping.profile_attribute] = record_data[field_name]
+        
+        if not match_fields:
+            logger.warning(f"No key fields found in record for {self.datasource.name}. Available fields: {list(record_data.keys())}")
+            logger.warning(f"Key mappings: {[f'{m.source_field.name} -> {m.profile_attribute}' for m in self.key_mappings]}")
+        
+        return match_fields
+    
+    def _uses_identity_index(self):
+        """
+        Whether the configured matching method is served by the identity index.
+        """
+        return self.id_config.matching_method in ('exact', 'case_insensitive', 'fuzzy')
+    
+    def _normalize_key(self, value):
+        """
+        Normalize a key value the way the configured matching method compares it.
+        """
+        value = str(value)
+        if self.id_config.matching_method in ('case_insensitive', 'fuzzy'):
+            return value.lower()
+        return value
+    
+    def _get_identity_index(self):
+        """
+        Get the identity index for this sync, building it on first use.
+        """
+        if self.identity_index is None:
+            if self.id_config.matching_method == 'fuzzy':
+                index = FuzzyIndex(
+                    self.key_attributes,
+                    self._normalize_key,
+                    threshold=self.id_config.match_confidence_threshold
+                )
+            else:
+                index = IdentityIndex(self.key_attributes, self._normalize_key)
+            self.identity_index = index.build()
+        return self.identity_index
+    
+    def _index_key_value(self, attribute_name, value, person_id, is_current=True):
+        """
+        Keep an already built identity index in step with a written attribute source.
+        """
+        if self.identity_index is None:
+            return
+        if is_current:
+            self.identity_index.add(attribute_name, value, person_id)
+        else:
+            self.identity_index.remove(attribute_name, value, person_id)
+    
+    def _load_batch_persons(self, state, person_ids):
+        """
+        Load persons and this data source's attribute sources not yet in the batch state.
+        """
+        missing = {person_id for person_id in person_ids if person_id is not None and person_id not in state.rows}
+        if not missing:
+            return
+        
+        unloaded = [person_id for person_id in missing if person_id not in state.persons]
+        if unloaded:
+            state.persons.update(Person.objects.in_bulk(unloaded))
+        
+        for person_id in missing:
+            state.rows[person_id] = {}
+        
+        for row in AttributeSource.objects.filter(datasource=self.datasource, person_id__in=missing):
+            state.rows[row.person_id][(row.attribute_name, row.attribute_value)] = row
+    
+    def _match_from_state(self, state, match_fields):
+        """
+        Find a matching person using the identity index and batch state.
+        """
+        if not self._uses_identity_index():
+            return self._find_matching_person(match_fields)
+        
+        person_id = self._get_identity_index().match(match_fields)
+        if person_id is None:
+            return None
+        
+        self._load_batch_persons(state, [person_id])
+        return state.persons.get(person_id)
+    
+    def _iter_mapped_values(self, record_data):
+        """
+        Yield (mapping, value) pairs for the mapped fields present in a record.
+        """
+        for mapping in self.mappings:
+            field_name = mapping.source_field.name
+            if field_name not in record_data:
+                continue
+            
+            # Get the attribute value
+            value = record_data[field_name]
+            
+            # Apply transformations if needed
+            if mapping.mapping_type == 'transform' and mapping.transformation_logic:
+                value = self._apply_transformation(value, mapping, record_data)
+            
+            if value is None:
+                continue
+            
+            # Convert to string for storage
+            if not isinstance(value, str):
+                value = str(value)
+            
+            yield mapping, value
+    
+    def _batch_single_valued_attribute(self, state, person, mapping, value, record_id):
+        """
+        Batch counterpart of _update_single_valued_attribute.
+        """
+        attribute_name = mapping.profile_attribute
+        rows = state.rows[person.id]
+        current = [row for row in rows.values() if row.attribute_name == attribute_name and row.is_current]
+        
+        if len(current) > 1:
+            logger.error(f"Error updating attribute {attribute_name}: multiple current values for {person}")
+            return 0
+        
+        if current:
+            existing = current[0]
+            
+            # If value hasn't changed, do nothing
+            if existing.attribute_value == value:
+                return 0
+            
+            self._set_batch_row_current(state, existing, False)
+            state.changes.append(ProfileAttributeChange(
+                person=person,
+                attribute_name=attribute_name,
+                old_value=existing.attribute_value,
+                new_value=value,
+                change_type='modify',
+                datasource=self.datasource,
+                sync=self.sync
+            ))
+        else:
+            state.changes.append(ProfileAttributeChange(
+                person=person,
+                attribute_name=attribute_name,
+                new_value=value,
+                change_type='add',
+                datasource=self.datasource,
+                sync=self.sync
+            ))
+        
+        # Reuse a previous row with the same value, otherwise add a new one
+        previous = rows.get((attribute_name, value))
+        if previous is not None:
+            previous.mapping = mapping
+            previous.source_record_id = record_id or ''
+            self._set_batch_row_current(state, previous, True)
+        else:
+            self._add_batch_row(state, person, mapping, value, record_id)
+        
+        return 1
+    
+    def _batch_multi_valued_attribute(self, state, person, mapping, value, record_id):
+        """
+        Batch counterpart of _update_multi_valued_attribute.
+        """
+        attribute_name = mapping.profile_attribute
+        existing = state.rows[person.id].get((attribute_name, value))
+        
+        if existing is not None:
+            # If it's already current, no change needed
+            if existing.is_current:
+                return 0
+            self._set_batch_row_current(state, existing, True)
+        else:
+            self._add_batch_row(state, person, mapping, value, record_id)
+        
+        state.changes.append(ProfileAttributeChange(
+            person=person,
+            attribute_name=attribute_name,
+            new_value=value,
+            change_type='add',
+            datasource=self.datasource,
+            sync=self.sync
+        ))
+        return 1
+    
+    def _add_batch_row(self, state, person, mapping, value, record_id):
+        """
+        Queue a new current attribute source for creation.
+        """
+        row = AttributeSource(
+            person=person,
+            attribute_name=mapping.profile_attribute,
+            attribute_value=value,
+            datasource=self.datasource,
+            mapping=mapping,
+            source_record_id=record_id or '',
+            is_current=True
+        )
+        state.rows[person.id][(row.attribute_name, row.attribute_value)] = row
+        state.to_create.append(row)
+        self._index_key_value(row.attribute_name, row.attribute_value, person.id)
+    
+    def _set_batch_row_current(self, state, row, is_current):
+        """
+        Flip the current flag of a batch row and queue it for writing.
+        """
+        row.is_current = is_current
+        row.last_updated = timezone.now()
+        if row.pk:
+            state.to_update[row.pk] = row
+        self._index_key_value(row.attribute_name, row.attribute_value, row.person_id, is_current)
+    
+    def _flush_batch(self, state):
+        """
+        Write all pending batch changes with bulk operations.
+        """
+        if state.to_update:
+            AttributeSource.objects.bulk_update(
+                list(state.to_update.values()),
+                ['is_current', 'last_updated', 'mapping', 'source_record_id'],
+                batch_size=self.batch_size
+            )
+        
+        if state.to_create:
+            AttributeSource.objects.bulk_create(state.to_create, batch_size=self.batch_size)
+        
+        if state.changes:
+            ProfileAttributeChange.objects.bulk_create(state.changes, batch_size=self.batch_size)
+        
+        if state.fingerprints:
+            # Replace rather than update, so new and known records take the same two queries
+            RecordFingerprint.objects.filter(
+                datasource=self.datasource,
+                source_record_id__in=list(state.fingerprints)
+            ).delete()
+            RecordFingerprint.objects.bulk_create([
+                RecordFingerprint(
+                    datasource=self.datasource,
+                    source_record_id=record_id,
+                    person_id=person_id,
+                    fingerprint=fingerprint
+                )
+                for record_id, (fingerprint, person_id) in state.fingerprints.items()
+            ], batch_size=self.batch_size)
+    
+    def _record_fingerprint(self, values):
+        """
+        Hash the mapped and transformed (mapping, value) pairs of a record.
+        """
+        values = [(mapping.id, mapping.profile_attribute, value) for mapping, value in values]
+        return hashlib.sha256(json.dumps(values).encode('utf-8')).hexdigest()
+    
+    def is_integrated(self, record):
+        """
+        Whether the current values of a MappedRecord have been integrated,
+        in this sync or an earlier one, as its fingerprint was stored.
+        """
+        if not record.record_id:
+            return False
+        return self._get_fingerprints().get(record.record_id) == self._record_fingerprint(record.values)
+    
+    def _get_fingerprints(self):
+        """
+        Get the fingerprints of this data source's records, loading them on first use.
+        """
+        if self.fingerprints is None:
+            rows = RecordFingerprint.objects.filter(
+                datasource=self.datasource
+            ).values_list('source_record_id', 'fingerprint')
+            self.fingerprints = dict(rows.iterator(chunk_size=5000))
+            logger.info(f"Loaded {len(self.fingerprints)} record fingerprints for {self.datasource.name}")
+        return self.fingerprints
+    
+    def _save_fingerprint(self, record_id, fingerprint, person):
+        """
+        Remember the fingerprint of a record that has just been integrated.
+        """
+        RecordFingerprint.objects.update_or_create(
+            datasource=self.datasource,
+            source_record_id=record_id,
+            defaults={'person': person, 'fingerprint': fingerprint}
+        )
+        self._get_fingerprints()[record_id] = fingerprint
+    
     def _find_matching_person(self, match_fields):
         """
         Find a person matching the given key fields using the configured matching method.
@@ -121,19 +612,10 @@ class ProfileIntegrationService:
         Find an exact match for the given fields.
         """
         try:
-            for attribute, value in match_fields.items():
-                # Look for attribute sources that match this key
-                attr_sources = AttributeSource.objects.filter(
-                    attribute_name=attribute,
-                    attribute_value=value,
-                    is_current=True
-                )
-                
-                if attr_sources.exists():
-                    # Return the first matching person
-                    return attr_sources.first().person
-            
-            return None
+            person_id = self._get_identity_index().match(match_fields)
+            if person_id is None:
+                return None
+            return Person.objects.filter(pk=person_id).first()
         except Exception as e:
             logger.error(f"Error in exact matching: {str(e)}")
             return None
@@ -141,21 +623,13 @@ class ProfileIntegrationService:
     def _case_insensitive_match(self, match_fields):
         """
         Find a case-insensitive match for the given fields.
+        The identity index lower-cases key values for this matching method.
         """
         try:
-            for attribute, value in match_fields.items():
-                # Look for attribute sources that match this key (case insensitive)
-                attr_sources = AttributeSource.objects.filter(
-                    attribute_name=attribute,
-                    attribute_value__iexact=value,
-                    is_current=True
-                )
-                
-                if attr_sources.exists():
-                    # Return the first matching person
-                    return attr_sources.first().person
-            
-            return None
+            person_id = self._get_identity_index().match(match_fields)
+            if person_id is None:
+                return None
+            return Person.objects.filter(pk=person_id).first()
         except Exception as e:
             logger.error(f"Error in case-insensitive matching: {str(e)}")
             return None
@@ -163,12 +637,17 @@ class ProfileIntegrationService:
     def _fuzzy_match(self, match_fields):
         """
         Find a fuzzy match for the given fields.
-        This is a simplified version - a real implementation would use a more 
-        sophisticated fuzzy matching algorithm.
+        Exact (case-insensitive) key matches win; otherwise the most similar
+        candidate must reach the configured match confidence threshold.
         """
-        # Placeholder for fuzzy matching - would need a real implementation
-        logger.warning("Fuzzy matching is not fully implemented")
-        return self._case_insensitive_match(match_fields)
+        try:
+            person_id = self._get_identity_index().match(match_fields)
+            if person_id is None:
+                return None
+            return Person.objects.filter(pk=person_id).first()
+        except Exception as e:
+            logger.error(f"Error in fuzzy matching: {str(e)}")
+            return None
     
     def _custom_match(self, match_fields):
         """
@@ -246,33 +725,17 @@ class ProfileIntegrationService:
             return None
 
     
-    def _update_person_attributes(self, person, record_data, record_id):
+    def _update_person_attributes(self, person, values, record_id, fingerprint=None):
         """
-        Update a person's attributes based on record data and return the number of changes.
+        Update a person's attributes from a record's mapped values and return the number of changes.
+        The record's fingerprint is only saved once every attribute was updated.
         """
         changes_count = 0
+        failed = False
         
         try:
             # Process each field mapping - using smaller transactions
-            for mapping in self.mappings:
-                field_name = mapping.source_field.name
-                if field_name not in record_data:
-                    continue
-                
-                # Get the attribute value
-                value = record_data[field_name]
-                
-                # Apply transformations if needed
-                if mapping.mapping_type == 'transform' and mapping.transformation_logic:
-                    value = self._apply_transformation(value, mapping.transformation_logic)
-                
-                if value is None:
-                    continue
-                
-                # Convert to string for storage
-                if not isinstance(value, str):
-                    value = str(value)
-                
+            for mapping, value in values:
                 # Handle attribute update based on mapping type - in its own transaction
                 try:
                     with transaction.atomic():
@@ -284,20 +747,31 @@ class ProfileIntegrationService:
                     changes_count += changes
                 except Exception as attr_error:
                     logger.error(f"Error updating attribute {mapping.profile_attribute}: {str(attr_error)}")
+                    failed = True
                     # Continue with next attribute
             
+            if fingerprint and not failed:
+                self._save_fingerprint(record_id, fingerprint, person)
+            
             return changes_count
         except Exception as e:
             logger.error(f"Error updating person attributes: {str(e)}")
             return 0
     
-    def _apply_transformation(self, value, transformation_logic):
+    def _apply_transformation(self, value, mapping, record_data):
         """
-        Apply a transformation to a value using the provided logic.
+        Apply a mapping's compiled transformation to a value.
+        Returns None, so the attribute is skipped, if the transformation is invalid or fails.
         """
-        # Placeholder - would need a safe way to execute transformations
-        # For now, just return the original value
-        return value
+        transformation = self.transformations.get(mapping.id)
+        if transformation is None:
+            return None
+        
+        try:
+            return transformation(value, record_data)
+        except Exception as e:
+            logger.warning(f"Transformation for {mapping.profile_attribute} failed on value {value!r}: {str(e)}")
+            return None
     
     def _update_single_valued_attribute(self, person, mapping, value, record_id):
         """
@@ -334,6 +808,8 @@ class ProfileIntegrationService:
             )
             
         except AttributeSource.DoesNotExist:
+            existing = None
+            
             # This is a new attribute for this person from this source
             ProfileAttributeChange.objects.create(
                 person=person,
@@ -344,17 +820,23 @@ class ProfileIntegrationService:
                 sync=self.sync
             )
         
-        # Create new current attribute
-        AttributeSource.objects.create(
+        # Create new current attribute, reusing a previous row with the same value
+        AttributeSource.objects.update_or_create(
             person=person,
             attribute_name=attribute_name,
             attribute_value=value,
             datasource=self.datasource,
-            mapping=mapping,
-            source_record_id=record_id or '',
-            is_current=True
+            defaults={
+                'mapping': mapping,
+                'source_record_id': record_id or '',
+                'is_current': True
+            }
         )
         
+        if existing is not None:
+            self._index_key_value(attribute_name, existing.attribute_value, person.id, is_current=False)
+        self._index_key_value(attribute_name, value, person.id)
+        
         return 1
     
     def _update_multi_valued_attribute(self, person, mapping, value, record_id):
@@ -388,6 +870,7 @@ class ProfileIntegrationService:
                     sync=self.sync
                 )
                 
+                self._index_key_value(attribute_name, value, person.id)
                 return 1
             
             # If it's already current, no change needed
@@ -415,46 +898,136 @@ class ProfileIntegrationService:
                 sync=self.sync
             )
             
+            self._index_key_value(attribute_name, value, person.id)
             return 1
     
-    def remove_missing_attributes(self, current_record_ids):
+    def stage_record_ids(self, record_ids, stage):
+        """
+        Stage record IDs seen by a sync for a later remove_missing_attributes(stage=stage).
+        Lets several workers each stage the records they processed before the removal runs once.
+        
+        Returns:
+            Number of record IDs staged
+        """
+        staged = [StagedRecordId(stage=stage, record_id=str(record_id)) for record_id in set(record_ids) if record_id]
+        StagedRecordId.objects.bulk_create(staged, batch_size=self.batch_size)
+        return len(staged)
+    
+    def remove_missing_attributes(self, current_record_ids=None, stage=None):
         """
         Mark attributes as removed if they came from records no longer in the data source.
         Only applicable for data sources that provide record IDs.
         
         Args:
             current_record_ids: List of record IDs currently in the data source
+            stage: Key of record IDs already staged with stage_record_ids, used instead of current_record_ids
         
         Returns:
             Number of attributes removed
         """
-        if not current_record_ids:
-            # Can't determine what's missing without record IDs
+        staged_here = stage is None
+        if staged_here:
+            if not current_record_ids:
+                # Can't determine what's missing without record IDs
+                return 0
+            stage = uuid.uuid4()
+        elif not StagedRecordId.objects.filter(stage=stage).exists():
             return 0
         
-        removed_count = 0
+        # Stage the seen record IDs so the stale set is a single anti-join
+        # instead of a NOT IN list with one parameter per record
+        try:
+            with transaction.atomic():
+                if staged_here:
+                    self.stage_record_ids(current_record_ids, stage)
+                
+                removed_count = self._remove_staged_attributes(stage, missing=True)
+                StagedRecordId.objects.filter(stage=stage).delete()
+        except Exception:
+            # The index may already reflect removals that were rolled back
+            self.identity_index = None
+            raise
+        
+        logger.info(f"Removed {removed_count} attributes missing from data source {self.datasource.name}")
+        return removed_count
+    
+    def remove_record_attributes(self, record_ids):
+        """
+        Mark attributes as removed if they came from the given records, which
+        are known to be deleted from the data source, e.g. by an incremental diff.
+        
+        Args:
+            record_ids: Record IDs deleted from the data source
+        
+        Returns:
+            Number of attributes removed
+        """
+        if not record_ids:
+            return 0
+        
+        stage = uuid.uuid4()
+        try:
+            with transaction.atomic():
+                self.stage_record_ids(record_ids, stage)
+                removed_count = self._remove_staged_attributes(stage, missing=False)
+                StagedRecordId.objects.filter(stage=stage).delete()
+        except Exception:
+            self.identity_index = None
+            raise
+        
+        logger.info(f"Removed {removed_count} attributes of deleted records from data source {self.datasource.name}")
+        return removed_count
+    
+    def _remove_staged_attributes(self, stage, missing):
+        """
+        Mark current attributes as removed, recording a change for each.
+        
+        Args:
+            stage: Key of the staged record IDs
+            missing: Remove attributes of records not staged (True) or of the staged records (False)
+        
+        Returns:
+            Number of attributes removed
+        """
+        staged = Exists(StagedRecordId.objects.filter(stage=stage, record_id=OuterRef('source_record_id')))
+        if missing:
+            staged = ~staged
         
-        # Find attribute sources from this data source with record IDs not in the current set
         to_remove = AttributeSource.objects.filter(
             datasource=self.datasource,
             is_current=True
-        ).exclude(source_record_id='').exclude(source_record_id__in=current_record_ids)
+        ).exclude(source_record_id='').filter(staged)
         
-        for attr in to_remove:
-            # Mark as not current
-            attr.is_current = False
-            attr.save()
-            
-            # Record the removal
-            ProfileAttributeChange.objects.create(
-                person=attr.person,
-                attribute_name=attr.attribute_name,
-                old_value=attr.attribute_value,
+        # Record the removals before the rows stop matching the query
+        removed_count = 0
+        changes = []
+        rows = to_remove.order_by().values_list('person_id', 'attribute_name', 'attribute_value')
+        for person_id, attribute_name, attribute_value in rows.iterator(chunk_size=self.batch_size):
+            changes.append(ProfileAttributeChange(
+                person_id=person_id,
+                attribute_name=attribute_name,
+                old_value=attribute_value,
                 change_type='remove',
                 datasource=self.datasource,
                 sync=self.sync
-            )
+            ))
+            self._index_key_value(attribute_name, attribute_value, person_id, is_current=False)
             
-            removed_count += 1
+            if len(changes) >= self.batch_size:
+                ProfileAttributeChange.objects.bulk_create(changes)
+                removed_count += len(changes)
+                changes = []
+        
+        if changes:
+            ProfileAttributeChange.objects.bulk_create(changes)
+            removed_count += len(changes)
+        
+        # Mark as not current in one statement
+        if removed_count:
+            to_remove.update(is_current=False, last_updated=timezone.now())
+        
+        # Records that reappear later must be integrated again rather than skipped
+        RecordFingerprint.objects.filter(datasource=self.datasource).filter(staged).delete()
+        self.fingerprints = None
         
         return removed_count
\ No newline at end of file
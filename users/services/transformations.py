@@ -0,0 +1,366 @@
+# users/services/transformations.py
+import ast
+import functools
+import hashlib
+import logging
+import re
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class TransformationError(ValueError):
+    """
+    Raised when transformation logic is not a valid transformation expression.
+    """
+
+
+# Methods that may be called on values, e.g. value.split('@')[0]
+ALLOWED_METHODS = {
+    'capitalize', 'casefold', 'count', 'endswith', 'find', 'get', 'isalnum', 'isalpha',
+    'isdigit', 'join', 'lower', 'lstrip', 'partition', 'replace', 'rfind', 'rpartition',
+    'rsplit', 'rstrip', 'split', 'startswith', 'strip', 'swapcase', 'title', 'upper',
+}
+
+# Syntax allowed in expressions. Anything else, like lambdas, comprehensions,
+# attribute access to non-whitelisted names or arithmetic that can blow up
+# memory, is rejected when the expression is compiled.
+_ALLOWED_NODES = (
+    ast.Expression, ast.Load, ast.Name, ast.Constant, ast.Attribute, ast.Call, ast.keyword,
+    ast.Subscript, ast.Slice, ast.BinOp, ast.Add, ast.Sub, ast.UnaryOp, ast.Not, ast.USub,
+    ast.BoolOp, ast.And, ast.Or, ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt,
+    ast.GtE, ast.In, ast.NotIn, ast.Is, ast.IsNot, ast.IfExp, ast.Dict, ast.List, ast.Tuple,
+    ast.JoinedStr, ast.FormattedValue,
+) + tuple(
+    # Nodes only produced by older Python versions
+    getattr(ast, name) for name in ('Index', 'Str', 'Num', 'NameConstant') if hasattr(ast, name)
+)
+
+# Largest zfill width and format width or precision, so an expression cannot
+# allocate arbitrarily large strings
+MAX_PAD_WIDTH = 255
+
+# Longest string replace(), join() and regex_sub() may build, as chaining them
+# can grow a value exponentially, e.g. value.replace('a', value).replace('a', value)
+MAX_VALUE_LENGTH = 1 << 20
+
+_FORMAT_NUMBER_RE = re.compile(r'\d+')
+
+
+def _check_length(length):
+    if length > MAX_VALUE_LENGTH:
+        raise TransformationError(f"Transformation result longer than {MAX_VALUE_LENGTH} characters")
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_pattern(pattern):
+    return re.compile(pattern)
+
+
+def regex_sub(pattern, replacement, value, count=0):
+    """Replace every match of a regular expression"""
+    compiled = _compile_pattern(pattern)
+    value = str(value)
+
+    # Every position may match, and a group reference copies up to the whole value
+    bound = (len(value) + 1) * (len(replacement) + 1)
+    if '\\' in replacement:
+        bound *= len(value) + 1
+    if bound <= MAX_VALUE_LENGTH:
+        return compiled.sub(replacement, value, count)
+
+    length = len(value)
+
+    def expand(match):
+        nonlocal length
+        expanded = match.expand(replacement)
+        length += len(expanded) - (match.end() - match.start())
+        _check_length(length)
+        return expanded
+
+    return compiled.sub(expand, value, count)
+
+
+def regex_extract(pattern, value, group=0, default=None):
+    """Return a group of the first match of a regular expression"""
+    match = _compile_pattern(pattern).search(str(value))
+    return match.group(group) if match else default
+
+
+def regex_match(pattern, value):
+    """Whether a regular expression matches anywhere in the value"""
+    return _compile_pattern(pattern).search(str(value)) is not None
+
+
+def reformat_date(value, input_format=None, output_format='%Y-%m-%d'):
+    """Parse a date with input_format, or as ISO 8601 if omitted, and format it with output_format"""
+    if hasattr(value, 'strftime'):
+        return value.strftime(output_format)
+    return _reformat_date_string(str(value).strip(), input_format, output_format)
+
+
+@functools.lru_cache(maxsize=4096)
+def _reformat_date_string(value, input_format, output_format):
+    # strptime dominates the cost and date columns repeat a lot, so results are memoized
+    if not value:
+        return None
+    if input_format:
+        parsed = datetime.strptime(value, input_format)
+    else:
+        parsed = datetime.fromisoformat(value)
+    return parsed.strftime(output_format)
+
+
+def concat(*values, sep=''):
+    """Join the non-empty values into one string"""
+    return sep.join(str(v) for v in values if v is not None and v != '')
+
+
+def lookup(value, table, default=None):
+    """Translate a value through a lookup table, falling back to default or the value itself"""
+    return table.get(value, value if default is None else default)
+
+
+def coalesce(*values):
+    """Return the first value that is not empty"""
+    for v in values:
+        if v is not None and v != '':
+            return v
+    return None
+
+
+def zfill(value, width):
+    """Left pad a value with zeros"""
+    return str(value).zfill(min(width, MAX_PAD_WIDTH))
+
+
+def _checked_replace(obj, *args, **kwargs):
+    """str.replace, refusing to build a string longer than MAX_VALUE_LENGTH"""
+    if isinstance(obj, str) and len(args) >= 2 and isinstance(args[0], str) and isinstance(args[1], str):
+        old, new = args[0], args[1]
+        limit = args[2] if len(args) > 2 else kwargs.get('count', -1)
+        # An empty pattern matches between every character
+        occurrences = obj.count(old) if old else len(obj) + 1
+        if limit >= 0:
+            occurrences = min(occurrences, limit)
+        _check_length(len(obj) + occurrences * (len(new) - len(old)))
+    return obj.replace(*args, **kwargs)
+
+
+def _checked_join(separator, iterable):
+    """str.join, refusing to build a string longer than MAX_VALUE_LENGTH"""
+    items = list(iterable)
+    if isinstance(separator, str):
+        _check_length(
+            len(separator) * max(len(items) - 1, 0) + sum(len(item) for item in items if isinstance(item, str))
+        )
+    return separator.join(items)
+
+
+# Methods that are called through a checked function instead, see _GrowthGuard
+_CHECKED_METHODS = {
+    'replace': '_checked_replace',
+    'join': '_checked_join',
+}
+
+FUNCTIONS = {
+    'str': str,
+    'int': int,
+    'float': float,
+    'len': len,
+    'min': min,
+    'max': max,
+    'concat': concat,
+    'coalesce': coalesce,
+    'lookup': lookup,
+    'regex_sub': regex_sub,
+    'regex_extract': regex_extract,
+    'regex_match': regex_match,
+    'reformat_date': reformat_date,
+    'zfill': zfill,
+}
+
+# Names an expression can refer to besides FUNCTIONS
+VARIABLES = {'value', 'record'}
+
+
+class _ExpressionValidator(ast.NodeVisitor):
+    """
+    Reject any syntax outside the transformation expression language.
+    """
+    def generic_visit(self, node):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise TransformationError(f"Unsupported syntax in transformation: {type(node).__name__}")
+        super().generic_visit(node)
+
+    def visit_Name(self, node):
+        if node.id not in VARIABLES and node.id not in FUNCTIONS and node.id not in ('True', 'False', 'None'):
+            raise TransformationError(f"Unknown name in transformation: {node.id}")
+
+    def visit_Attribute(self, node):
+        if node.attr not in ALLOWED_METHODS:
+            raise TransformationError(f"Method not allowed in transformation: {node.attr}")
+        self.generic_visit(node)
+
+    def visit_Call(self, node):
+        # Only whitelisted functions and methods can be called, never the result of an expression
+        if not isinstance(node.func, (ast.Name, ast.Attribute)):
+            raise TransformationError("Only functions and methods can be called in a transformation")
+        self.generic_visit(node)
+
+    def visit_FormattedValue(self, node):
+        # A format spec like '>100000000' pads to any width, so only small constant ones are allowed
+        if node.format_spec is not None:
+            parts = node.format_spec.values
+            if not all(isinstance(part, ast.Constant) for part in parts):
+                raise TransformationError("Format specs in transformations must be constant")
+            spec = ''.join(str(part.value) for part in parts)
+            if any(int(number) > MAX_PAD_WIDTH for number in _FORMAT_NUMBER_RE.findall(spec)):
+                raise TransformationError(f"Format width and precision cannot exceed {MAX_PAD_WIDTH}")
+        self.visit(node.value)
+
+
+class _GrowthGuard(ast.NodeTransformer):
+    """
+    Route the method calls that can build large strings, x.replace(...) and
+    x.join(...), through functions checking the length of their result.
+    """
+    def visit_Call(self, node):
+        self.generic_visit(node)
+        if isinstance(node.func, ast.Attribute) and node.func.attr in _CHECKED_METHODS:
+            func = ast.Name(id=_CHECKED_METHODS[node.func.attr], ctx=ast.Load())
+            return ast.copy_location(ast.Call(func=func, args=[node.func.value] + node.args, keywords=node.keywords), node)
+        return node
+
+
+class _ConstantHoister(ast.NodeTransformer):
+    """
+    Replace constant dict, list and tuple literals, such as lookup tables, with
+    names bound once at compile time instead of being rebuilt on every call.
+    No allowed method mutates them, so they are safe to share between calls.
+    """
+    def __init__(self):
+        self.constants = {}
+
+    def _hoist(self, node):
+        self.generic_visit(node)
+        try:
+            constant = ast.literal_eval(node)
+        except ValueError:
+            return node
+        name = f'_constant_{len(self.constants)}'
+        self.constants[name] = constant
+        return ast.copy_location(ast.Name(id=name, ctx=ast.Load()), node)
+
+    visit_Dict = visit_List = visit_Tuple = _hoist
+
+
+def compile_transformation(expression):
+    """
+    Validate a transformation expression and compile it into a function of (value, record).
+
+    Expressions are Python expressions restricted to string methods, slicing,
+    concatenation, comparisons, conditional expressions, dict and list
+    literals and the helpers in FUNCTIONS. 'value' is the source field value
+    and 'record' the whole source record, e.g.
+        value.strip().lower()
+        value.split('@')[0]
+        concat(record['first_name'], record['last_name'], sep=' ')
+        lookup(value, {'HR': 'Human Resources', 'IT': 'Information Technology'})
+        reformat_date(value, '%m/%d/%Y', '%Y-%m-%d')
+
+    Raises:
+        TransformationError: If the expression is invalid or uses disallowed syntax
+    """
+    try:
+        tree = ast.parse(expression.strip(), mode='eval')
+    except SyntaxError as e:
+        raise TransformationError(f"Invalid transformation expression: {e.msg}")
+
+    _ExpressionValidator().visit(tree)
+
+    hoister = _ConstantHoister()
+    body = hoister.visit(_GrowthGuard().visit(tree)).body
+
+    # Wrap the expression in a lambda so each application is a plain function call
+    function = ast.parse('lambda value, record=None: None', mode='eval')
+    function.body.body = body
+    ast.fix_missing_locations(function)
+    code = compile(function, '<transformation>', 'eval')
+    checked = {name: globals()[name] for name in _CHECKED_METHODS.values()}
+    return eval(code, {'__builtins__': {}, **FUNCTIONS, **checked, **hoister.constants})
+
+
+def referenced_fields(expression):
+    """
+    Return the names of the record fields a transformation expression reads,
+    e.g. {'first_name', 'last_name'} for concat(record['first_name'], record.get('last_name')).
+
+    Returns:
+        Set of field names, or None if the expression uses the record in a way
+        that does not name its fields, so it may read any of them
+    """
+    try:
+        tree = ast.parse(expression.strip(), mode='eval')
+    except SyntaxError:
+        # Invalid expressions are never applied
+        return set()
+
+    parents = {}
+    for node in ast.walk(tree):
+        for child in ast.iter_child_nodes(node):
+            parents[child] = node
+
+    fields = set()
+    for node in ast.walk(tree):
+        if not (isinstance(node, ast.Name) and node.id == 'record'):
+            continue
+        parent = parents.get(node)
+        call = parents.get(parent)
+        if isinstance(parent, ast.Subscript) and parent.value is node:
+            key = parent.slice
+        elif (isinstance(parent, ast.Attribute) and parent.attr == 'get'
+              and isinstance(call, ast.Call) and call.func is parent and call.args):
+            key = call.args[0]
+        else:
+            return None
+
+        # Older Python versions wrap subscripts in an Index node
+        if hasattr(ast, 'Index') and isinstance(key, ast.Index):
+            key = key.value
+        if not (isinstance(key, ast.Constant) and isinstance(key.value, str)):
+            return None
+        fields.add(key.value)
+    return fields
+
+
+def transformation_version(expression):
+    """
+    Return a short hash identifying a version of a transformation expression.
+    """
+    return hashlib.sha1(expression.encode('utf-8')).hexdigest()[:16]
+
+
+# (mapping_id, version) -> compiled transformation
+_compiled_transformations = {}
+
+
+def get_transformation(mapping):
+    """
+    Get the compiled transformation of a ProfileFieldMapping, compiling it on first use.
+
+    Compiled transformations are cached by mapping ID and version, so an edited
+    expression is recompiled while unchanged ones are shared across syncs.
+    """
+    key = (mapping.pk, transformation_version(mapping.transformation_logic))
+    transformation = _compiled_transformations.get(key)
+    if transformation is None:
+        transformation = compile_transformation(mapping.transformation_logic)
+
+        # Drop the versions this mapping no longer uses
+        for stale_key in [k for k in _compiled_transformations if k[0] == mapping.pk]:
+            del _compiled_transformations[stale_key]
+
+        _compiled_transformations[key] = transformation
+        logger.debug(f"Compiled transformation for mapping {mapping.pk}: {mapping.transformation_logic}")
+    return transformation
@@ -1,3 +1,122 @@
-from django.test import TestCase
+from django.test import SimpleTestCase
 
-# Create your tests here.
+from users.services.transformations import (
+    MAX_PAD_WIDTH, MAX_VALUE_LENGTH, TransformationError, compile_transformation,
+)
+
+
+class CompileTransformationTests(SimpleTestCase):
+    """
+    Tests for the transformation expression compiler.
+    """
+    def assertRejected(self, *expressions):
+        for expression in expressions:
+            with self.subTest(expression=expression):
+                with self.assertRaises(TransformationError):
+                    compile_transformation(expression)
+
+    def test_allowed_expressions(self):
+        self.assertEqual(compile_transformation("value.strip().lower()")('  Ada '), 'ada')
+        self.assertEqual(compile_transformation("value.split('@')[0]")('ada@example.com'), 'ada')
+        self.assertEqual(
+            compile_transformation("concat(record['first'], record['last'], sep=' ')")(None, {'first': 'Ada', 'last': 'Lovelace'}),
+            'Ada Lovelace'
+        )
+        self.assertEqual(compile_transformation("lookup(value, {'IT': 'Information Technology'})")('IT'), 'Information Technology')
+        self.assertEqual(compile_transformation("f'{value:>8}'")('7'), '       7')
+
+    def test_invalid_syntax(self):
+        self.assertRejected("value.strip(", "value = 1", "import os")
+
+    def test_disallowed_nodes(self):
+        self.assertRejected(
+            "lambda: value",
+            "[c for c in value]",
+            "{c: c for c in value}",
+            "(c for c in value)",
+            "(x := value)",
+            "[*value]",
+            "value * 100",
+            "value ** 2",
+            "value % 2",
+            "~len(value)",
+            "await value",
+        )
+
+    def test_attribute_access(self):
+        self.assertRejected(
+            "value.__class__",
+            "value.__class__.__mro__[1].__subclasses__()",
+            "value.format(record)",
+            "value.encode()",
+            "record.items()",
+            "record.pop('id')",
+            "record.get.__self__",
+            "len.__self__",
+        )
+
+    def test_calling_expression_results(self):
+        self.assertRejected(
+            "record.get('parser')(value)",
+            "record['field']()",
+            "[len][0](value)",
+            "(len if value else str)(value)",
+        )
+
+    def test_dunder_and_unknown_names(self):
+        self.assertRejected(
+            "__import__('os')",
+            "__builtins__",
+            "__builtins__['open']('/etc/passwd')",
+            "__class__",
+            "open('/etc/passwd')",
+            "eval(value)",
+            "getattr(value, 'upper')",
+            "_checked_replace(value, 'a', 'b')",
+            "_constant_0",
+        )
+
+    def test_no_builtins_at_runtime(self):
+        # Names validated away at compile time are also missing from the function's globals
+        function = compile_transformation("value")
+        self.assertEqual(function.__globals__['__builtins__'], {})
+
+    def test_format_spec_bombs(self):
+        self.assertRejected(
+            f"f'{{value:>{MAX_PAD_WIDTH + 1}}}'",
+            "f'{value:>100000000}'",
+            "f'{value:.100000000}'",
+            "f'{value:{len(value)}}'",
+            "f'{value:>{record}}'",
+        )
+
+    def test_string_growth_bombs(self):
+        value = 'a' * 2048
+
+        bombs = (
+            "value.replace('a', value)",
+            "value.replace('', value)",
+            "value.replace('a', value, -1)",
+            "value.replace('a', value).replace('a', value)",
+            "value.join(value)",
+            "regex_sub('', value, value)",
+            "regex_sub('(a)', value + '\\\\1', value)",
+        )
+        for expression in bombs:
+            with self.subTest(expression=expression):
+                function = compile_transformation(expression)
+                with self.assertRaises(TransformationError):
+                    function(value)
+
+    def test_growth_within_limit(self):
+        self.assertEqual(compile_transformation("value.replace('a', 'bb', 1)")('aaa'), 'bbaa')
+        self.assertEqual(compile_transformation("'-'.join(value.split(' '))")('a b c'), 'a-b-c')
+        self.assertEqual(compile_transformation("regex_sub('a', 'bb', value)")('aba'), 'bbbbb')
+
+        value = 'a' * 1024
+        result = compile_transformation("value.replace('a', value)")(value)
+        self.assertEqual(len(result), 1024 * 1024)
+        self.assertLessEqual(len(result), MAX_VALUE_LENGTH)
+
+    def test_zfill_width_is_capped(self):
+        self.assertEqual(len(compile_transformation("zfill(value, 100000000)")('7')), MAX_PAD_WIDTH)
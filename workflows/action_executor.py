@@ -13,6 +13,7 @@ from django.utils import timezone
 
 from .models import Action, ActionExecution, WorkflowExecution
 from .actions.database_action import DatabaseQueryAction
+from .actions.database_bulk_write_action import DatabaseBulkWriteAction
 from .actions.datasource_refresh_action import DataSourceRefreshAction
 from .actions.file_create_action import FileCreateAction
 from .actions.profile_check_action import ProfileCheckAction
@@ -29,6 +30,7 @@ class ActionExecutor:
     # Registry of action handlers by action type
     ACTION_HANDLERS = {
         'database_query': DatabaseQueryAction,
+        'database_bulk_write': DatabaseBulkWriteAction,
         'datasource_refresh': DataSourceRefreshAction,
         'file_create': FileCreateAction,
         'profile_check': ProfileCheckAction,
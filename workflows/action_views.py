@@ -25,6 +25,7 @@ from .forms import (
     DataSourceRefreshActionForm, 
     ActionTypeForm, 
     DatabaseQueryActionForm,
+    DatabaseBulkWriteActionForm,
     FileCreateActionForm,
     ProfileCheckActionForm,
     IteratorActionForm,
@@ -71,8 +72,8 @@ class ActionDetailView(LoginRequiredMixin, DetailView):
             for ds in DataSource.objects.filter(id__in=datasource_ids):
                 datasources_dict[ds.id] = ds
         
-        # If this is a database_query action, get all database connections
-        if self.object.action_type == 'database_query':
+        # If this is a database action, get all database connections
+        if self.object.action_type in ('database_query', 'database_bulk_write'):
             from datasources.connection_models import DatabaseConnection
             context['database_connections'] = DatabaseConnection.objects.all()
                 
@@ -168,6 +169,39 @@ class DatabaseQueryActionUpdateView(LoginRequiredMixin, UpdateView):
         
         return context
 
+class DatabaseBulkWriteActionCreateView(LoginRequiredMixin, CreateView):
+    """
+    View for creating a new Database Bulk Write action.
+    """
+    model = Action
+    form_class = DatabaseBulkWriteActionForm
+    template_name = 'workflows/database_bulk_write_action_form.html'
+    
+    def get_success_url(self):
+        return reverse_lazy('workflows:action_detail', kwargs={'pk': self.object.pk})
+    
+    def form_valid(self, form):
+        form.instance.created_by = self.request.user
+        form.instance.modified_by = self.request.user
+        messages.success(self.request, _('Database Bulk Write action created successfully.'))
+        return super().form_valid(form)
+
+class DatabaseBulkWriteActionUpdateView(LoginRequiredMixin, UpdateView):
+    """
+    View for updating a Database Bulk Write action.
+    """
+    model = Action
+    form_class = DatabaseBulkWriteActionForm
+    template_name = 'workflows/database_bulk_write_action_form.html'
+    
+    def get_success_url(self):
+        return reverse_lazy('workflows:action_detail', kwargs={'pk': self.object.pk})
+    
+    def form_valid(self, form):
+        form.instance.modified_by = self.request.user
+        messages.success(self.request, _('Database Bulk Write action updated successfully.'))
+        return super().form_valid(form)
+
 class RunActionView(LoginRequiredMixin, View):
     """
     View for running an action directly from the action detail page.
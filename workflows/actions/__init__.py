@@ -5,6 +5,7 @@ This package contains implementations of various workflow actions.
 """
 
 from .database_action import DatabaseQueryAction
+from .database_bulk_write_action import DatabaseBulkWriteAction
 from .datasource_refresh_action import DataSourceRefreshAction
 from .file_create_action import FileCreateAction
 from .profile_check_action import ProfileCheckAction
@@ -13,6 +14,7 @@ from .iterator_action import IteratorAction  # If this was already there
 
 __all__ = [
     'DatabaseQueryAction',
+    'DatabaseBulkWriteAction',
     'DataSourceRefreshAction',
     'FileCreateAction',
     'ProfileCheckAction',
@@ -14,10 +14,10 @@ from typing import Dict, Any, Optional, Tuple, List
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
-from core.database import get_connector
+from core.database import get_connector, pooled_connector
 from core.database.executors import execute_query
 from core.database.formatters import format_results
-from core.database.utils import validate_query, extract_query_type, extract_query_params, limit_results
+from core.database.utils import validate_query, extract_query_type, extract_query_params, limit_query
 
 from workflows.models import Action, ActionExecution, WorkflowExecution
 
@@ -107,19 +107,12 @@ class DatabaseQueryAction:
                     return False, {"error": error}
                     
             # Debug connection info
-            logger.debug(f"Connection info: {connection_info}")
-            print(f"Connection type: {connection_info.get('type')}")
-            print(f"Password included: {'password' in connection_info}")
+            logger.debug(f"Connection type: {connection_info.get('type')}, password included: {'password' in connection_info}")
             
             # Log execution
             query_type = extract_query_type(query)
             logger.info(f"Executing {query_type} query for action {self.action.name}")
             
-            # Apply row limit based on database type
-            original_query = query
-            if max_rows > 0 and connection_info.get('type') != 'oracle':
-                query = limit_results(query, max_rows)
-            
             # Extract query parameters from execution context
             query_params = {}
             
@@ -133,47 +126,24 @@ class DatabaseQueryAction:
                     param_name = key[6:]  # Remove 'param_' prefix
                     query_params[param_name] = value
             
+            # Apply row limit in the syntax of the database type, as a bound parameter
+            query, query_params = limit_query(query, max_rows, connection_info.get('type'), query_params)
+            
             # Use type-specific connector if needed
             if connection_info.get('type') == 'oracle':
                 try:
-                    # Import the Oracle connector directly
-                    from core.database.oracle_connector import OracleConnector
-                    
-                    # Create the connector
-                    connector = OracleConnector(connection_info)
-                    
-                    # Test the connection
-                    test_success, test_message = connector.test_connection()
-                    if not test_success:
-                        error = f"Oracle connection test failed: {test_message}"
-                        logger.error(error)
-                        action_execution.complete('error', error_message=error)
-                        return False, {"error": error}
-                    
-                    # Prepare the query for Oracle
-                    oracle_query = original_query.strip()
+                    # Oracle does not accept a trailing semicolon
+                    oracle_query = query.strip().rstrip(';')
                     
-                    # Remove trailing semicolon if it exists
-                    if oracle_query.endswith(';'):
-                        oracle_query = oracle_query[:-1].strip()
-                    
-                    # Apply Oracle-specific row limit if needed
-                    if max_rows > 0:
-                        # Check if query already has ROWNUM or FETCH FIRST
-                        if 'rownum' not in oracle_query.lower() and 'fetch first' not in oracle_query.lower():
-                            # Use appropriate limit syntax based on query structure
-                            if 'where' in oracle_query.lower():
-                                oracle_query = f"{oracle_query} AND ROWNUM <= {max_rows}"
-                            else:
-                                oracle_query = f"{oracle_query} WHERE ROWNUM <= {max_rows}"
-                    
-                    # Execute query using the Oracle connector
+                    # Execute query on a pooled Oracle connection, health-checked when borrowed
                     logger.info(f"Executing Oracle query: {oracle_query[:100]}...")
-                    success, results, error = connector.execute_query(
-                        oracle_query,
-                        query_params,
-                        timeout
-                    )
+                    with pooled_connector(connection_info) as connector:
+                        success, results, error = connector.execute_query(
+                            oracle_query,
+                            query_params,
+                            timeout,
+                            as_result_set=True
+                        )
                 except Exception as e:
                     error_message = f"Error with Oracle connector: {str(e)}\n{traceback.format_exc()}"
                     logger.error(error_message)
@@ -187,7 +157,8 @@ class DatabaseQueryAction:
                         connection_info,
                         query,
                         query_params,
-                        timeout
+                        timeout,
+                        as_result_set=True
                     )
                 except Exception as e:
                     error_message = f"Error executing query: {str(e)}"
@@ -199,7 +170,7 @@ class DatabaseQueryAction:
                 action_execution.complete('error', error_message=error)
                 return False, {"error": error}
             
-            # Format the results
+            # Format the results, kept as tuple rows until formatted
             format_options = params.get('format_options', {})
             formatted_results = format_results(results, result_format, format_options)
             
@@ -211,7 +182,7 @@ class DatabaseQueryAction:
                 "query_type": query_type,
                 "connection_name": connection.name,
                 "rows_affected": results.get("rowcount", 0) if isinstance(results, dict) else len(results),
-                "result": formatted_results if result_format == 'dict' else str(formatted_results)
+                "result": formatted_results if result_format in ('dict', 'table') else str(formatted_results)
             }
             
             # Complete the execution
@@ -0,0 +1,180 @@
+"""
+Database bulk write action for workflows.
+
+This module implements a bulk write action for the workflow engine, writing
+the rows produced by a previous action to a database table in batches.
+"""
+
+import logging
+import time
+import traceback
+from typing import Dict, Any, Optional, Tuple
+
+from core.database.bulk import bulk_write
+from workflows.models import Action, ActionExecution
+
+logger = logging.getLogger(__name__)
+
+class DatabaseBulkWriteAction:
+    """
+    Implementation of database bulk write action for workflows.
+    
+    Rows come from the output of a previous action, e.g. a database query with
+    the 'table' or 'dict' result format, and are inserted into a table or run
+    through a write statement in batches, instead of one statement per row.
+    """
+    
+    def __init__(self, action: Action):
+        """
+        Initialize the database bulk write action.
+        
+        Args:
+            action: Action model instance
+        """
+        self.action = action
+        self.parameters = action.parameters or {}
+    
+    def run(
+        self,
+        action_execution: ActionExecution,
+        execution_params: Dict[str, Any]
+    ) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Execute the database bulk write action.
+        
+        Args:
+            action_execution: ActionExecution model instance
+            execution_params: Parameters for this execution
+        
+        Returns:
+            Tuple of (success, result_data)
+        """
+        start_time = time.time()
+        
+        try:
+            # Update execution status
+            action_execution.start()
+            
+            # Merge default parameters with execution parameters
+            params = {**self.parameters, **execution_params}
+            
+            table = params.get('table') or None
+            write_query = params.get('write_query') or None
+            columns = params.get('columns') or None
+            
+            # Get database connection from ID
+            connection_id = params.get('connection_id')
+            if not connection_id:
+                error = "No database connection specified for bulk write action"
+                action_execution.complete('error', error_message=error)
+                return False, {"error": error}
+            
+            from datasources.connection_models import DatabaseConnection
+            try:
+                connection = DatabaseConnection.objects.get(id=connection_id)
+            except DatabaseConnection.DoesNotExist:
+                error = f"Database connection with ID {connection_id} not found"
+                action_execution.complete('error', error_message=error)
+                return False, {"error": error}
+            
+            # Get the rows to write
+            data = self._get_data(action_execution, params)
+            if data is None:
+                error = "No data available to write"
+                action_execution.complete('warning', error_message=error)
+                return False, {"error": error}
+            
+            logger.info(f"Bulk writing to {table or 'write statement'} for action {self.action.name}")
+            success, summary, error = bulk_write(
+                connection.get_connection_info(),
+                data,
+                table=table,
+                query=write_query,
+                columns=columns,
+                method=params.get('method', 'auto'),
+                batch_size=params.get('batch_size'),
+                timeout=params.get('timeout'),
+                stop_on_error=params.get('stop_on_error', False)
+            )
+            
+            execution_time = time.time() - start_time
+            result_data = {
+                **summary,
+                "success": success,
+                "execution_time": f"{execution_time:.2f}s",
+                "connection_name": connection.name,
+                "table": table,
+            }
+            
+            if not success:
+                # Some rows written is a partial success, none at all is a failure
+                status = 'warning' if summary.get('rows_written') else 'error'
+                result_data["error"] = error
+                action_execution.complete(status, error_message=error, output_data=result_data)
+                return False, result_data
+            
+            # Complete the execution
+            action_execution.complete('success', output_data=result_data)
+            
+            return True, result_data
+        
+        except Exception as e:
+            execution_time = time.time() - start_time
+            error_message = f"Error executing database bulk write action: {str(e)}\n{traceback.format_exc()}"
+            logger.error(error_message)
+            
+            # Complete the execution with error
+            action_execution.complete('error', error_message=str(e))
+            
+            return False, {
+                "success": False,
+                "execution_time": f"{execution_time:.2f}s",
+                "error": str(e)
+            }
+    
+    def _get_data(self, action_execution: ActionExecution, params: Dict[str, Any]) -> Optional[Any]:
+        """
+        Get the rows to write from the configured source.
+        
+        Args:
+            action_execution: Current action execution
+            params: Merged action and execution parameters
+        
+        Returns:
+            Rows in any form core.database.bulk.to_result_set reads, or None
+        """
+        data_source = params.get('data_source', 'previous_action')  # previous_action, custom_data, workflow_context
+        
+        if data_source == 'custom_data':
+            return params.get('custom_data')
+        
+        if data_source == 'workflow_context':
+            return (action_execution.workflow_execution.parameters or {}).get(params.get('data_key') or 'data')
+        
+        executions = action_execution.workflow_execution.action_executions.filter(status='success')
+        previous_action_id = params.get('previous_action_id')
+        previous_action_seq = params.get('previous_action_sequence')
+        if previous_action_id:
+            previous_execution = executions.filter(
+                workflow_action__action_id=previous_action_id
+            ).order_by('-end_time').first()
+        elif previous_action_seq:
+            previous_execution = executions.filter(workflow_action__sequence=previous_action_seq).first()
+        else:
+            # Default to the execution immediately before this one
+            previous_execution = executions.filter(
+                workflow_action__sequence__lt=action_execution.workflow_action.sequence
+            ).order_by('-workflow_action__sequence').first()
+        
+        if not previous_execution:
+            logger.error("No previous successful action execution found")
+            return None
+        
+        # Database queries output their rows as 'result', other actions as 'data'
+        output_data = previous_execution.output_data or {}
+        data_key = params.get('data_key')
+        if data_key:
+            return output_data.get(data_key)
+        if 'result' in output_data:
+            return output_data['result']
+        return output_data.get('data')
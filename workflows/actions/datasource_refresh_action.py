@@ -143,6 +143,9 @@ class DataSourceRefreshAction:
                         if datasource.type == 'csv':
                             from datasources.connectors.csv_connector import CSVConnector
                             connector = CSVConnector(datasource)
+                        elif datasource.type == 'parquet':
+                            from datasources.connectors.parquet_connector import ParquetConnector
+                            connector = ParquetConnector(datasource)
                         elif datasource.type == 'database':
                             from datasources.connectors.database_connector import DatabaseConnector
                             connector = DatabaseConnector(datasource)
@@ -162,7 +165,8 @@ class DataSourceRefreshAction:
                         
                         # Run the sync directly
                         try:
-                            sync_result = connector.sync_data(triggered_by=self.action.created_by)
+                            # Connectors report into the sync record created above
+                            sync_result = connector.sync_data(triggered_by=self.action.created_by, sync=sync)
                             
                             # Update results
                             if sync_result.status == 'success':
@@ -176,7 +180,8 @@ class DataSourceRefreshAction:
                                     "sync_id": sync.id,
                                     "records_processed": sync_result.records_processed,
                                     "records_created": sync_result.records_created,
-                                    "records_updated": sync_result.records_updated
+                                    "records_updated": sync_result.records_updated,
+                                    "records_skipped": sync_result.records_skipped
                                 })
                             else:
                                 print(f"Sync failed for '{datasource.name}': {sync_result.error_message}")
@@ -209,7 +214,7 @@ class DataSourceRefreshAction:
                         # Run the sync asynchronously via task
                         print(f"Initiating asynchronous refresh for '{datasource.name}'")
                         from datasources.tasks import sync_datasource as sync_task
-                        sync_task.delay(datasource.id, user_id)
+                        sync_task.delay(datasource.id, user_id, sync_id=sync.id)
                         
                         results["datasources_refreshed"] += 1
                         results["details"].append({
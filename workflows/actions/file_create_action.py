@@ -18,6 +18,7 @@ from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
 
+from core.database.results import ResultSet, Row
 from workflows.models import Action, ActionExecution, WorkflowExecution, WorkflowAction
 
 logger = logging.getLogger(__name__)
@@ -119,7 +120,7 @@ class FileCreateAction:
                 "execution_time": f"{execution_time:.2f}s",
                 "file_path": file_path,
                 "file_format": file_format,
-                "record_count": len(data) if isinstance(data, list) else 1,
+                "record_count": self._record_count(data),
             }
             
             # Complete the execution
@@ -244,7 +245,11 @@ class FileCreateAction:
                 return False, "No valid data to write"
             
             # Apply field selection if specified
-            if selected_fields:
+            if selected_fields and isinstance(records, ResultSet):
+                columns = [field for field in selected_fields if field in records.columns]
+                indexes = [records.columns.index(field) for field in columns]
+                records = ResultSet(columns, [tuple(row[i] for i in indexes) for row in records.rows])
+            elif selected_fields:
                 filtered_records = []
                 for record in records:
                     filtered_record = {}
@@ -292,6 +297,14 @@ class FileCreateAction:
             logger.error(error_message)
             return False, error_message
     
+    def _record_count(self, data: Any) -> int:
+        """
+        Count the records of the data written to the file.
+        """
+        if ResultSet.is_table_data(data):
+            return len(data['rows'])
+        return len(data) if isinstance(data, list) else 1
+    
     def _standardize_data(self, data: Any) -> List[Dict[str, Any]]:
         """
         Standardize data into a list of records.
@@ -300,10 +313,15 @@ class FileCreateAction:
             data: Data in various formats
             
         Returns:
-            List of dictionaries representing records
+            List of dictionaries representing records, or a ResultSet for
+            the compact 'table' output of a database query, whose rows read
+            like dictionaries
         """
         if data is None:
             return []
+        
+        if ResultSet.is_table_data(data):
+            return ResultSet.from_data(data)
             
         if isinstance(data, list):
             # If it's already a list, check if items are dictionaries
@@ -361,7 +379,11 @@ class FileCreateAction:
                 if include_headers:
                     writer.writerow(header_fields)
                 
-                # Write data rows
+                # Write data rows, tuple rows in column order as they are
+                if isinstance(records, ResultSet) and list(header_fields) == list(records.columns):
+                    writer.writerows(records.rows)
+                    return True, ""
+                
                 for record in records:
                     row = [record.get(field, '') for field in header_fields]
                     writer.writerow(row)
@@ -401,10 +423,15 @@ class FileCreateAction:
                 # Write JSON Lines format (one object per line)
                 with open(file_path, 'w', encoding='utf-8') as jsonfile:
                     for record in records:
+                        # Tuple rows would otherwise be written as arrays
+                        if isinstance(record, Row):
+                            record = record.as_dict()
                         json_string = json.dumps(record, ensure_ascii=ensure_ascii)
                         jsonfile.write(json_string + '\n')
             else:
                 # Write standard JSON (entire array in one file)
+                if isinstance(records, ResultSet):
+                    records = records.dicts()
                 with open(file_path, 'w', encoding='utf-8') as jsonfile:
                     json.dump(records, jsonfile, indent=indent, ensure_ascii=ensure_ascii)
             
@@ -34,12 +34,12 @@ class WorkflowDesignerView(LoginRequiredMixin, View):
         actions = Action.objects.filter(is_active=True)
         
         # Categorize actions by type
-        database_actions = actions.filter(action_type__in=['database_query'])
+        database_actions = actions.filter(action_type__in=['database_query', 'database_bulk_write'])
         datasource_actions = actions.filter(action_type__in=['datasource_refresh'])
         file_actions = actions.filter(action_type__in=['file_create', 'csv_generate', 'csv_process'])
         other_actions = actions.exclude(
             action_type__in=[
-                'database_query', 'datasource_refresh', 
+                'database_query', 'database_bulk_write', 'datasource_refresh', 
                 'file_create', 'csv_generate', 'csv_process'
             ]
         )
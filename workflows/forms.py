@@ -7,6 +7,7 @@ import json
 from datasources.models import DataSource
 from workflows.models import Action, Workflow, WorkflowAction, Schedule
 from datasources.connection_models import DatabaseConnection
+from core.database.bulk import is_valid_table_name, is_valid_column_name
 
 class ActionTypeForm(forms.Form):
     """
@@ -292,6 +293,7 @@ class DatabaseQueryActionForm(forms.ModelForm):
             ('json', _('JSON')),
             ('csv', _('CSV')),
             ('dict', _('Python Dictionary')),
+            ('table', _('Compact Table (columns and rows)')),
         ],
         initial='json',
         required=False,
@@ -377,6 +379,231 @@ class DatabaseQueryActionForm(forms.ModelForm):
             self.fields['store_results'].initial = params.get('store_results', False)
             self.fields['result_format'].initial = params.get('result_format', 'json')
 
+class DatabaseBulkWriteActionForm(forms.ModelForm):
+    """
+    Form for the Database Bulk Write action.
+    """
+    
+    connection = forms.ModelChoiceField(
+        queryset=DatabaseConnection.objects.all().order_by('name'),
+        required=True,
+        label=_('Database Connection'),
+        help_text=_('Select the database connection to write to'),
+        widget=forms.Select(attrs={
+            'class': 'focus:ring-blue-500 focus:border-blue-500 block w-full shadow-sm sm:text-sm border-gray-300 rounded-md'
+        })
+    )
+    
+    table = forms.CharField(
+        required=False,
+        max_length=255,
+        label=_('Table'),
+        help_text=_('Table to insert the rows into, e.g. staging.users'),
+        widget=forms.TextInput(attrs={
+            'class': 'focus:ring-blue-500 focus:border-blue-500 block w-full shadow-sm sm:text-sm border-gray-300 rounded-md font-mono',
+            'placeholder': 'staging.users'
+        })
+    )
+    
+    write_query = forms.CharField(
+        required=False,
+        widget=forms.Textarea(attrs={
+            'rows': 5,
+            'class': 'focus:ring-blue-500 focus:border-blue-500 block w-full shadow-sm sm:text-sm border-gray-300 rounded-md font-mono',
+            'placeholder': 'UPDATE users SET active = :active WHERE email = :email'
+        }),
+        label=_('Write Statement'),
+        help_text=_('Statement run for every row instead of an INSERT into the table, with a :column placeholder per column')
+    )
+    
+    columns = forms.CharField(
+        required=False,
+        label=_('Columns'),
+        help_text=_('Comma-separated columns to write. Leave empty to write every column of the data'),
+        widget=forms.TextInput(attrs={
+            'class': 'focus:ring-blue-500 focus:border-blue-500 block w-full shadow-sm sm:text-sm border-gray-300 rounded-md font-mono',
+            'placeholder': 'email, first_name, last_name'
+        })
+    )
+    
+    # Data source options
+    data_source = forms.ChoiceField(
+        choices=[
+            ('previous_action', _('Previous Action Output')),
+            ('workflow_context', _('Workflow Parameters')),
+        ],
+        initial='previous_action',
+        label=_('Data Source'),
+        help_text=_('Where the rows to write come from'),
+        widget=forms.Select(attrs={
+            'class': 'focus:ring-blue-500 focus:border-blue-500 block w-full shadow-sm sm:text-sm border-gray-300 rounded-md'
+        })
+    )
+    
+    previous_action_sequence = forms.IntegerField(
+        required=False,
+        min_value=1,
+        label=_('Previous Action Sequence'),
+        help_text=_('Sequence number of the action whose output to write. Leave empty for the action just before this one'),
+        widget=forms.NumberInput(attrs={
+            'class': 'focus:ring-blue-500 focus:border-blue-500 block w-full shadow-sm sm:text-sm border-gray-300 rounded-md'
+        })
+    )
+    
+    data_key = forms.CharField(
+        required=False,
+        max_length=100,
+        label=_('Data Key'),
+        help_text=_('Key of the rows in the output or parameters. Leave empty for a query result'),
+        widget=forms.TextInput(attrs={
+            'class': 'focus:ring-blue-500 focus:border-blue-500 block w-full shadow-sm sm:text-sm border-gray-300 rounded-md'
+        })
+    )
+    
+    # Execution options
+    method = forms.ChoiceField(
+        choices=[
+            ('auto', _('Automatic')),
+            ('copy', _('Bulk Load (PostgreSQL COPY)')),
+            ('batch', _('Batched Statements')),
+        ],
+        initial='auto',
+        label=_('Write Method'),
+        help_text=_('Automatic uses a bulk load where the database supports it, and batched statements otherwise'),
+        widget=forms.Select(attrs={
+            'class': 'focus:ring-blue-500 focus:border-blue-500 block w-full shadow-sm sm:text-sm border-gray-300 rounded-md'
+        })
+    )
+    
+    batch_size = forms.IntegerField(
+        required=False,
+        min_value=1,
+        max_value=100000,
+        label=_('Batch Size'),
+        help_text=_('Rows written per batch and transaction. Leave empty for the default'),
+        widget=forms.NumberInput(attrs={
+            'class': 'focus:ring-blue-500 focus:border-blue-500 block w-full shadow-sm sm:text-sm border-gray-300 rounded-md'
+        })
+    )
+    
+    timeout = forms.IntegerField(
+        required=False,
+        initial=60,
+        min_value=1,
+        max_value=3600,
+        label=_('Timeout (seconds)'),
+        help_text=_('Maximum time to wait for each batch (1-3600 seconds)'),
+        widget=forms.NumberInput(attrs={
+            'class': 'focus:ring-blue-500 focus:border-blue-500 block w-full shadow-sm sm:text-sm border-gray-300 rounded-md'
+        })
+    )
+    
+    stop_on_error = forms.BooleanField(
+        required=False,
+        initial=False,
+        label=_('Stop on Error'),
+        help_text=_('Stop at the first failed batch instead of writing the remaining ones'),
+        widget=forms.CheckboxInput(attrs={
+            'class': 'focus:ring-blue-500 h-4 w-4 text-blue-600 border-gray-300 rounded'
+        })
+    )
+    
+    class Meta:
+        model = Action
+        fields = ['name', 'description', 'is_active']
+        widgets = {
+            'name': forms.TextInput(attrs={
+                'class': 'focus:ring-blue-500 focus:border-blue-500 block w-full shadow-sm sm:text-sm border-gray-300 rounded-md'
+            }),
+            'description': forms.Textarea(attrs={
+                'rows': 3,
+                'class': 'focus:ring-blue-500 focus:border-blue-500 block w-full shadow-sm sm:text-sm border-gray-300 rounded-md'
+            }),
+            'is_active': forms.CheckboxInput(attrs={
+                'class': 'focus:ring-blue-500 h-4 w-4 text-blue-600 border-gray-300 rounded'
+            }),
+        }
+    
+    def clean_table(self):
+        """Validate the table name, which is put in the SQL text."""
+        table = self.cleaned_data.get('table', '').strip()
+        if table and not is_valid_table_name(table):
+            raise forms.ValidationError(_('Use a plain table name, optionally with its schema, e.g. staging.users'))
+        return table
+    
+    def clean_columns(self):
+        """Convert the comma-separated columns to a list."""
+        columns = [column.strip() for column in self.cleaned_data.get('columns', '').split(',') if column.strip()]
+        invalid = [column for column in columns if not is_valid_column_name(column)]
+        if invalid:
+            raise forms.ValidationError(_('Invalid column names: %(columns)s') % {'columns': ', '.join(invalid)})
+        return columns
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        table = cleaned_data.get('table')
+        write_query = cleaned_data.get('write_query')
+        
+        if not table and not write_query:
+            raise forms.ValidationError(_('Enter a table or a write statement'))
+        if cleaned_data.get('method') == 'copy':
+            if write_query:
+                self.add_error('method', _('A bulk load writes to a table, not through a write statement'))
+            connection = cleaned_data.get('connection')
+            if connection and connection.db_type != 'postgresql':
+                self.add_error('method', _('Bulk load is only available for PostgreSQL connections'))
+        
+        return cleaned_data
+    
+    def save(self, commit=True):
+        action = super().save(commit=False)
+        
+        # Set the action type
+        action.action_type = 'database_bulk_write'
+        
+        # Prepare parameters
+        params = {
+            'connection_id': self.cleaned_data.get('connection').id,
+            'table': self.cleaned_data.get('table', ''),
+            'write_query': self.cleaned_data.get('write_query', ''),
+            'columns': self.cleaned_data.get('columns', []),
+            'data_source': self.cleaned_data.get('data_source', 'previous_action'),
+            'data_key': self.cleaned_data.get('data_key', ''),
+            'method': self.cleaned_data.get('method', 'auto'),
+            'timeout': self.cleaned_data.get('timeout') or 60,
+            'stop_on_error': self.cleaned_data.get('stop_on_error', False),
+        }
+        if self.cleaned_data.get('previous_action_sequence'):
+            params['previous_action_sequence'] = self.cleaned_data['previous_action_sequence']
+        if self.cleaned_data.get('batch_size'):
+            params['batch_size'] = self.cleaned_data['batch_size']
+        
+        # Save parameters to the action
+        action.parameters = params
+        
+        if commit:
+            action.save()
+            
+        return action
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # If we're editing an existing action, populate from parameters
+        if self.instance and self.instance.pk and self.instance.parameters:
+            params = self.instance.parameters
+            
+            self.fields['connection'].initial = params.get('connection_id')
+            self.fields['table'].initial = params.get('table', '')
+            self.fields['write_query'].initial = params.get('write_query', '')
+            self.fields['columns'].initial = ', '.join(params.get('columns', []))
+            self.fields['data_source'].initial = params.get('data_source', 'previous_action')
+            self.fields['previous_action_sequence'].initial = params.get('previous_action_sequence')
+            self.fields['data_key'].initial = params.get('data_key', '')
+            self.fields['method'].initial = params.get('method', 'auto')
+            self.fields['batch_size'].initial = params.get('batch_size')
+            self.fields['timeout'].initial = params.get('timeout', 60)
+            self.fields['stop_on_error'].initial = params.get('stop_on_error', False)
+
 class FileCreateActionForm(forms.ModelForm):
     """
     Form for the File Create action.
@@ -16,6 +16,7 @@ class Action(models.Model):
     """
     ACTION_TYPES = [
         ('database_query', _('Database Query')),
+        ('database_bulk_write', _('Database Bulk Write')),
         ('datasource_refresh', _('Data Source Refresh')), 
         ('file_create', _('Create File')),
         ('csv_generate', _('Generate CSV')),
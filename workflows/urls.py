@@ -45,6 +45,8 @@ urlpatterns = [
     path('actions/<int:pk>/update/datasource-refresh/', action_views.DataSourceRefreshActionUpdateView.as_view(), name='datasource_refresh_action_update'),
     path('actions/create/database-query/', action_views.DatabaseQueryActionCreateView.as_view(), name='database_query_action_create'),
     path('actions/<int:pk>/update/database-query/', action_views.DatabaseQueryActionUpdateView.as_view(), name='database_query_action_update'),
+    path('actions/create/database-bulk-write/', action_views.DatabaseBulkWriteActionCreateView.as_view(), name='database_bulk_write_action_create'),
+    path('actions/<int:pk>/update/database-bulk-write/', action_views.DatabaseBulkWriteActionUpdateView.as_view(), name='database_bulk_write_action_update'),
     path('actions/create/file-create/', action_views.FileCreateActionCreateView.as_view(), name='file_create_action_create'),
     path('actions/<int:pk>/update/file-create/', action_views.FileCreateActionUpdateView.as_view(), name='file_create_action_update'),
     path('actions/create/profile-check/', action_views.ProfileCheckActionCreateView.as_view(), name='profile_check_action_create'),